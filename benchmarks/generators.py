@@ -0,0 +1,180 @@
+import random
+from src.grammar.grammar import Grammar, Rule, NonTerminal, Terminal, GrammarSymbol
+from src.grammar.compiled import CompiledGrammar, is_terminal
+from src.grammar.utils.interface import NaiveGrammar, NaiveRule, naive_grammar_to_grammar
+from typing import List, Dict, Optional, Callable
+
+
+# Families of inputs for the benchmarks: a grammar and a generator of its words of a given length.
+# Words are lists of terminals, so parsers are measured without the translation of strings.
+
+WordGenerator = Callable[[int, random.Random], List[Terminal]]
+
+
+class Family:
+    name: str
+    grammar: Grammar
+    word: WordGenerator  # a word of the language of about the given length
+
+    def __init__(self, name: str, grammar: Grammar, word: WordGenerator):
+        self.name = name
+        self.grammar = grammar
+        self.word = word
+
+
+def from_rules(name: str, start: str, rules: Dict[str, List[str]],
+               word: Callable[[int, random.Random], str]) -> Family:
+    naive_rules = {NaiveRule(left, right) for left, rights in rules.items() for right in rights}
+    terminals = {sym for rule in naive_rules for sym in rule.right if not sym.isupper()}
+    grammar, rep = naive_grammar_to_grammar(NaiveGrammar(set(rules), terminals, start, naive_rules))
+    return Family(name, grammar, lambda length, rng: [rep.as_terminal(sym) for sym in word(length, rng)])
+
+
+def dyck_word(length: int, rng: random.Random) -> str:  # balanced brackets, length is rounded down to even
+    length -= length % 2
+    result: List[str] = []
+    opened = 0
+    for i in range(length):
+        if opened == length - i or (opened > 0 and rng.random() < 0.5):
+            result.append(")")
+            opened -= 1
+        else:
+            result.append("(")
+            opened += 1
+    return "".join(result)
+
+
+def palindrome_word(length: int, rng: random.Random) -> str:
+    half = "".join(rng.choice("ab") for _ in range(length // 2))
+    return half + (rng.choice("ab") if length % 2 == 1 else "") + half[::-1]
+
+
+def expression_word(length: int, rng: random.Random) -> str:  # a, +, * and brackets, at least the given length
+    result: List[str] = []
+    depth = 0
+    while True:
+        while len(result) + depth < length and rng.random() < 0.3:
+            result.append("(")
+            depth += 1
+        result.append("a")
+        while depth > 0 and rng.random() < 0.3:
+            result.append(")")
+            depth -= 1
+        if len(result) + depth >= length:
+            break
+        result.append(rng.choice("+*"))
+    return "".join(result) + ")" * depth
+
+
+def list_word(length: int, rng: random.Random) -> str:  # a+a+...+a, length is rounded down to odd
+    return "+".join("a" * max(1, (length + 1) // 2))
+
+
+families: Dict[str, Family] = {family.name: family for family in [
+    from_rules("dyck", "S", {"S": ["(S)S", ""]}, dyck_word),
+    from_rules("palindromes", "S", {"S": ["aSa", "bSb", "a", "b", ""]}, palindrome_word),
+    from_rules("arithmetic", "E", {"E": ["E+T", "T"], "T": ["T*F", "F"], "F": ["(E)", "a"]}, expression_word),
+    from_rules("right_list", "L", {"L": ["a+L", "a"]}, list_word),
+    from_rules("left_list", "L", {"L": ["L+a", "a"]}, list_word),
+    from_rules("ambiguous", "S", {"S": ["SS", "a"]}, lambda length, rng: "a" * max(1, length)),
+]}
+
+
+def random_grammar(size: int, seed: int = 0, terminals: int = 8) -> Grammar:
+    # about size rules over size / 4 non-terminals, every non-terminal has a rule of terminals only, so all of them
+    # are productive, and a growing one; right parts have up to four symbols, some rules are empty or unit ones
+    rng = random.Random(seed)
+    alphabet = [Terminal() for _ in range(terminals)]
+    non_terminals = [NonTerminal() for _ in range(max(1, size // 4))]
+    rules = set()
+    for non in non_terminals:
+        rules.add(Rule(non, tuple(rng.choice(alphabet) for _ in range(rng.randint(1, 2)))))
+        rules.add(Rule(non, (rng.choice(non_terminals), rng.choice(alphabet), rng.choice(non_terminals))))
+    while len(rules) < size:
+        length = 0 if rng.random() < 0.05 else rng.randint(1, 4)
+        right: List[GrammarSymbol] = [rng.choice(non_terminals) if rng.random() < 0.5 else rng.choice(alphabet)
+                                      for _ in range(length)]
+        rules.add(Rule(rng.choice(non_terminals), tuple(right)))
+    return Grammar(set(non_terminals), set(alphabet), non_terminals[0], rules)
+
+
+def finishing_rules(compiled: CompiledGrammar) -> List[Optional[int]]:
+    # non-terminal id -> a rule of the shortest words from it, None if it is not productive. A rule replaces the
+    # previous one only if it is strictly shorter, so following them from any non-terminal ends.
+    lengths: List[Optional[int]] = [None] * len(compiled.non_terminals)
+    result: List[Optional[int]] = [None] * len(compiled.non_terminals)
+    changed = True
+    while changed:
+        changed = False
+        for rule, (left, right) in enumerate(zip(compiled.lefts, compiled.rights)):
+            length = 0
+            for symbol in right:
+                part = 1 if is_terminal(symbol) else lengths[symbol]
+                if part is None:
+                    break
+                length += part
+            else:
+                if lengths[left] is None or length < lengths[left]:
+                    lengths[left] = length
+                    result[left] = rule
+                    changed = True
+    return result
+
+
+class Sampler:
+    # Random leftmost derivations from the start: growing rules are chosen at random while the shortest word of the
+    # sentential form fits into the length, then the finishing rules close it. A word is shorter only if the grammar
+    # has no longer ones near the length.
+    compiled: CompiledGrammar
+    finishing: List[Optional[int]]
+    shortest: List[int]  # non-terminal id -> length of its shortest word, 0 if it is not productive
+    growths: List[int]  # rule id -> the shortest word of the right part minus the one of the left part
+    usable: List[List[int]]  # non-terminal id -> its rules with productive symbols only
+
+    def __init__(self, compiled: CompiledGrammar):
+        self.compiled = compiled
+        self.finishing = finishing_rules(compiled)
+        if self.finishing[compiled.start] is None:
+            raise ValueError("The language of the grammar is empty.")
+        self.shortest = [0] * len(compiled.non_terminals)
+        for non in range(len(compiled.non_terminals)):  # lengths of the finishing derivations
+            stack = [non] if self.finishing[non] is not None else []
+            while len(stack) > 0:
+                symbol = stack.pop()
+                if is_terminal(symbol):
+                    self.shortest[non] += 1
+                else:
+                    stack.extend(compiled.rights[self.finishing[symbol]])
+        self.growths = [sum(1 if is_terminal(sym) else self.shortest[sym] for sym in right) - self.shortest[left]
+                        for left, right in zip(compiled.lefts, compiled.rights)]
+        self.usable = [[rule for rule in rules if all(is_terminal(sym) or self.finishing[sym] is not None
+                                                      for sym in compiled.rights[rule])] for rules in compiled.by_left]
+
+    def word(self, length: int, rng: random.Random) -> List[Terminal]:
+        compiled = self.compiled
+        result: List[Terminal] = []
+        stack: List[int] = [compiled.start]
+        pending = self.shortest[compiled.start]  # the shortest word of the symbols on the stack
+        steps = 0
+        while len(stack) > 0:
+            symbol = stack.pop()
+            if is_terminal(symbol):
+                result.append(compiled.terminals[~symbol])
+                pending -= 1
+                continue
+            steps += 1
+            free = length - len(result) - pending
+            options = [rule for rule in self.usable[symbol] if 0 < self.growths[rule] <= free]
+            extendable = [rule for rule in options if not all(map(is_terminal, compiled.rights[rule]))]
+            if steps > 10 * length + 100 or len(options) == 0:
+                rule = self.finishing[symbol]
+            else:  # rules that may grow further are preferred, otherwise most derivations end early
+                rule = rng.choice(extendable if len(extendable) > 0 else options)
+            pending += self.growths[rule]
+            stack.extend(reversed(compiled.rights[rule]))
+        return result
+
+
+def random_family(size: int, seed: int = 0) -> Family:
+    grammar = random_grammar(size, seed)
+    return Family(f"random_{size}", grammar, Sampler(CompiledGrammar(grammar)).word)
@@ -0,0 +1,93 @@
+import math
+import random
+import sys
+import time
+from src.grammar.grammar import Grammar, Rule, NonTerminal, Terminal, GrammarSymbol
+from src.parsing.implementations.cyk.chomsky import ChomskyNormalizer, Handler
+from src.parsing.implementations.cyk.chomsky import NonProducingEraser, UnreachableEraser, EpsilonProducingEraser
+from src.parsing.implementations.cyk.chomsky import SingleRuleEraser
+from typing import List, Tuple, Callable
+
+
+# Scaling of the Chomsky normal form passes, the exponent is the slope of log(time) over log(number of rules).
+# Run from the root: python -m benchmarks.normalization [sizes...]
+
+
+def chain_grammar(size: int) -> Grammar:  # A_i -> a A_i+1 A_i+1 | ε, deep propagation of every property
+    terminal = Terminal()
+    non_terminals = [NonTerminal() for _ in range(size + 1)]
+    rules = {Rule(non_terminals[size], (terminal,))}
+    for i in range(size):
+        rules.add(Rule(non_terminals[i], (terminal, non_terminals[i + 1], non_terminals[i + 1])))
+        rules.add(Rule(non_terminals[i], ()))
+    return Grammar(set(non_terminals), {terminal}, non_terminals[0], rules)
+
+
+def random_grammar(size: int, seed: int = 0) -> Grammar:  # about size rules, a quarter of them are epsilon rules
+    rng = random.Random(seed)
+    terminals = [Terminal() for _ in range(8)]
+    non_terminals = [NonTerminal() for _ in range(max(1, size // 2))]
+    rules = set()
+    for _ in range(size):
+        length = 0 if rng.random() < 0.25 else rng.randint(1, 4)
+        right: List[GrammarSymbol] = [rng.choice(non_terminals) if rng.random() < 0.6 else rng.choice(terminals)
+                                      for _ in range(length)]
+        rules.add(Rule(rng.choice(non_terminals), tuple(right)))
+    return Grammar(set(non_terminals), set(terminals), non_terminals[0], rules)
+
+
+def unit_grammar(size: int, seed: int = 0) -> Grammar:  # half of the rules are unit ones, with long unit cycles
+    rng = random.Random(seed)
+    terminals = [Terminal() for _ in range(8)]
+    non_terminals = [NonTerminal() for _ in range(max(2, size // 4))]
+    rules = set()
+    for i in range(len(non_terminals)):
+        rules.add(Rule(non_terminals[i], (non_terminals[(i + 1) % len(non_terminals)],)))
+    while len(rules) < size:
+        if rng.random() < 0.5:
+            rules.add(Rule(rng.choice(non_terminals), (rng.choice(non_terminals),)))
+        else:
+            rules.add(Rule(rng.choice(non_terminals), (rng.choice(non_terminals), rng.choice(non_terminals))))
+            rules.add(Rule(rng.choice(non_terminals), (rng.choice(terminals),)))
+    return Grammar(set(non_terminals), set(terminals), non_terminals[0], rules)
+
+
+def measure(handler: Callable[[], Handler], grammar: Grammar) -> float:
+    copy = Grammar(grammar.non_terminals, grammar.terminals, grammar.start, grammar.rules)
+    begin = time.perf_counter()
+    handler().handle(copy)
+    return time.perf_counter() - begin
+
+
+def normalize(grammar: Grammar) -> float:
+    copy = Grammar(grammar.non_terminals, grammar.terminals, grammar.start, grammar.rules)
+    begin = time.perf_counter()
+    ChomskyNormalizer().normalize(copy)
+    return time.perf_counter() - begin
+
+
+def exponent(points: List[Tuple[int, float]]) -> float:  # least squares slope in log-log scale
+    xs = [math.log(size) for size, _ in points]
+    ys = [math.log(max(seconds, 1e-9)) for _, seconds in points]
+    mean_x, mean_y = sum(xs) / len(xs), sum(ys) / len(ys)
+    return (sum((x - mean_x) * (y - mean_y) for x, y in zip(xs, ys)) /
+            sum((x - mean_x) ** 2 for x in xs))
+
+
+def main(sizes: List[int]) -> None:
+    passes = [("NonProducingEraser", lambda grammar: measure(NonProducingEraser, grammar)),
+              ("UnreachableEraser", lambda grammar: measure(UnreachableEraser, grammar)),
+              ("EpsilonProducingEraser", lambda grammar: measure(EpsilonProducingEraser, grammar)),
+              ("SingleRuleEraser", lambda grammar: measure(SingleRuleEraser, grammar)),
+              ("ChomskyNormalizer", normalize)]
+    for family, generate in [("chain", chain_grammar), ("random", random_grammar), ("units", unit_grammar)]:
+        grammars = [(size, generate(size)) for size in sizes]
+        print(f"{family}: " + ", ".join(f"{len(grammar.rules)} rules" for _, grammar in grammars))
+        for name, run in passes:
+            points = [(len(grammar.rules), min(run(grammar) for _ in range(3))) for _, grammar in grammars]
+            times = " ".join(f"{seconds:8.4f}" for _, seconds in points)
+            print(f"  {name:24} {times}  exponent {exponent(points):.2f}")
+
+
+if __name__ == '__main__':
+    main([int(size) for size in sys.argv[1:]] or [1000, 2000, 4000, 8000, 16000])
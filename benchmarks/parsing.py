@@ -0,0 +1,204 @@
+import argparse
+import json
+import platform
+import random
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+from src.grammar.grammar import Grammar
+from src.grammar.utils.symbols import SymbolTable
+from src.grammar.utils.bnf import read_bnf, write_bnf
+from src.parsing.parser import Parser
+from src.parsing.implementations.cyk.chomsky import ChomskyNormalizer
+from src.parsing.implementations.cyk.parser import CYKParser
+from src.parsing.implementations.cyk.bitset import BitsetCYKParser
+from src.parsing.implementations.cyk import matrix
+from src.parsing.implementations.cyk.matrix import MatrixCYKParser
+from src.parsing.implementations.earley.parser import EarleyParser
+from benchmarks.generators import Family, families, random_family
+from benchmarks.normalization import exponent
+from typing import List, Dict, Tuple, Callable, Any, Optional
+
+
+# Time and peak memory of fit() and predict() of the engines on the families of benchmarks.generators:
+# over the length of the word for every family, and over the number of rules for random grammars (with
+# ChomskyNormalizer and the BNF loader, read_bnf, as a part of the startup). Exponents are
+# the slopes of log(time) in log-log scale. Run from the root:
+#   python -m benchmarks.parsing [--families ...] [--engines ...] [--save benchmarks/baseline.json]
+#   python -m benchmarks.parsing --compare benchmarks/baseline.json
+# The comparison exits with 1 if some time grew more than the tolerance allows.
+
+baseline_file = Path(__file__).parent / "baseline.json"
+
+engines: Dict[str, Callable[[], Parser]] = {
+    "earley": EarleyParser,
+    "earley_compact": lambda: EarleyParser(compact=True),
+    "cyk": CYKParser,
+    "bitset_cyk": BitsetCYKParser,
+}
+if matrix.np is not None:
+    engines["matrix_cyk"] = MatrixCYKParser
+
+Point = List[float]  # [size, seconds, peak bytes]
+
+
+def copy(grammar: Grammar) -> Grammar:  # normalization changes the grammar it is given
+    return Grammar(grammar.non_terminals, grammar.terminals, grammar.start, grammar.rules)
+
+
+def timed(run: Callable[[], Any], repeats: int) -> float:  # the best of repeats
+    best = float("inf")
+    for _ in range(repeats):
+        begin = time.perf_counter()
+        run()
+        best = min(best, time.perf_counter() - begin)
+    return best
+
+
+def peak(run: Callable[[], Any]) -> int:  # measured apart from the time, tracing slows allocations down
+    tracemalloc.start()
+    try:
+        run()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def curve(points: List[Point]) -> Dict[str, Any]:
+    return {"points": points, "exponent": exponent([(size, seconds) for size, seconds, _ in points])
+            if len(points) > 1 else None}
+
+
+def fitter(engine: str, grammar: Grammar) -> Callable[[], Any]:
+    if engine == "normalizer":
+        return lambda: ChomskyNormalizer().normalize(copy(grammar))
+    if engine == "bnf":  # loading of the grammar from its text
+        text = write_bnf(grammar, SymbolTable())
+        return lambda: read_bnf(text)
+    return lambda: engines[engine]().fit(copy(grammar))
+
+
+def measure_words(family: Family, engine: str, lengths: List[int], repeats: int, budget: float,
+                  seed: int) -> Dict[str, Any]:
+    # words are the same for all engines, longer ones are skipped once a prediction takes more than budget seconds
+    rng = random.Random(seed)
+    parser = engines[engine]()
+    parser.fit(copy(family.grammar))
+    points: List[Point] = []
+    for length in lengths:
+        word = family.word(length, rng)
+        seconds = timed(lambda: parser.predict(word), repeats)
+        points.append([len(word), seconds, peak(lambda: parser.predict(word))])
+        if seconds > budget:
+            break
+    result = curve(points)
+    result["fit"] = timed(fitter(engine, family.grammar), repeats)
+    result["fit_memory"] = peak(fitter(engine, family.grammar))
+    return result
+
+
+def measure_grammars(engine: str, sizes: List[int], repeats: int, budget: float, seed: int) -> Dict[str, Any]:
+    points: List[Point] = []
+    for size in sizes:
+        grammar = random_family(size, seed).grammar
+        seconds = timed(fitter(engine, grammar), repeats)
+        points.append([len(grammar.rules), seconds, peak(fitter(engine, grammar))])
+        if seconds > budget:
+            break
+    return curve(points)
+
+
+def run(names: List[str], engine_names: List[str], lengths: List[int], sizes: List[int], repeats: int,
+        budget: float, seed: int) -> Dict[str, Any]:
+    result: Dict[str, Any] = {
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "lengths": lengths,
+        "sizes": sizes,
+        "words": {},
+        "grammars": {},
+    }
+    for name in names:
+        family = families[name] if name in families else random_family(int(name[len("random_"):]), seed)
+        result["words"][name] = {}
+        for engine in engine_names:
+            result["words"][name][engine] = measure_words(family, engine, lengths, repeats, budget, seed)
+            report(f"{name}/{engine}", result["words"][name][engine])
+    for engine in engine_names + ["normalizer", "bnf"]:
+        result["grammars"][engine] = measure_grammars(engine, sizes, repeats, budget, seed)
+        report(f"rules/{engine}", result["grammars"][engine])
+    return result
+
+
+def report(title: str, measured: Dict[str, Any]) -> None:
+    times = " ".join(f"{int(size)}:{seconds * 1000:.2f}ms" for size, seconds, _ in measured["points"])
+    memory = max(memory for _, _, memory in measured["points"]) if len(measured["points"]) > 0 else 0
+    slope = f"{measured['exponent']:.2f}" if measured["exponent"] is not None else "-"
+    fit = f"  fit {measured['fit'] * 1000:.2f}ms" if "fit" in measured else ""
+    print(f"{title:32} exponent {slope:>5}  peak {memory / 1024:9.1f}KiB{fit}  {times}")
+
+
+def curves(measured: Dict[str, Any]) -> Dict[Tuple[str, str, str], Dict[str, Any]]:
+    result = {("words", name, engine): data for name, by_engine in measured["words"].items()
+              for engine, data in by_engine.items()}
+    result.update({("grammars", "rules", engine): data for engine, data in measured["grammars"].items()})
+    return result
+
+
+def compare(baseline: Dict[str, Any], measured: Dict[str, Any], tolerance: float,
+            threshold: float = 1e-3) -> List[str]:
+    # times of equal sizes are compared, the ones below threshold seconds in both runs are too noisy to compare
+    regressions: List[str] = []
+    old_curves = curves(baseline)
+    for key, data in curves(measured).items():
+        old: Optional[Dict[str, Any]] = old_curves.get(key)
+        if old is None:
+            continue
+        old_times = {size: seconds for size, seconds, _ in old["points"]}
+        pairs = [(size, old_times[size], seconds) for size, seconds, _ in data["points"] if size in old_times]
+        if "fit" in data and "fit" in old:
+            pairs.append(("fit", old["fit"], data["fit"]))
+        for size, before, after in pairs:
+            if max(before, after) >= threshold and after > before * tolerance:
+                regressions.append(f"{'/'.join(key[1:])} at {size}: {before * 1000:.2f}ms -> {after * 1000:.2f}ms")
+    return regressions
+
+
+def main(arguments: List[str]) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.parsing",
+                                     description="Scaling of fit() and predict() of the parsing engines.")
+    parser.add_argument("--families", nargs="+", default=list(families) + ["random_200"],
+                        help=f"{', '.join(families)} or random_<rules>")
+    parser.add_argument("--engines", nargs="+", default=list(engines), choices=list(engines))
+    parser.add_argument("--lengths", nargs="+", type=int, default=[8, 16, 32, 64, 128, 256])
+    parser.add_argument("--sizes", nargs="+", type=int, default=[100, 200, 400, 800, 1600],
+                        help="numbers of rules of random grammars")
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--budget", type=float, default=1.0, help="seconds, longer inputs are skipped after it")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--save", type=Path, help="write the results as a baseline")
+    parser.add_argument("--compare", type=Path, nargs="?", const=baseline_file, help="compare with a baseline")
+    parser.add_argument("--tolerance", type=float, default=1.5, help="allowed ratio of times to the baseline")
+    options = parser.parse_args(arguments)
+    for name in options.families:
+        if name not in families and not (name.startswith("random_") and name[len("random_"):].isdigit()):
+            parser.error(f"unknown family {name}")
+
+    measured = run(options.families, options.engines, options.lengths, options.sizes, options.repeats,
+                   options.budget, options.seed)
+    if options.save is not None:
+        with open(options.save, "w") as file:
+            json.dump(measured, file, indent=1)
+    if options.compare is not None:
+        with open(options.compare, "r") as file:
+            regressions = compare(json.load(file), measured, options.tolerance)
+        for line in regressions:
+            print(f"regression: {line}")
+        print(f"{len(regressions)} regressions against {options.compare}")
+        return 1 if len(regressions) > 0 else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
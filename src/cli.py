@@ -0,0 +1,155 @@
+import argparse
+import sys
+import time
+from pathlib import Path
+from src.grammar.errors import GrammarError
+from src.grammar.utils.bnf import load_bnf
+from src.grammar.utils.interface import load_naive_grammar
+from src.parsing.parser import Parser, NaiveParser, TokenParser, GrammarClassError
+from src.parsing.parallel import ParallelParser
+from src.parsing.implementations.auto.parser import AutoParser
+from src.parsing.implementations.cyk.parser import CYKParser
+from src.parsing.implementations.cyk.bitset import BitsetCYKParser
+from src.parsing.implementations.cyk import matrix
+from src.parsing.implementations.cyk.matrix import MatrixCYKParser
+from src.parsing.implementations.earley.parser import EarleyParser
+from src.parsing.implementations.lr.parser import LRParser
+from src.parsing.implementations.lr.glr import GLRParser
+from src.parsing.implementations.regular.parser import RegularParser
+from typing import List, Dict, Callable, Iterator, BinaryIO, TextIO, Union
+
+
+# Batch recognition: the grammar is loaded and fit once, words are read by blocks (one word per line) and verdicts
+# are written by blocks (Yes or No per line, in the order of words). Run from the root:
+#   python -m src.cli grammar.bnf words.txt [--engine earley] [--workers 4] [--stats] > verdicts.txt
+#   python -m src.cli grammar.txt --format naive < words.txt
+# A BNF grammar (see read_bnf) takes words of tokens separated by whitespace, or of characters with --characters.
+# A naive grammar is in the format of input_naive_grammar and takes words of characters.
+
+engines: Dict[str, Callable[[], Parser]] = {
+    "auto": AutoParser,
+    "earley": lambda: EarleyParser(compact=True),
+    "earley_classic": EarleyParser,
+    "cyk": CYKParser,
+    "bitset_cyk": BitsetCYKParser,
+    "lalr": lambda: LRParser("LALR(1)"),
+    "lr1": lambda: LRParser("LR(1)"),
+    "glr": GLRParser,
+    "regular": RegularParser,
+}
+if matrix.np is not None:
+    engines["matrix_cyk"] = MatrixCYKParser
+
+block_size = 1 << 20  # bytes of words read at once
+
+
+def read_blocks(file: BinaryIO, size: int = block_size) -> Iterator[List[str]]:  # lists of whole lines
+    rest = b""
+    while True:
+        data = file.read(size)
+        if len(data) == 0:
+            break
+        data = rest + data
+        cut = data.rfind(b"\n") + 1  # a line cut by the block waits for the next one
+        rest = data[cut:]
+        if cut > 0:
+            yield lines_of(data[:cut])
+    if len(rest) > 0:
+        yield lines_of(rest + b"\n")
+
+
+def lines_of(data: bytes) -> List[str]:  # data ends with a line break
+    text = data.decode("utf-8", "replace")  # a broken character is not a terminal, so the word is rejected
+    if "\r" in text:
+        text = text.replace("\r\n", "\n")
+    lines = text.split("\n")
+    lines.pop()
+    return lines
+
+
+def fit(options: argparse.Namespace) -> Union[NaiveParser, TokenParser]:
+    parser = engines[options.engine]()
+    if options.format == "naive":
+        naive = NaiveParser(parser, filtering=not options.no_filter)
+        naive.fit(load_naive_grammar(options.grammar))
+        return naive
+    grammar, table = load_bnf(options.grammar)
+    tokens = TokenParser(parser, characters=options.characters, filtering=not options.no_filter)
+    tokens.fit(grammar, table)
+    return tokens
+
+
+def recognize(parser: Union[NaiveParser, TokenParser], source: BinaryIO, target: TextIO, workers: int,
+              chunk_size: int, echo: bool) -> Dict[str, int]:
+    counts = {"words": 0, "accepted": 0, "bytes": 0}
+    with ParallelParser(parser, workers, chunk_size) as pool:  # processes start on the first use of the pool
+        predict = pool.predict_many if workers > 1 else parser.predict_many
+        for words in read_blocks(source):
+            results = predict(words)
+            if echo:
+                lines = [f"{word}\t{'Yes' if result else 'No'}" for word, result in zip(words, results)]
+            else:
+                lines = ["Yes" if result else "No" for result in results]
+            target.write("\n".join(lines) + "\n")
+            counts["words"] += len(words)
+            counts["accepted"] += sum(results)
+            counts["bytes"] += sum(map(len, words)) + len(words)
+    return counts
+
+
+def main(arguments: List[str]) -> int:
+    parser = argparse.ArgumentParser(prog="python -m src.cli", description="Recognition of words by a grammar.")
+    parser.add_argument("grammar", type=Path)
+    parser.add_argument("words", type=Path, nargs="?", help="one word per line, stdin by default")
+    parser.add_argument("--format", choices=["bnf", "naive"], default="bnf", help="format of the grammar")
+    parser.add_argument("--characters", action="store_true", help="every character of a BNF word is a token")
+    parser.add_argument("--engine", choices=list(engines), default="auto")
+    parser.add_argument("--workers", type=int, default=1, help="processes that parse words")
+    parser.add_argument("--chunk-size", type=int, default=1024, help="words in one task of a worker")
+    parser.add_argument("--no-filter", action="store_true", help="give all words to the engine, without a prefilter")
+    parser.add_argument("--output", type=Path, help="stdout by default")
+    parser.add_argument("--echo", action="store_true", help="write every word before its verdict")
+    parser.add_argument("--stats", action="store_true", help="write the times and the throughput to stderr")
+    options = parser.parse_args(arguments)
+    if options.workers < 1 or options.chunk_size < 1:
+        parser.error("workers and chunk size must be positive")
+
+    started = time.perf_counter()
+    try:
+        fitted = fit(options)
+    except (OSError, ValueError, GrammarError, GrammarClassError) as error:
+        print(f"{parser.prog}: can not load {options.grammar}: {error}", file=sys.stderr)
+        return 2
+    loaded = time.perf_counter()
+
+    source = open(options.words, "rb") if options.words is not None else sys.stdin.buffer
+    if options.output is not None:
+        target = open(options.output, "w", encoding="utf-8", buffering=block_size)
+    else:
+        target = sys.stdout
+    try:
+        counts = recognize(fitted, source, target, options.workers, options.chunk_size, options.echo)
+    finally:
+        if options.words is not None:
+            source.close()
+        if options.output is not None:
+            target.close()
+        else:
+            target.flush()
+    finished = time.perf_counter()
+
+    if options.stats:
+        seconds = max(finished - loaded, 1e-9)
+        words, accepted = counts["words"], counts["accepted"]
+        print(f"engine {options.engine}, workers {options.workers}", file=sys.stderr)
+        print(f"load and fit  {loaded - started:.3f}s", file=sys.stderr)
+        print(f"words         {words}, accepted {accepted} ({accepted / max(words, 1):.1%})", file=sys.stderr)
+        print(f"recognition   {seconds:.3f}s, {words / seconds:.0f} words/s, "
+              f"{counts['bytes'] / seconds / (1 << 20):.2f} MiB/s", file=sys.stderr)
+        if options.workers == 1 and fitted.prefilter is not None:  # the prefilters of workers are not returned
+            print(f"prefilter     {fitted.prefilter.hit_rate():.1%} of words rejected", file=sys.stderr)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,147 @@
+from src.grammar.compiled import CompiledGrammar, is_terminal
+from typing import List, Set, Optional
+import heapq
+
+
+def occurrences(compiled: CompiledGrammar) -> List[List[int]]:  # non-terminal id -> ids of rules, with repetitions
+    result: List[List[int]] = [[] for _ in compiled.non_terminals]
+    for rule, right in enumerate(compiled.rights):
+        for symbol in right:
+            if not is_terminal(symbol):
+                result[symbol].append(rule)
+    return result
+
+
+def nullable(compiled: CompiledGrammar) -> List[bool]:  # non-terminal id -> deduces epsilon, linear in grammar size
+    result = [False] * len(compiled.non_terminals)
+    remaining = [len(right) for right in compiled.rights]  # symbols of the rule not known to be nullable
+    users = occurrences(compiled)
+
+    queue: List[int] = []
+    for rule in compiled.by_right.get((), []):
+        if not result[compiled.lefts[rule]]:
+            result[compiled.lefts[rule]] = True
+            queue.append(compiled.lefts[rule])
+    while len(queue) > 0:
+        non = queue.pop()
+        for rule in users[non]:
+            remaining[rule] -= 1
+            left = compiled.lefts[rule]
+            if remaining[rule] == 0 and not result[left]:
+                result[left] = True
+                queue.append(left)
+    return result
+
+
+def productive(compiled: CompiledGrammar) -> List[bool]:  # non-terminal id -> deduces some word, linear
+    result = [False] * len(compiled.non_terminals)
+    remaining = [sum(1 for symbol in right if not is_terminal(symbol)) for right in compiled.rights]
+    users = occurrences(compiled)
+
+    queue: List[int] = []
+    for rule, count in enumerate(remaining):
+        if count == 0 and not result[compiled.lefts[rule]]:
+            result[compiled.lefts[rule]] = True
+            queue.append(compiled.lefts[rule])
+    while len(queue) > 0:
+        non = queue.pop()
+        for rule in users[non]:
+            remaining[rule] -= 1
+            left = compiled.lefts[rule]
+            if remaining[rule] == 0 and not result[left]:
+                result[left] = True
+                queue.append(left)
+    return result
+
+
+def first_sets(compiled: CompiledGrammar, nullable_flags: List[bool]) -> List[Set[int]]:
+    # non-terminal id -> ids of terminals that can start a subword deduced from it
+    result: List[Set[int]] = [set() for _ in compiled.non_terminals]
+    dependants: List[Set[int]] = [set() for _ in compiled.non_terminals]  # B -> A-s such that FIRST(A) has FIRST(B)
+    for left, right in zip(compiled.lefts, compiled.rights):
+        for symbol in right:
+            if is_terminal(symbol):
+                result[left].add(~symbol)
+                break
+            dependants[symbol].add(left)
+            if not nullable_flags[symbol]:
+                break
+
+    queue = [non for non in range(len(result)) if len(result[non]) > 0]
+    while len(queue) > 0:
+        non = queue.pop()
+        for dependant in dependants[non]:
+            if not result[non] <= result[dependant]:
+                result[dependant] |= result[non]
+                queue.append(dependant)
+    return result
+
+
+def follow_sets(compiled: CompiledGrammar, nullable_flags: List[bool], firsts: List[Set[int]]) -> List[Set[int]]:
+    # non-terminal id -> ids of terminals that can follow it, len(compiled.terminals) is the end marker
+    result: List[Set[int]] = [set() for _ in compiled.non_terminals]
+    result[compiled.start].add(len(compiled.terminals))
+    dependants: List[Set[int]] = [set() for _ in compiled.non_terminals]  # A -> B-s such that FOLLOW(B) has FOLLOW(A)
+    for left, right in zip(compiled.lefts, compiled.rights):
+        for i, symbol in enumerate(right):
+            if is_terminal(symbol):
+                continue
+            for following in right[i + 1:]:
+                if is_terminal(following):
+                    result[symbol].add(~following)
+                    break
+                result[symbol] |= firsts[following]
+                if not nullable_flags[following]:
+                    break
+            else:
+                dependants[left].add(symbol)
+
+    queue = [non for non in range(len(result)) if len(result[non]) > 0]
+    while len(queue) > 0:
+        non = queue.pop()
+        for dependant in dependants[non]:
+            if not result[non] <= result[dependant]:
+                result[dependant] |= result[non]
+                queue.append(dependant)
+    return result
+
+
+def is_right_linear(compiled: CompiledGrammar) -> bool:  # a non-terminal may only be the last symbol of a rule
+    return all(is_terminal(symbol) for right in compiled.rights for symbol in right[:-1])
+
+
+def reachable(compiled: CompiledGrammar) -> List[bool]:  # non-terminal id -> occurs in a form deduced from the start
+    result = [False] * len(compiled.non_terminals)
+    result[compiled.start] = True
+    stack = [compiled.start]
+    while len(stack) > 0:
+        non = stack.pop()
+        for rule in compiled.by_left[non]:
+            for symbol in compiled.rights[rule]:
+                if not is_terminal(symbol) and not result[symbol]:
+                    result[symbol] = True
+                    stack.append(symbol)
+    return result
+
+
+def min_lengths(compiled: CompiledGrammar) -> List[Optional[int]]:
+    # non-terminal id -> length of the shortest word deduced from it, None if it is not productive.
+    # Knuth's generalization of Dijkstra: the length of a rule is known once all its non-terminals are
+    remaining = [sum(1 for symbol in right if not is_terminal(symbol)) for right in compiled.rights]
+    lengths = [sum(1 for symbol in right if is_terminal(symbol)) for right in compiled.rights]
+    users = occurrences(compiled)
+    result: List[Optional[int]] = [None] * len(compiled.non_terminals)
+
+    heap = [(lengths[rule], compiled.lefts[rule]) for rule, count in enumerate(remaining) if count == 0]
+    heapq.heapify(heap)
+    while len(heap) > 0:
+        length, non = heapq.heappop(heap)
+        if result[non] is not None:
+            continue
+        result[non] = length
+        for rule in users[non]:
+            remaining[rule] -= 1
+            lengths[rule] += length
+            if remaining[rule] == 0 and result[compiled.lefts[rule]] is None:
+                heapq.heappush(heap, (lengths[rule], compiled.lefts[rule]))
+    return result
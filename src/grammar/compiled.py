@@ -0,0 +1,90 @@
+from src.grammar.grammar import Grammar, Rule, Terminal, NonTerminal, GrammarSymbol
+from typing import List, Dict, Tuple, Optional
+
+
+# Symbols of a compiled rule are ints: a non-terminal is its id (>= 0), a terminal is ~id (< 0).
+# Terminal ids depend only on the set of terminals, so grammars that share it (e.g. a grammar and its normal form)
+# encode words identically.
+
+
+def is_terminal(symbol: int) -> bool:
+    return symbol < 0
+
+
+class CompiledGrammar:
+    non_terminals: List[NonTerminal]  # id -> non-terminal
+    terminals: List[Terminal]  # id -> terminal
+    non_terminal_ids: Dict[NonTerminal, int]
+    terminal_ids: Dict[Terminal, int]
+    start: int
+    rules: List[Rule]  # id -> rule
+    lefts: List[int]  # rule id -> id of the left part
+    rights: List[Tuple[int, ...]]  # rule id -> encoded right part
+    by_left: List[List[int]]  # non-terminal id -> ids of its rules
+    by_right: Dict[Tuple[int, ...], List[int]]  # encoded right part -> ids of rules with it
+
+    def __init__(self, grammar: Grammar):
+        used = {sym for rule in grammar.rules for sym in rule.right} | {rule.left for rule in grammar.rules}
+        used.add(grammar.start)
+        self.non_terminals = sorted(grammar.non_terminals | {sym for sym in used if isinstance(sym, NonTerminal)},
+                                    key=lambda non: non.serial)
+        self.terminals = sorted(grammar.terminals | {sym for sym in used if isinstance(sym, Terminal)},
+                                key=lambda term: term.serial)
+        self.non_terminal_ids = {non: i for i, non in enumerate(self.non_terminals)}
+        self.terminal_ids = {term: i for i, term in enumerate(self.terminals)}
+        self.start = self.non_terminal_ids[grammar.start]
+
+        self.rules = sorted(grammar.rules, key=lambda rule: (rule.left.serial,
+                                                              tuple(sym.serial for sym in rule.right)))
+        self.lefts = [self.non_terminal_ids[rule.left] for rule in self.rules]
+        self.rights = [tuple(self.encode_symbol(sym) for sym in rule.right) for rule in self.rules]
+
+        self.by_left = [[] for _ in self.non_terminals]
+        self.by_right = {}
+        for i, (left, right) in enumerate(zip(self.lefts, self.rights)):
+            self.by_left[left].append(i)
+            if right not in self.by_right:
+                self.by_right[right] = []
+            self.by_right[right].append(i)
+
+    def encode_symbol(self, sym: GrammarSymbol) -> int:
+        if isinstance(sym, NonTerminal):
+            return self.non_terminal_ids[sym]
+        return ~self.terminal_ids[sym]
+
+    def decode_symbol(self, symbol: int) -> GrammarSymbol:
+        if is_terminal(symbol):
+            return self.terminals[~symbol]
+        return self.non_terminals[symbol]
+
+    def encode(self, word: List[Terminal]) -> Optional[List[int]]:  # None if word has unknown terminals
+        ids = self.terminal_ids
+        try:
+            return [ids[term] for term in word]
+        except KeyError:
+            return None
+
+    def has_epsilon_rule(self, non: int) -> bool:
+        return () in self.by_right and any(self.lefts[rule] == non for rule in self.by_right[()])
+
+
+class DottedRules:  # every rule with every position of the point, positions of the point in a rule are consecutive
+    firsts: List[int]  # rule id -> the state with the point at the beginning
+    next: List[Optional[int]]  # state -> encoded symbol after the point, None if the rule is completed
+    lefts: List[int]  # state -> non-terminal id of the rule
+    rules: List[int]  # state -> rule id
+
+    def __init__(self, compiled: CompiledGrammar):
+        self.firsts = []
+        self.next = []
+        self.lefts = []
+        self.rules = []
+        for rule, (left, right) in enumerate(zip(compiled.lefts, compiled.rights)):
+            self.firsts.append(len(self.next))
+            self.next.extend(right)
+            self.next.append(None)
+            self.lefts.extend([left] * (len(right) + 1))
+            self.rules.extend([rule] * (len(right) + 1))
+
+    def __len__(self) -> int:
+        return len(self.next)
@@ -12,3 +12,7 @@ class InvalidTerminal(InvalidGrammarSymbol):
 
 class InvalidNonTerminal(InvalidGrammarSymbol):
     pass
+
+
+class GrammarSyntaxError(GrammarError):  # text of a grammar can not be read
+    pass
@@ -1,8 +1,15 @@
 from typing import List, Optional, Set, Tuple
+from itertools import count
+
+
+symbol_counter = count()
 
 
 class GrammarSymbol:
-    pass
+    serial: int  # creation order, gives symbols (hashed by identity) a reproducible order
+
+    def __init__(self):
+        self.serial = next(symbol_counter)
 
 
 class Terminal(GrammarSymbol):
@@ -16,16 +23,23 @@ class NonTerminal(GrammarSymbol):
 class Rule:
     left: NonTerminal
     right: Tuple[GrammarSymbol, ...]
+    weight: float  # used by weighted parsing only, rules are compared without it
+    hash: int
 
-    def __init__(self, left: NonTerminal, right: Tuple[GrammarSymbol, ...]):
+    def __init__(self, left: NonTerminal, right: Tuple[GrammarSymbol, ...], weight: float = 1.0):
         self.left = left
         self.right = right
+        self.weight = weight
+        self.hash = hash((left, right))  # rules are immutable, so it is computed once
 
     def __eq__(self, other) -> bool:
         return self.left == other.left and self.right == other.right
 
     def __hash__(self) -> int:
-        return hash((self.left, self.right))
+        return self.hash
+
+    def __reduce__(self):  # symbols are hashed by identity, so the hash is recomputed after unpickling
+        return Rule, (self.left, self.right, self.weight)
 
 
 class Grammar:  # Context free
@@ -0,0 +1,148 @@
+import re
+from pathlib import Path
+from src.grammar.grammar import Grammar, Rule, Terminal, NonTerminal, GrammarSymbol
+from src.grammar.utils.symbols import SymbolTable
+from src.grammar.errors import GrammarSyntaxError
+from typing import List, Dict, Set, Tuple, Optional, Union
+
+
+# BNF text of a grammar:
+#
+#   # comments run to the end of the line
+#   expr   ::= expr "+" term | term
+#   term   ::= term "*" factor | factor ;
+#   factor ::= "(" expr ")" | NUMBER
+#   <list> ::= <item> <list> | ""
+#
+# A rule is a name, ::= (or ->) and alternatives separated by |, it ends where the next rule begins, ; is optional.
+# Quoted strings are terminals, "" and an empty alternative are the empty word. Names in angle brackets are
+# non-terminals, bare names are non-terminals if they have rules and terminals (token types) otherwise. The start is
+# the left part of the first rule. The text is split by one regular expression, symbols are interned in a SymbolTable.
+
+token = re.compile(r"""
+    (?P<space>(?:\s+|\#[^\n]*)+)
+  | (?P<define>::=|->)
+  | (?P<bar>\|)
+  | (?P<end>;)
+  | <(?P<bracketed>[^<>\n]+)>
+  | "(?P<double>(?:[^"\\\n]|\\.)*)"
+  | '(?P<single>(?:[^'\\\n]|\\.)*)'
+  | (?P<name>[\w.]+)
+  | (?P<error>.)
+""", re.VERBOSE)
+
+escape = re.compile(r"\\(.)")
+
+Symbol = Tuple[str, str]  # (kind, name): kind is "terminal", "non_terminal" or "name"
+
+empty: Symbol = ("terminal", "")
+
+
+def line_of(text: str, position: int) -> int:
+    return text.count("\n", 0, position) + 1
+
+
+def split_rules(text: str) -> List[Tuple[str, List[List[Symbol]]]]:  # [(left, alternatives)]
+    rules: List[Tuple[str, List[List[Symbol]]]] = []
+    alternatives: Optional[List[List[Symbol]]] = None  # of the current rule, None between ; and the next rule
+    last: Optional[Tuple[Symbol, int]] = None  # the last symbol, it may be the left part of the next rule
+    for match in token.finditer(text):
+        kind = match.lastgroup
+        if kind == "space":
+            continue
+        if kind == "error":
+            raise GrammarSyntaxError(f"Line {line_of(text, match.start())}: unexpected {match.group()!r}.")
+
+        if kind == "define":
+            if last is None or last[0][0] == "terminal":
+                raise GrammarSyntaxError(f"Line {line_of(text, match.start())}: a rule has no left part.")
+            if alternatives is not None:
+                alternatives[-1].pop()  # the left part was read as the last symbol of the previous rule
+            alternatives = [[]]
+            rules.append((last[0][1], alternatives))
+            last = None
+        elif kind == "bar" or kind == "end":
+            if alternatives is None:
+                raise GrammarSyntaxError(f"Line {line_of(text, match.start())}: {match.group()} is out of a rule.")
+            if kind == "bar":
+                alternatives.append([])
+            else:
+                alternatives = None
+            last = None
+        else:
+            if alternatives is None and last is not None:
+                raise GrammarSyntaxError(f"Line {line_of(text, last[1])}: ::= is expected after {last[0][1]}.")
+            if kind == "bracketed":
+                symbol: Symbol = ("non_terminal", match.group(kind).strip())
+            elif kind == "name":
+                symbol = ("name", match.group(kind))
+            else:
+                value = match.group(kind)
+                symbol = ("terminal", escape.sub(r"\1", value) if "\\" in value else value)
+            last = (symbol, match.start())
+            if alternatives is not None:
+                alternatives[-1].append(symbol)
+    if alternatives is None and last is not None:
+        raise GrammarSyntaxError(f"Line {line_of(text, last[1])}: ::= is expected after {last[0][1]}.")
+    return rules
+
+
+def read_bnf(text: str, table: Optional[SymbolTable] = None) -> Tuple[Grammar, SymbolTable]:
+    table = table if table is not None else SymbolTable()
+    rules = split_rules(text)
+    if len(rules) == 0:
+        raise GrammarSyntaxError("The grammar has no rules.")
+    defined: Set[str] = {left for left, _ in rules}
+    terminal = table.terminal
+    non_terminal = table.non_terminal
+    cache: Dict[Symbol, GrammarSymbol] = {}  # most symbols occur many times
+
+    result: Set[Rule] = set()
+    for left, alternatives in rules:
+        left_symbol = non_terminal(left)
+        for alternative in alternatives:
+            right: List[GrammarSymbol] = []
+            for symbol in alternative:
+                if symbol == empty:
+                    continue
+                sym = cache.get(symbol)
+                if sym is None:
+                    kind, name = symbol
+                    if kind == "non_terminal" or (kind == "name" and name in defined):
+                        sym = non_terminal(name)
+                    else:
+                        sym = terminal(name)
+                    cache[symbol] = sym
+                right.append(sym)
+            result.add(Rule(left_symbol, tuple(right)))
+
+    non_terminals = {non_terminal(left) for left in defined} | \
+        {sym for sym in cache.values() if isinstance(sym, NonTerminal)}
+    terminals = {sym for sym in cache.values() if isinstance(sym, Terminal)}
+    return Grammar(non_terminals, terminals, non_terminal(rules[0][0]), result), table
+
+
+def load_bnf(path: Union[str, Path], table: Optional[SymbolTable] = None) -> Tuple[Grammar, SymbolTable]:
+    with open(path, "r", encoding="utf-8") as file:
+        return read_bnf(file.read(), table)
+
+
+def write_bnf(grammar: Grammar, table: SymbolTable) -> str:  # read_bnf of the text gives the same grammar
+    def quoted(name: str) -> str:
+        return '"' + name.replace("\\", "\\\\").replace('"', '\\"') + '"'
+
+    by_left: Dict[NonTerminal, List[Rule]] = {}
+    for rule in grammar.rules:
+        by_left.setdefault(rule.left, []).append(rule)
+    lefts = [grammar.start] + sorted((non for non in by_left if non is not grammar.start), key=lambda non: non.serial)
+    lines: List[str] = []
+    for left in lefts:
+        alternatives = []
+        for rule in sorted(by_left.get(left, []), key=lambda rule: tuple(sym.serial for sym in rule.right)):
+            parts = [f"<{table.auto_add(sym)}>" if isinstance(sym, NonTerminal) else quoted(table.auto_add(sym))
+                     for sym in rule.right]
+            alternatives.append(" ".join(parts) if len(parts) > 0 else '""')
+        if len(alternatives) == 0:  # the start must have the first rule, S -> S keeps the language empty
+            alternatives.append(f"<{table.auto_add(left)}>")
+        lines.append(f"<{table.auto_add(left)}> ::= " + " | ".join(alternatives))
+    return "\n".join(lines) + "\n"
@@ -1,4 +1,6 @@
-from typing import Set, Dict, Tuple, Optional
+from typing import Set, Dict, Tuple, Optional, Callable, Union
+from pathlib import Path
+import hashlib
 from src.grammar.grammar import Grammar, Rule
 from src.grammar.utils.representor import Representor, valid_non_terminals, valid_symbols
 from src.grammar.utils.representor import valid_non_terminals_list, valid_terminals_list
@@ -8,14 +10,16 @@ from src.grammar.errors import InvalidNonTerminal, InvalidGrammarSymbol
 class NaiveRule:
     left: str
     right: str
+    weight: float
 
-    def __init__(self, left: str, right: str):
+    def __init__(self, left: str, right: str, weight: float = 1.0):
         if left not in valid_non_terminals:
             raise InvalidNonTerminal(f"Non-terminal symbol {left} is invalid.")
         if any([sym not in valid_symbols for sym in right]):
             raise InvalidGrammarSymbol(f"Symbol {left} is invalid.")
         self.left = left
         self.right = right
+        self.weight = weight
 
 
 class NaiveGrammar:
@@ -31,18 +35,35 @@ class NaiveGrammar:
         self.rules = rules.copy()
 
 
-def input_naive_grammar() -> NaiveGrammar:
-    non_terminals_quantity, terminals_quantity, rules_quantity = map(int, input().split())
-    non_terminals = set(input().strip())
-    terminals = set(input().strip())
+def naive_grammar_fingerprint(naive: NaiveGrammar) -> str:  # the same for equal grammars, in any process
+    canonical = repr((sorted(naive.non_terminals),
+                      sorted(naive.terminals),
+                      naive.start,
+                      sorted({(rule.left, rule.right, rule.weight) for rule in naive.rules})))
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+def read_naive_grammar(read_line: Callable[[], str]) -> NaiveGrammar:  # lines without line breaks, e.g. input
+    non_terminals_quantity, terminals_quantity, rules_quantity = map(int, read_line().split())
+    non_terminals = set(read_line().strip())
+    terminals = set(read_line().strip())
     rules = set()
     for i in range(rules_quantity):
-        left, right = input().split('->')
+        left, right = read_line().split('->')
         rules.add(NaiveRule(left.replace(' ', ''), right.replace(' ', '')))
-    start = input()
+    start = read_line()
     return NaiveGrammar(non_terminals, terminals, start, rules)
 
 
+def input_naive_grammar() -> NaiveGrammar:
+    return read_naive_grammar(input)
+
+
+def load_naive_grammar(path: Union[str, Path]) -> NaiveGrammar:  # the format of input_naive_grammar
+    with open(path, "r", encoding="utf-8") as file:
+        return read_naive_grammar(lambda: file.readline().rstrip("\r\n"))
+
+
 def naive_grammar_to_grammar(naive: NaiveGrammar) -> Tuple[Grammar, Representor]:
     rep = Representor(naive.terminals | naive.non_terminals)
     start = rep.as_non_terminal(naive.start)
@@ -52,7 +73,7 @@ def naive_grammar_to_grammar(naive: NaiveGrammar) -> Tuple[Grammar, Representor]
     for rule in naive.rules:
         left = rep.as_non_terminal(rule.left)
         right = tuple([rep.as_grammar_symbol(sym) for sym in rule.right])  # empty if right is an epsilon
-        rules.add(Rule(left, right))
+        rules.add(Rule(left, right, rule.weight))
     return Grammar(non_terminals, terminals, start, rules), rep
 
 
@@ -81,7 +102,7 @@ def grammar_to_naive_grammar(grammar: Grammar, rep: Optional[Representor] = None
     for rule in grammar.rules:
         left = rep.as_non_terminal_symbol(rule.left)
         right = ''.join([rep.as_symbol(obj) for obj in rule.right])
-        rules.add(NaiveRule(left, right))
+        rules.add(NaiveRule(left, right, rule.weight))
 
     return NaiveGrammar(rep.non_terminal_symbols(), rep.terminal_symbols(), 'S', rules)
 
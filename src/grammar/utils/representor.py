@@ -42,7 +42,7 @@ class Representor:
             self.fill(data)
 
     def fill(self, data: Set[str]):
-        for symbol in data:
+        for symbol in sorted(data):  # symbols are created in a reproducible order
             self.auto_add(symbol)
 
     def terminal_symbols(self) -> Set[str]:
@@ -72,26 +72,26 @@ class Representor:
 
     def get_available_non_terminal_symbol(self) -> Optional[str]:
         for non in valid_non_terminals_list:
-            if non not in self.non_terminal_symbols():
+            if non not in self.symbol_to_non_terminal:  # the dictionary is checked, no set is built per symbol
                 return non
         return None
 
     def get_available_terminal_symbol(self) -> Optional[str]:
         for term in valid_terminals_list:
-            if term not in self.terminal_symbols():
+            if term not in self.symbol_to_terminal:
                 return term
         return None
 
     def auto_add(self, obj: Union[str, GrammarSymbol]) -> Union[GrammarSymbol, str]:
         if isinstance(obj, str):
             if obj in valid_terminals:
-                if obj in self.symbols():
+                if obj in self.symbol_to_terminal:
                     return self.symbol_to_terminal[obj]
                 term = Terminal()
                 self.add(obj, term)
                 return term
             elif obj in valid_non_terminals:
-                if obj in self.symbols():
+                if obj in self.symbol_to_non_terminal:
                     return self.symbol_to_non_terminal[obj]
                 non = NonTerminal()
                 self.add(obj, non)
@@ -99,7 +99,7 @@ class Representor:
             else:
                 raise InvalidGrammarSymbol(f"Symbol {obj} is invalid.")
         elif isinstance(obj, Terminal):
-            if obj in self.terminals():
+            if obj in self.terminal_to_symbol:
                 return self.terminal_to_symbol[obj]
             symbol = self.get_available_terminal_symbol()
             if symbol is None:
@@ -107,7 +107,7 @@ class Representor:
             self.add(symbol, obj)
             return symbol
         elif isinstance(obj, NonTerminal):
-            if obj in self.non_terminals():
+            if obj in self.non_terminal_to_symbol:
                 return self.non_terminal_to_symbol[obj]
             symbol = self.get_available_non_terminal_symbol()
             if symbol is None:
@@ -146,11 +146,11 @@ class Representor:
             raise InvalidGrammarSymbol(f"Symbol {symbol} is invalid.")
 
     def is_known(self, obj: Union[GrammarSymbol, str]) -> bool:
-        if isinstance(obj, Terminal):
-            return obj in self.terminals()
+        if isinstance(obj, Terminal):  # dictionaries are checked directly, no sets are built
+            return obj in self.terminal_to_symbol
         elif isinstance(obj, NonTerminal):
-            return obj in self.non_terminals()
+            return obj in self.non_terminal_to_symbol
         elif isinstance(obj, str):
-            return obj in self.symbols()
+            return obj in self.symbol_to_terminal or obj in self.symbol_to_non_terminal
         else:
             raise RepresentorTypeError(f"Invalid argument type: {type(obj)}.")
@@ -0,0 +1,73 @@
+from src.grammar.grammar import Terminal, NonTerminal, GrammarSymbol
+from src.grammar.utils.representor import Representor, RepresentorTypeError
+from src.grammar.errors import InvalidGrammarSymbol
+from typing import List, Iterable, Optional, Union
+
+
+# Representor with symbols named by arbitrary strings (e.g. "expr", "NUMBER", "+="): names are interned by one
+# dictionary lookup, terminals and non-terminals have separate namespaces. Symbols without names get fresh ones from
+# counters, so naming them does not scan the taken names.
+
+class SymbolTable(Representor):
+    next_terminal: int  # counters of fresh names
+    next_non_terminal: int
+
+    def __init__(self):
+        super().__init__()
+        self.next_terminal = 0
+        self.next_non_terminal = 0
+
+    def terminal(self, name: str) -> Terminal:  # the terminal of the name, it is created on the first call
+        term = self.symbol_to_terminal.get(name)
+        if term is None:
+            term = Terminal()
+            self.symbol_to_terminal[name] = term
+            self.terminal_to_symbol[term] = name
+        return term
+
+    def non_terminal(self, name: str) -> NonTerminal:
+        non = self.symbol_to_non_terminal.get(name)
+        if non is None:
+            non = NonTerminal()
+            self.symbol_to_non_terminal[name] = non
+            self.non_terminal_to_symbol[non] = name
+        return non
+
+    def word(self, names: Iterable[str]) -> Optional[List[Terminal]]:  # None if some name is not a terminal
+        terminals = self.symbol_to_terminal
+        try:
+            return [terminals[name] for name in names]
+        except KeyError:
+            return None
+
+    def add(self, symbol: str, obj: Union[Terminal, NonTerminal]) -> None:
+        if isinstance(obj, Terminal):
+            self.symbol_to_terminal[symbol] = obj
+            self.terminal_to_symbol[obj] = symbol
+        elif isinstance(obj, NonTerminal):
+            self.symbol_to_non_terminal[symbol] = obj
+            self.non_terminal_to_symbol[obj] = symbol
+        else:
+            raise RepresentorTypeError(f"Invalid type: {type(obj)}.")
+
+    def get_available_non_terminal_symbol(self) -> Optional[str]:
+        while f"_N{self.next_non_terminal}" in self.symbol_to_non_terminal:
+            self.next_non_terminal += 1
+        return f"_N{self.next_non_terminal}"
+
+    def get_available_terminal_symbol(self) -> Optional[str]:
+        while f"_T{self.next_terminal}" in self.symbol_to_terminal:
+            self.next_terminal += 1
+        return f"_T{self.next_terminal}"
+
+    def auto_add(self, obj: Union[str, GrammarSymbol]) -> Union[GrammarSymbol, str]:
+        if isinstance(obj, str):  # a name does not tell the kind of a new symbol, see terminal and non_terminal
+            return self.as_grammar_symbol(obj)
+        return super().auto_add(obj)
+
+    def as_grammar_symbol(self, symbol: str) -> GrammarSymbol:  # a non-terminal if both kinds have the name
+        if symbol in self.symbol_to_non_terminal:
+            return self.symbol_to_non_terminal[symbol]
+        if symbol in self.symbol_to_terminal:
+            return self.symbol_to_terminal[symbol]
+        raise InvalidGrammarSymbol(f"Symbol {symbol} is unknown.")
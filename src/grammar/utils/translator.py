@@ -0,0 +1,56 @@
+from src.grammar.grammar import Terminal
+from src.grammar.utils.representor import Representor
+from typing import Dict, List, Optional, Union
+
+
+# Characters of a word are translated to terminal ids by one bytes.translate call: the table maps a byte to the id
+# or to the unknown marker, so a word with a character out of the alphabet is rejected without the representor.
+
+Word = Union[str, bytes, bytearray, memoryview]
+
+unknown = 255
+
+
+class Translator:
+    table: bytes  # byte -> terminal id, unknown if the character is not a terminal of the grammar
+    terminals: List[Optional[Terminal]]  # terminal id -> terminal
+
+    def __init__(self, representor: Representor, terminal_ids: Optional[Dict[Terminal, int]] = None):
+        if terminal_ids is None:  # ids in the order of creation, the order of compiled grammars
+            terminal_ids = {term: i for i, term in enumerate(sorted(representor.terminals(), key=lambda t: t.serial))}
+        if len(terminal_ids) >= unknown:
+            raise ValueError(f"Translator supports less than {unknown} terminals.")
+
+        table = bytearray([unknown] * 256)
+        self.terminals = [None] * len(terminal_ids)
+        for term, i in terminal_ids.items():
+            self.terminals[i] = term
+        for symbol, term in representor.symbol_to_terminal.items():
+            if term in terminal_ids and ord(symbol) < 256:
+                table[ord(symbol)] = terminal_ids[term]
+        self.table = bytes(table)
+
+    def ids(self, word: Word) -> Optional[bytes]:  # None if the word has unknown characters
+        if isinstance(word, str):
+            if not word.isascii():
+                return None  # all terminal characters are ASCII
+            data = word.encode("ascii")
+        else:
+            data = bytes(word)
+        translated = data.translate(self.table)
+        if unknown in translated:
+            return None
+        return translated
+
+    def terminals_by_ids(self, ids: bytes) -> List[Terminal]:
+        terminals = self.terminals
+        return [terminals[i] for i in ids]
+
+    def terminals_of(self, word: Word) -> Optional[List[Terminal]]:
+        translated = self.ids(word)
+        if translated is None:
+            return None
+        return self.terminals_by_ids(translated)
+
+    def terminal_ids(self) -> Dict[Terminal, int]:
+        return {term: i for i, term in enumerate(self.terminals) if term is not None}
@@ -0,0 +1,132 @@
+from src.grammar.utils.interface import NaiveGrammar, naive_grammar_fingerprint
+from src.parsing.parser import Parser, NaiveParser, ParserError
+from src.parsing.stats import Stats
+from pathlib import Path
+from typing import Optional, Union
+import hashlib
+import hmac
+import io
+import pickle
+import stat
+import os
+
+
+# A cache file is an HMAC-SHA256 tag followed by two pickles: the header (source fingerprint, key) and the fitted
+# NaiveParser. Unpickling runs code, so nothing is unpickled before the tag is checked with the secret of the cache.
+# Files with a wrong tag or of other sources of the package are refitted and overwritten. The key holds the grammar and
+# the settings of the parser, stats are not settings: they are dropped from the stored parser.
+#
+# The secret is given to ParserCache or is kept in the file "secret" of the directory, which is created readable by
+# its owner only. A directory shared by several users needs a secret given by them.
+
+tag_size = hashlib.sha256().digest_size
+secret_size = 32
+
+source_root = Path(__file__).resolve().parents[1]  # src, its modules are pickled with the fitted parsers
+source_fingerprint: Optional[str] = None
+
+
+def sources_fingerprint() -> str:  # changes with any module the pickles depend on, read once per process
+    global source_fingerprint
+    if source_fingerprint is None:
+        digest = hashlib.sha256()
+        for path in sorted(source_root.rglob("*.py")):
+            digest.update(path.relative_to(source_root).as_posix().encode() + b"\0")
+            digest.update(hashlib.sha256(path.read_bytes()).digest())
+        source_fingerprint = digest.hexdigest()
+    return source_fingerprint
+
+
+def parser_signature(parser: Parser) -> str:  # the class and the settings of a parser, a parser must list them all
+    settings = parser.settings()
+    if settings is None:
+        raise ParserError(f"{type(parser).__name__} does not list its settings, it can not be cached.")
+    for name, value in settings.items():
+        if not isinstance(value, (str, int, bool)):
+            raise ParserError(f"Setting {name} of {type(parser).__name__} is not a string or a number: {value!r}.")
+    return f"{type(parser).__module__}.{type(parser).__qualname__}{sorted(settings.items())}"
+
+
+class StatelessPickler(pickle.Pickler):  # counters and hooks are not stored, a loaded parser has no stats
+    def reducer_override(self, obj):
+        if isinstance(obj, Stats):
+            return type(None), ()
+        return NotImplemented
+
+
+class ParserCache:
+    directory: Path
+    secret: bytes
+
+    def __init__(self, directory: Union[str, Path], secret: Optional[bytes] = None):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.secret = secret if secret is not None else self.__secret()
+
+    def __secret(self) -> bytes:
+        path = self.directory / "secret"
+        try:
+            descriptor = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+        except FileExistsError:
+            status = os.stat(path)
+            shared = status.st_mode & (stat.S_IRWXG | stat.S_IRWXO)
+            if hasattr(os, "getuid") and (status.st_uid != os.getuid() or shared):
+                raise PermissionError(f"The secret of the cache '{path}' is not private, give the secret explicitly.")
+            return path.read_bytes()
+        with os.fdopen(descriptor, "wb") as file:
+            secret = os.urandom(secret_size)
+            file.write(secret)
+        return secret
+
+    def key(self, parser: Parser, naive: NaiveGrammar) -> str:
+        signature = f"{naive_grammar_fingerprint(naive)}:{parser_signature(parser)}"
+        return hashlib.sha256(signature.encode()).hexdigest()
+
+    def __path(self, key: str) -> Path:
+        return self.directory / f"{key}.pickle"
+
+    def __tag(self, payload: bytes) -> bytes:
+        return hmac.new(self.secret, payload, hashlib.sha256).digest()
+
+    def load(self, key: str) -> Optional[NaiveParser]:  # None if there is no valid entry
+        try:
+            with open(self.__path(key), "rb") as file:
+                data = file.read()
+        except OSError:
+            return None
+        tag, payload = data[:tag_size], data[tag_size:]
+        if not hmac.compare_digest(tag, self.__tag(payload)):
+            return None
+        try:  # authentic files of the same sources may still be broken by a failed disk
+            stream = io.BytesIO(payload)
+            if pickle.load(stream) != (sources_fingerprint(), key):
+                return None
+            return pickle.load(stream)
+        except (EOFError, pickle.UnpicklingError, AttributeError, ImportError):
+            return None
+
+    def store(self, key: str, naive_parser: NaiveParser) -> None:
+        stream = io.BytesIO()
+        pickler = StatelessPickler(stream, pickle.HIGHEST_PROTOCOL)
+        pickler.dump((sources_fingerprint(), key))
+        pickler.clear_memo()  # the pickles are loaded one by one
+        pickler.dump(naive_parser)
+        payload = stream.getvalue()
+        temporary = self.__path(key).with_suffix(f".{os.getpid()}.tmp")  # a reader never sees a partial file
+        with open(temporary, "wb") as file:
+            file.write(self.__tag(payload))
+            file.write(payload)
+        os.replace(temporary, self.__path(key))
+
+    def fit(self, parser: Parser, naive: NaiveGrammar) -> NaiveParser:  # loads the fitted parser or fits and stores it
+        key = self.key(parser, naive)
+        naive_parser = self.load(key)
+        if naive_parser is None:
+            naive_parser = NaiveParser(parser)
+            naive_parser.fit(naive)
+            self.store(key, naive_parser)
+        return naive_parser
+
+    def clear(self) -> None:  # the secret is kept
+        for path in self.directory.glob("*.pickle"):
+            path.unlink()
@@ -0,0 +1,113 @@
+from src.grammar.grammar import Grammar, Rule, NonTerminal
+from src.grammar.compiled import CompiledGrammar, is_terminal
+from src.grammar.analysis import nullable, first_sets, follow_sets, is_right_linear
+from src.parsing.parser import GrammarClass
+from src.parsing.implementations.lr.automaton import LRAutomaton
+from collections import OrderedDict
+from typing import List, Dict, Set, Any
+
+
+class GrammarAnalysis:  # the most specific class is reported, the flags are for all the checked ones
+    regular: bool  # right-linear
+    ll1: bool
+    lr0: bool
+    lalr1: bool
+    lr1: bool
+    grammar_class: GrammarClass
+
+    def __init__(self, regular: bool, ll1: bool, lr0: bool, lalr1: bool, lr1: bool):
+        self.regular = regular
+        self.ll1 = ll1
+        self.lr0 = lr0
+        self.lalr1 = lalr1
+        self.lr1 = lr1
+        for flag, name in [(regular, "Regular"), (ll1, "LL(1)"), (lr0, "LR(0)"), (lalr1, "LALR(1)"), (lr1, "LR(1)")]:
+            if flag:
+                self.grammar_class = GrammarClass(name)
+                break
+        else:
+            self.grammar_class = GrammarClass("Context-free")
+
+
+analysis_cache: Dict[Any, GrammarAnalysis] = OrderedDict()  # the least recently used analysis is first
+analysis_cache_size = 64  # keys hold all the rules, so only a few grammars are kept
+
+
+def signature(compiled: CompiledGrammar) -> Any:  # equal for grammars that differ only in symbol objects
+    return len(compiled.non_terminals), len(compiled.terminals), compiled.start, tuple(zip(compiled.lefts,
+                                                                                           compiled.rights))
+
+
+def is_left_recursive(compiled: CompiledGrammar, flags: List[bool]) -> bool:
+    corners: List[Set[int]] = [set() for _ in compiled.non_terminals]  # A -> B-s such that A => B...
+    for left, right in zip(compiled.lefts, compiled.rights):
+        for symbol in right:
+            if is_terminal(symbol):
+                break
+            corners[left].add(symbol)
+            if not flags[symbol]:
+                break
+
+    incoming = [0] * len(corners)  # Kahn: the graph of left corners has a cycle iff it can not be sorted
+    for targets in corners:
+        for target in targets:
+            incoming[target] += 1
+    queue = [non for non in range(len(corners)) if incoming[non] == 0]
+    sorted_count = 0
+    while len(queue) > 0:
+        non = queue.pop()
+        sorted_count += 1
+        for target in corners[non]:
+            incoming[target] -= 1
+            if incoming[target] == 0:
+                queue.append(target)
+    return sorted_count < len(corners)
+
+
+def is_ll1(compiled: CompiledGrammar) -> bool:
+    flags = nullable(compiled)
+    if is_left_recursive(compiled, flags):
+        return False  # it also covers unproductive cycles, FIRST sets do not see them
+    firsts = first_sets(compiled, flags)
+    follows = follow_sets(compiled, flags, firsts)
+    for non, rules in enumerate(compiled.by_left):
+        seen: Set[int] = set()
+        for rule in rules:
+            lookaheads: Set[int] = set()
+            for symbol in compiled.rights[rule]:
+                if is_terminal(symbol):
+                    lookaheads.add(~symbol)
+                    break
+                lookaheads |= firsts[symbol]
+                if not flags[symbol]:
+                    break
+            else:
+                lookaheads |= follows[non]
+            if not seen.isdisjoint(lookaheads):
+                return False
+            seen |= lookaheads
+    return True
+
+
+def classify(grammar: Grammar) -> GrammarAnalysis:
+    compiled = CompiledGrammar(grammar)
+    key = signature(compiled)
+    if key in analysis_cache:
+        analysis_cache.move_to_end(key)
+        return analysis_cache[key]
+
+    new_start = NonTerminal()
+    augmented = CompiledGrammar(Grammar(grammar.non_terminals | {new_start},
+                                        grammar.terminals,
+                                        new_start,
+                                        grammar.rules | {Rule(new_start, (grammar.start,))}))
+    start_rule = augmented.by_left[augmented.start][0]
+    lalr = LRAutomaton(augmented, start_rule, "LALR(1)")
+    lalr1 = len(lalr.conflicts) == 0
+    lr1 = lalr1 or len(LRAutomaton(augmented, start_rule, "LR(1)").conflicts) == 0  # canonical tables are big
+
+    analysis = GrammarAnalysis(is_right_linear(compiled), is_ll1(compiled), lalr1 and lalr.is_lr0(), lalr1, lr1)
+    analysis_cache[key] = analysis
+    if len(analysis_cache) > analysis_cache_size:
+        analysis_cache.popitem(last=False)
+    return analysis
@@ -0,0 +1,47 @@
+from src.grammar.grammar import Grammar, Terminal
+from src.parsing.parser import Parser, GrammarClass, ParserError
+from src.parsing.classifier import GrammarAnalysis, classify
+from src.parsing.implementations.regular.parser import RegularParser
+from src.parsing.implementations.lr.parser import LRParser
+from src.parsing.implementations.earley.parser import EarleyParser
+from typing import List, Dict, Sequence, Optional, Union
+
+
+class AutoParser(Parser):  # picks the cheapest engine the class of the grammar allows
+    grammar_class: GrammarClass
+    analysis: Optional[GrammarAnalysis]
+    engine: Optional[Parser]
+
+    def __init__(self):
+        self.grammar_class = GrammarClass("Unknown")
+        self.analysis = None
+        self.engine = None
+
+    def fit(self, grammar: Grammar) -> None:
+        self.analysis = classify(grammar)
+        if self.analysis.regular:
+            self.engine = RegularParser()  # deterministic automaton
+        elif self.analysis.lalr1:
+            self.engine = LRParser("LALR(1)")
+        elif self.analysis.lr1:  # LL(1) grammars are here at worst
+            self.engine = LRParser("LR(1)")
+        else:
+            self.engine = EarleyParser(compact=True)
+        self.engine.fit(grammar)
+        self.grammar_class = self.analysis.grammar_class
+
+    def predict(self, word: List[Terminal]) -> bool:
+        if self.engine is None:
+            raise ParserError("Parser is not fit.")
+        return self.engine.predict(word)
+
+    def settings(self) -> Optional[Dict[str, Union[str, int, bool]]]:
+        return {}  # the engine depends on the grammar only
+
+    def terminal_ids(self) -> Optional[Dict[Terminal, int]]:
+        return self.engine.terminal_ids() if self.engine is not None else None
+
+    def predict_ids(self, word: Sequence[int]) -> bool:
+        if self.engine is None:
+            raise ParserError("Parser is not fit.")
+        return self.engine.predict_ids(word)
@@ -0,0 +1,106 @@
+from src.grammar.grammar import Grammar, Terminal
+from src.grammar.compiled import CompiledGrammar
+from src.parsing.parser import Parser, GrammarClass, ParserError
+from typing import List, Dict, Sequence, Optional, Union
+from src.parsing.implementations.cyk.chomsky import ChomskyNormalizer
+
+
+class BitsetCYKParser(Parser):  # every chart cell is an int, bit i is set iff non-terminal i deduces the subword
+    grammar_class: GrammarClass
+    grammar: Optional[Grammar]
+    compiled: Optional[CompiledGrammar]
+    terminal_masks: List[int]  # terminal id -> mask of A-s such that A -> a
+    firsts: int  # mask of B-s such that some A -> BC exists
+    seconds: List[int]  # seconds[B] is a mask of C-s such that some A -> BC exists
+    pairs: List[Dict[int, int]]  # pairs[B][1 << C] is a mask of A-s such that A -> BC
+    start: int
+    accepts_empty: bool
+
+    def __init__(self) -> None:
+        self.grammar_class = GrammarClass("Context-free")
+        self.grammar = None
+        self.compiled = None
+        self.terminal_masks = []
+        self.firsts = 0
+        self.seconds = []
+        self.pairs = []
+        self.start = 0
+        self.accepts_empty = False
+
+    def fit(self, grammar: Grammar) -> None:
+        normalizer = ChomskyNormalizer()
+        self.grammar = normalizer.normalize(grammar)
+        self.compiled = CompiledGrammar(self.grammar)
+
+        self.terminal_masks = [0] * len(self.compiled.terminals)
+        self.firsts = 0
+        self.seconds = [0] * len(self.compiled.non_terminals)
+        self.pairs = [{} for _ in self.compiled.non_terminals]
+
+        for left, right in zip(self.compiled.lefts, self.compiled.rights):
+            if len(right) == 1:  # A -> a
+                self.terminal_masks[~right[0]] |= 1 << left
+            elif len(right) == 2:  # A -> BC
+                first, second = right[0], 1 << right[1]
+                self.firsts |= 1 << first
+                self.seconds[first] |= second
+                self.pairs[first][second] = self.pairs[first].get(second, 0) | 1 << left
+
+        self.start = 1 << self.compiled.start
+        self.accepts_empty = self.compiled.has_epsilon_rule(self.compiled.start)
+
+    def __combine(self, first_cell: int, second_cell: int) -> int:
+        result = 0
+        firsts = first_cell & self.firsts
+        while firsts:
+            low = firsts & -firsts
+            firsts ^= low
+            first = low.bit_length() - 1
+            seconds = second_cell & self.seconds[first]
+            while seconds:
+                second = seconds & -seconds
+                seconds ^= second
+                result |= self.pairs[first][second]
+        return result
+
+    def predict(self, word: List[Terminal]) -> bool:
+        if self.grammar is None or self.compiled is None:
+            raise ParserError("Parser is not fit.")
+
+        encoded = self.compiled.encode(word)
+        if encoded is None:
+            return False  # the word has terminals which are not in the grammar
+        return self.predict_ids(encoded)
+
+    def settings(self) -> Optional[Dict[str, Union[str, int, bool]]]:
+        return {}
+
+    def terminal_ids(self) -> Optional[Dict[Terminal, int]]:
+        return self.compiled.terminal_ids if self.compiled is not None else None
+
+    def predict_ids(self, word: Sequence[int]) -> bool:
+        if self.grammar is None or self.compiled is None:
+            raise ParserError("Parser is not fit.")
+
+        if len(word) == 0:
+            return self.accepts_empty
+
+        # chart[start][end] describes word[start:end + 1]
+        chart: List[List[int]] = [[0] * len(word) for _ in range(len(word))]
+
+        for i, term in enumerate(word):
+            chart[i][i] = self.terminal_masks[term]
+            if chart[i][i] == 0:
+                return False  # no non-terminal deduces this terminal
+
+        for length in range(2, len(word) + 1):
+            for start in range(0, len(word) - length + 1):
+                end = start + length - 1
+                row = chart[start]
+                cell = 0
+                for mid in range(start, end):
+                    if row[mid] and chart[mid + 1][end]:
+                        cell |= self.__combine(row[mid], chart[mid + 1][end])
+                row[end] = cell
+
+        return bool(chart[0][len(word) - 1] & self.start)
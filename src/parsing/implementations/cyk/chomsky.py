@@ -1,6 +1,10 @@
-from typing import Optional, Dict, Set, Tuple, List
+from typing import Optional, Dict, Set, FrozenSet, Tuple, List, Union, Sequence, Callable, Any, Hashable
+import time
 from src.grammar.grammar import Grammar, Rule, NonTerminal, Terminal, GrammarSymbol
 from src.grammar.utils.interface import print_grammar
+from src.parsing.parser import GrammarClassError
+from src.parsing.implementations.cyk.semiring import Semiring
+from src.parsing.stats import Stats
 
 
 log_mode = False
@@ -11,11 +15,212 @@ def set_log_mode(mode: bool):
     log_mode = mode
 
 
+# Provenance: every rule of the normal form is mapped to fragments of derivations in the original grammar.
+# A fragment is a sequence of pieces spliced into the children of the parent node: a piece is either an int, the
+# expansion of the symbol at that position of the right part, (original rule, fragment of its children), or a marker
+# of an erased step. A non-terminal of the original grammar expands to one node, the added ones expand to several
+# pieces or none. A rule keeps one fragment per rule it comes from, the erased derivations of epsilon and chains of
+# unit rules are only marked: their variants may be exponentially many, so they are expanded by the enumeration of
+# trees over the relations kept in Provenance. As in ParseForest.trees, expansions with a non-terminal repeated over
+# the same subword are cycles and are left out, so every fragment has finitely many of them.
+
+class Erased:  # the derivations of epsilon from a non-terminal of the epsilon stage
+    __slots__ = ("non",)
+    non: NonTerminal
+
+    def __init__(self, non: NonTerminal):
+        self.non = non
+
+
+class Chain:  # the chains of unit rules left =>* middle, the fragment of a rule of middle is at the end
+    __slots__ = ("left", "middle", "fragment")
+    left: NonTerminal
+    middle: NonTerminal
+    fragment: 'Fragment'
+
+    def __init__(self, left: NonTerminal, middle: NonTerminal, fragment: 'Fragment'):
+        self.left = left
+        self.middle = middle
+        self.fragment = fragment
+
+
+Marker = Union[Erased, Chain]
+Fragment = Tuple[Union[int, Tuple[Rule, 'Fragment'], Marker], ...]
+
+
+def substitute(fragment: Fragment, replacements: Sequence[Fragment]) -> Fragment:
+    # position i of the fragment is replaced by replacements[i], nodes are rebuilt bottom up without recursion
+    stack: List[Tuple[Fragment, List, Optional[Rule]]] = [(fragment, [], None)]  # (pieces, result, rule)
+    indices: List[int] = [0]
+    while True:
+        pieces, result, rule = stack[-1]
+        if indices[-1] == len(pieces):
+            stack.pop()
+            indices.pop()
+            if len(stack) == 0:
+                return tuple(result)
+            stack[-1][1].append((rule, tuple(result)))
+            continue
+        piece = pieces[indices[-1]]
+        indices[-1] += 1
+        if isinstance(piece, int):
+            result.extend(replacements[piece])
+        elif isinstance(piece, tuple):
+            stack.append((piece[1], [], piece[0]))
+            indices.append(0)
+        else:
+            result.append(piece)
+
+
+def markers(fragment: Fragment) -> List[Marker]:  # in preorder, the order of resolve
+    result: List[Marker] = []
+    stack: List[Fragment] = [fragment]
+    while len(stack) > 0:
+        pieces = stack.pop()
+        for i in range(len(pieces) - 1, -1, -1):
+            piece = pieces[i]
+            if isinstance(piece, tuple):
+                stack.append(piece[1])
+            elif not isinstance(piece, int):
+                result.append(piece)
+    result.reverse()
+    return result
+
+
+def resolve(fragment: Fragment, expansions: Sequence[Fragment]) -> Fragment:
+    # the markers of the fragment are replaced by their expansions, the same rebuild as in substitute
+    stack: List[Tuple[Fragment, List, Optional[Rule]]] = [(fragment, [], None)]
+    indices: List[int] = [0]
+    expanded = 0
+    while True:
+        pieces, result, rule = stack[-1]
+        if indices[-1] == len(pieces):
+            stack.pop()
+            indices.pop()
+            if len(stack) == 0:
+                return tuple(result)
+            stack[-1][1].append((rule, tuple(result)))
+            continue
+        piece = pieces[indices[-1]]
+        indices[-1] += 1
+        if isinstance(piece, int):
+            result.append(piece)
+        elif isinstance(piece, tuple):
+            stack.append((piece[1], [], piece[0]))
+            indices.append(0)
+        else:
+            result.extend(expansions[expanded])
+            expanded += 1
+
+
+def has_position(fragment: Fragment) -> bool:
+    stack: List[Fragment] = [fragment]
+    while len(stack) > 0:
+        for piece in stack.pop():
+            if isinstance(piece, int):
+                return True
+            if isinstance(piece, tuple):
+                stack.append(piece[1])
+    return False
+
+
+def covering(fragment: Fragment) -> List[NonTerminal]:
+    # symbols of the nodes that cover all the positions of the fragment: every position stands for a non-empty
+    # subword, so these nodes are over the same subword as the rule
+    result: List[NonTerminal] = []
+    pieces = fragment
+    while True:
+        holding = [piece for piece in pieces
+                   if isinstance(piece, int) or (isinstance(piece, tuple) and has_position(piece[1]))]
+        if len(holding) != 1 or isinstance(holding[0], int):
+            return result
+        result.append(holding[0][0].left)
+        pieces = holding[0][1]
+
+
+class Provenance:
+    fragments: Dict[Rule, List[Fragment]]  # current rule -> fragments of the derivations it stands for
+    empty: Dict[NonTerminal, List[Tuple[Tuple[NonTerminal, ...], Fragment]]]  # epsilon stage rules with Erased
+    units: Dict[NonTerminal, List[Tuple[NonTerminal, Fragment]]]  # unit stage rules A -> B, B is at position 0
+    chained: Dict[NonTerminal, Set[NonTerminal]]  # A -> all B such that A =>* B by unit rules
+
+    def __init__(self, rules: Set[Rule]):
+        self.fragments = {rule: [((rule, tuple(range(len(rule.right)))),)] for rule in rules}
+        self.empty = {}
+        self.units = {}
+        self.chained = {}
+
+    def keep(self, rules: Set[Rule]) -> None:
+        self.fragments = {rule: self.fragments[rule] for rule in rules}
+
+    def expansions(self, marker: Marker,
+                   banned: FrozenSet[NonTerminal]) -> List[Tuple[Fragment, FrozenSet[NonTerminal]]]:
+        # one step of the marker: fragments with the markers to expand next, and the non-terminals banned in the
+        # markers of the same kind in them (the others start anew). Banned are the non-terminals above an erased one
+        # in its derivation, or the nodes of a chain so far.
+        result: List[Tuple[Fragment, FrozenSet[NonTerminal]]] = []
+        if isinstance(marker, Erased):
+            inner = banned | {marker.non}
+            for right, fragment in self.empty.get(marker.non, ()):
+                if inner.isdisjoint(right):
+                    result.append((fragment, inner))
+            return result
+        if marker.left == marker.middle:
+            nodes = covering(marker.fragment)
+            if len(set(nodes)) == len(nodes) and banned.isdisjoint(nodes):
+                result.append((marker.fragment, banned))
+        for target, fragment in self.units.get(marker.left, ()):
+            if marker.middle not in self.chained.get(target, ()):
+                continue  # the chains from the target do not lead to the middle
+            nodes = covering(fragment)
+            if len(set(nodes)) == len(nodes) and banned.isdisjoint(nodes):
+                result.append((substitute(fragment, [(Chain(target, marker.middle, marker.fragment),)]),
+                               banned.union(nodes)))
+        return result
+
+
+# Weighting: every rule of the normal form gets the semiring sum of the values of the derivations it stands for.
+# Erased non-terminals contribute the sum over their derivations of epsilon, removed unit rules the sum over
+# the chains of them. Such sums may be infinite, they are solved by Kleene iteration.
+
+class Weighting:
+    semiring: Semiring
+    weights: Dict[Rule, Any]
+
+    def __init__(self, rules: Set[Rule], semiring: Semiring):
+        self.semiring = semiring
+        self.weights = {rule: semiring.value(rule) for rule in rules}
+
+    def keep(self, rules: Set[Rule]) -> None:
+        self.weights = {rule: self.weights[rule] for rule in rules}
+
+    def add(self, weights: Dict[Any, Any], key: Any, value: Any) -> None:
+        weights[key] = self.semiring.plus(weights[key], value) if key in weights else value
+
+    def fixpoint(self, step: Callable[[Dict[Hashable, Any]], Dict[Hashable, Any]], size: int) -> Dict[Hashable, Any]:
+        # the least solution of values = step(values), exact semirings need at most size + 1 rounds
+        semiring = self.semiring
+        values: Dict[Hashable, Any] = {}
+        for _ in range(size + 2 if semiring.exact else 10000):
+            updated = step(values)
+            if all(semiring.equal(updated.get(key, semiring.zero), values.get(key, semiring.zero))
+                   for key in updated.keys() | values.keys()):
+                if all(semiring.finite(value) for value in updated.values()):
+                    return updated
+                break
+            values = updated
+        raise GrammarClassError(f"Derivations of the grammar have no finite sum in the {semiring.name} semiring.")
+
+
 class Handler:
     next: Optional['Handler']
+    provenance: Optional[Provenance]  # tracked if set
+    weighting: Optional[Weighting]  # tracked if set
 
     def __init__(self) -> None:
         self.next = None
+        self.provenance = None
+        self.weighting = None
 
     def set_next(self, handler: 'Handler') -> None:
         self.next = handler
@@ -36,12 +241,25 @@ class StartOnTheRightEraser(Handler):
         if flag:
             start = NonTerminal()
             new_rules: Set[Rule] = {Rule(grammar.start, (start,))}
+            fragments: Dict[Rule, List[Fragment]] = {Rule(grammar.start, (start,)): [(0,)]}
+            weights: Dict[Rule, Any] = {}
+            if self.weighting is not None:
+                weights[Rule(grammar.start, (start,))] = self.weighting.semiring.one
 
             for rule in grammar.rules:
                 left = rule.left if rule.left != grammar.start else start
                 right = tuple([sym if sym != grammar.start else start
                                for sym in rule.right])
                 new_rules.add(Rule(left, right))
+                if self.provenance is not None:
+                    fragments[Rule(left, right)] = self.provenance.fragments[rule]
+                if self.weighting is not None:
+                    weights[Rule(left, right)] = self.weighting.weights[rule]
+
+            if self.provenance is not None:
+                self.provenance.fragments = fragments
+            if self.weighting is not None:
+                self.weighting.weights = weights
 
             grammar.rules = new_rules
             grammar.non_terminals.add(start)
@@ -65,19 +283,6 @@ class ProduceAnalyzer:
 
 
 class NonProducingEraser(Handler, ProduceAnalyzer):
-    @staticmethod
-    def __check(rule: Rule,
-                dependencies: Dict[Rule, Set[NonTerminal]],
-                reverse: Dict[NonTerminal, Set[Rule]],
-                produces: Dict[NonTerminal, bool]) -> None:
-        non = rule.left
-        if len(dependencies[rule]) == 0 and not produces[non]:
-            produces[non] = True
-            if non in reverse.keys():  # nothing depends on some non-terminals
-                for dependent in reverse[non]:
-                    dependencies[dependent].remove(rule.left)
-                    NonProducingEraser.__check(dependent, dependencies, reverse, produces, )
-
     def handle(self, grammar: Grammar) -> None:
         dependencies: Dict[Rule, Set[NonTerminal]] = {}
         reverse: Dict[NonTerminal, Set[Rule]] = {}
@@ -85,8 +290,18 @@ class NonProducingEraser(Handler, ProduceAnalyzer):
 
         ProduceAnalyzer._generate_dependencies(grammar.rules, dependencies, reverse)
 
-        for rule in grammar.rules:
-            NonProducingEraser.__check(rule, dependencies, reverse, produces)
+        # a rule produces when all its non-terminals do, so every rule counts the ones not known to produce
+        remaining: Dict[Rule, int] = {rule: len(dependencies[rule]) for rule in grammar.rules}
+        queue: List[Rule] = [rule for rule in grammar.rules if remaining[rule] == 0]
+        while len(queue) > 0:
+            rule = queue.pop()
+            if produces[rule.left]:
+                continue
+            produces[rule.left] = True
+            for dependent in reverse.get(rule.left, ()):  # nothing depends on some non-terminals
+                remaining[dependent] -= 1
+                if remaining[dependent] == 0:
+                    queue.append(dependent)
 
         new_non_terminals: Set[NonTerminal] = {non for non in grammar.non_terminals if produces[non]}
         new_rules: Set[Rule] = set()
@@ -99,23 +314,15 @@ class NonProducingEraser(Handler, ProduceAnalyzer):
 
         grammar.non_terminals = new_non_terminals | {grammar.start}
         grammar.rules = new_rules
+        if self.provenance is not None:
+            self.provenance.keep(new_rules)
+        if self.weighting is not None:
+            self.weighting.keep(new_rules)
 
         super().handle(grammar)
 
 
 class UnreachableEraser(Handler):
-    @staticmethod
-    def __check(non: NonTerminal,
-                rules: Dict[NonTerminal, Set[Rule]],
-                reachable: Dict[NonTerminal, bool]) -> None:
-        if reachable[non]:
-            return
-        reachable[non] = True
-        for rule in rules[non]:
-            for sym in rule.right:
-                if isinstance(sym, NonTerminal):
-                    UnreachableEraser.__check(sym, rules, reachable)
-
     def handle(self, grammar: Grammar) -> None:
         reachable: Dict[NonTerminal, bool] = {non: False for non in grammar.non_terminals}
         rules: Dict[NonTerminal, Set[Rule]] = {}
@@ -125,13 +332,25 @@ class UnreachableEraser(Handler):
                 rules[rule.left] = set()
             rules[rule.left].add(rule)
 
-        UnreachableEraser.__check(grammar.start, rules, reachable)
+        reachable[grammar.start] = True
+        stack: List[NonTerminal] = [grammar.start]
+        while len(stack) > 0:
+            non = stack.pop()
+            for rule in rules.get(non, ()):
+                for sym in rule.right:
+                    if isinstance(sym, NonTerminal) and not reachable[sym]:
+                        reachable[sym] = True
+                        stack.append(sym)
 
         new_non_terminals: Set[NonTerminal] = {non for non in grammar.non_terminals if reachable[non]}
         new_rules: Set[Rule] = {rule for rule in grammar.rules if reachable[rule.left]}
 
         grammar.non_terminals = new_non_terminals  # start is always reachable
         grammar.rules = new_rules
+        if self.provenance is not None:
+            self.provenance.keep(new_rules)
+        if self.weighting is not None:
+            self.weighting.keep(new_rules)
 
         super().handle(grammar)
 
@@ -152,6 +371,10 @@ class MixedRulesFixer(Handler):
             terminal_clones[term] = non
 
         new_rules: Set[Rule] = added_rules.copy()
+        fragments: Dict[Rule, List[Fragment]] = {rule: [(0,)] for rule in added_rules}  # a clone is its terminal
+        weights: Dict[Rule, Any] = {}
+        if self.weighting is not None:
+            weights = {rule: self.weighting.semiring.one for rule in added_rules}
 
         for rule in grammar.rules:
             right: List[NonTerminal] = []
@@ -161,9 +384,17 @@ class MixedRulesFixer(Handler):
                 else:
                     right.append(terminal_clones[sym])  # sym is Terminal
             new_rules.add(Rule(rule.left, tuple(right)))
+            if self.provenance is not None:
+                fragments[Rule(rule.left, tuple(right))] = self.provenance.fragments[rule]
+            if self.weighting is not None:
+                weights[Rule(rule.left, tuple(right))] = self.weighting.weights[rule]
 
         grammar.non_terminals |= added_non_terminals
         grammar.rules = new_rules
+        if self.provenance is not None:
+            self.provenance.fragments = fragments
+        if self.weighting is not None:
+            self.weighting.weights = weights
 
         super().handle(grammar)
 
@@ -172,10 +403,16 @@ class LongRulesDecomposer(Handler):
     def handle(self, grammar: Grammar) -> None:
         added_non_terminals: Set[NonTerminal] = set()
         new_rules: Set[Rule] = set()
+        fragments: Dict[Rule, List[Fragment]] = {}
+        weights: Dict[Rule, Any] = {}  # the first rule of a split one keeps the weight, the added ones get one
 
         for rule in grammar.rules:
             if len(rule.right) <= 2:
                 new_rules.add(rule)
+                if self.provenance is not None:
+                    fragments[rule] = self.provenance.fragments[rule]
+                if self.weighting is not None:
+                    weights[rule] = self.weighting.weights[rule]
             else:
                 right: List[NonTerminal] = list(rule.right)  # assume there is no terminals in right part of long rules
 
@@ -186,45 +423,89 @@ class LongRulesDecomposer(Handler):
                     non = NonTerminal()
                     added_non_terminals.add(non)
                     new_rules.add(Rule(non, (right[-1], tail)))
+                    fragments[Rule(non, (right[-1], tail))] = [(0, 1)]  # the added ones expand to their symbols
+                    if self.weighting is not None:
+                        weights[Rule(non, (right[-1], tail))] = self.weighting.semiring.one
                     tail = non
                     right.pop(len(right) - 1)
 
                 new_rules.add(Rule(rule.left, (right[0], tail)))
+                if self.provenance is not None:  # the tail expands to the symbols after the first one
+                    fragments[Rule(rule.left, (right[0], tail))] = [
+                        substitute(fragment, [(0,), (1,)] + [()] * (len(rule.right) - 2))
+                        for fragment in self.provenance.fragments[rule]]
+                if self.weighting is not None:
+                    weights[Rule(rule.left, (right[0], tail))] = self.weighting.weights[rule]
 
         grammar.non_terminals |= added_non_terminals
         grammar.rules = new_rules
+        if self.provenance is not None:
+            self.provenance.fragments = fragments
+        if self.weighting is not None:
+            self.weighting.weights = weights
 
         super().handle(grammar)
 
 
 class EpsilonProducingEraser(Handler, ProduceAnalyzer):
     @staticmethod
-    def __check(rule: Rule,  # Rule whose right part consists only of NonTerminal-s
-                dependencies: Dict[Rule, Set[NonTerminal]],
-                reverse: Dict[NonTerminal, Set[Rule]],
-                produces_epsilon: Dict[NonTerminal, bool],
-                added_rules: Set[Rule]) -> None:
+    def __variants(rule: Rule, produces_epsilon: Dict[NonTerminal, bool]) -> Set[Rule]:
+        # every subset of occurrences of epsilon producing non-terminals is erased, rules are short at this stage
+        rights: List[Tuple[GrammarSymbol, ...]] = [()]
+        for sym in rule.right:
+            kept = [right + (sym,) for right in rights]
+            if isinstance(sym, NonTerminal) and produces_epsilon[sym]:
+                kept += rights
+            rights = kept
+        return {Rule(rule.left, right) for right in rights}
 
-        rules_to_check: Set[Rule] = set()
-        became_producing = False
-
-        for non in rule.right:
-            if produces_epsilon[non]:
-                right: Tuple[GrammarSymbol, ...] = tuple([sym for sym in rule.right if sym != non])
-                rules_to_check.add(Rule(rule.left, right))
-
-        if not produces_epsilon[rule.left] and all(produces_epsilon[non] for non in rule.right):
-            produces_epsilon[rule.left] = True
-
-            if rule.left in reverse.keys():  # nothing depends on some non-terminals
-                for dependant in reverse[rule.left]:
-                    EpsilonProducingEraser.__check(dependant, dependencies, reverse, produces_epsilon, added_rules)
-
-        for added in rules_to_check:
-            if added not in dependencies.keys():  # process only new rules
-                EpsilonProducingEraser.__check(added, dependencies, reverse, produces_epsilon, added_rules)
-
-        added_rules |= rules_to_check
+    @staticmethod
+    def __traced_variants(rule: Rule, fragments: List[Fragment],
+                          produces_epsilon: Dict[NonTerminal, bool]) -> Dict[Rule, List[Fragment]]:
+        # the same variants, an erased occurrence is marked, its derivations of epsilon are expanded with the trees
+        variants: List[Tuple[Tuple[GrammarSymbol, ...], List[Fragment]]] = [((), [])]
+        for sym in rule.right:
+            kept = [(right + (sym,), replacements + [(len(right),)]) for right, replacements in variants]
+            if isinstance(sym, NonTerminal) and produces_epsilon[sym]:
+                kept += [(right, replacements + [(Erased(sym),)]) for right, replacements in variants]
+            variants = kept
+        result: Dict[Rule, List[Fragment]] = {}  # A -> BB with nullable B erases either B, both give A -> B
+        for right, replacements in variants:
+            result.setdefault(Rule(rule.left, right), []).extend(
+                substitute(fragment, replacements) for fragment in fragments)
+        return result
+
+    def __weigh(self, rules: Set[Rule], produces_epsilon: Dict[NonTerminal, bool], start: NonTerminal,
+                new_rules: Set[Rule]) -> None:
+        weighting = self.weighting
+        semiring = weighting.semiring
+        nullable_rules = [rule for rule in rules
+                          if all(isinstance(sym, NonTerminal) and produces_epsilon[sym] for sym in rule.right)]
+
+        def step(values: Dict[NonTerminal, Any]) -> Dict[NonTerminal, Any]:  # sums over derivations of epsilon
+            result: Dict[NonTerminal, Any] = {}
+            for rule in nullable_rules:
+                value = weighting.weights[rule]
+                for sym in rule.right:
+                    value = semiring.times(value, values.get(sym, semiring.zero))
+                weighting.add(result, rule.left, value)
+            return result
+
+        empty = weighting.fixpoint(step, len(produces_epsilon))
+        weights: Dict[Rule, Any] = {}
+        for rule in rules:  # the same variants, every erased occurrence multiplies the value by its sum
+            variants: List[Tuple[Tuple[GrammarSymbol, ...], Any]] = [((), weighting.weights[rule])]
+            for sym in rule.right:
+                kept = [(right + (sym,), value) for right, value in variants]
+                if isinstance(sym, NonTerminal) and produces_epsilon[sym]:
+                    kept += [(right, semiring.times(value, empty[sym])) for right, value in variants]
+                variants = kept
+            for right, value in variants:
+                if len(right) > 0:
+                    weighting.add(weights, Rule(rule.left, right), value)
+        if produces_epsilon[start]:
+            weights[Rule(start, ())] = empty[start]
+        weighting.weights = {rule: weights[rule] for rule in new_rules}
 
     def handle(self, grammar: Grammar) -> None:
         dependencies: Dict[Rule, Set[NonTerminal]] = {}
@@ -235,51 +516,206 @@ class EpsilonProducingEraser(Handler, ProduceAnalyzer):
                             if all(isinstance(sym, NonTerminal) for sym in rule.right)}
 
         ProduceAnalyzer._generate_dependencies(rules, dependencies, reverse)
-        added_rules: Set[Rule] = set()
 
-        for rule in rules:
-            EpsilonProducingEraser.__check(rule, dependencies, reverse, produces_epsilon, added_rules)
+        # the same propagation as in NonProducingEraser, only rules without terminals take part
+        remaining: Dict[Rule, int] = {rule: len(dependencies[rule]) for rule in rules}
+        queue: List[Rule] = [rule for rule in rules if remaining[rule] == 0]
+        found: Dict[NonTerminal, int] = {}  # the order of the propagation
+        while len(queue) > 0:
+            rule = queue.pop()
+            if produces_epsilon[rule.left]:
+                continue
+            produces_epsilon[rule.left] = True
+            found[rule.left] = len(found)
+            for dependant in reverse.get(rule.left, ()):  # nothing depends on some non-terminals
+                remaining[dependant] -= 1
+                if remaining[dependant] == 0:
+                    queue.append(dependant)
 
-        candidates: Set[Rule] = grammar.rules | added_rules
-        new_rules = {rule for rule in candidates if len(rule.right) > 0}
+        new_rules: Set[Rule] = set()
+        fragments: Dict[Rule, List[Fragment]] = {}
+        if self.provenance is not None:
+            # the rules that derive epsilon, their children are erased too. The ones with children found earlier by
+            # the propagation go first: then the first derivation of every non-terminal never meets a banned one and
+            # is as small as the propagation found it, so the first tree is cheap.
+            nullable_rules = [rule for rule in rules if all(produces_epsilon[sym] for sym in rule.right)]
+            nullable_rules.sort(key=lambda rule: max((found[sym] for sym in rule.right), default=-1))
+            for rule in nullable_rules:
+                self.provenance.empty.setdefault(rule.left, []).extend(
+                    (rule.right, substitute(fragment, [(Erased(sym),) for sym in rule.right]))
+                    for fragment in self.provenance.fragments[rule])
+        for rule in grammar.rules:
+            if self.provenance is None:
+                new_rules |= EpsilonProducingEraser.__variants(rule, produces_epsilon)
+                continue
+            variants = EpsilonProducingEraser.__traced_variants(rule, self.provenance.fragments[rule],
+                                                                produces_epsilon)
+            for variant, variant_fragments in variants.items():
+                fragments.setdefault(variant, []).extend(variant_fragments)
+            new_rules.update(variants)
+        new_rules = {rule for rule in new_rules if len(rule.right) > 0}
         if produces_epsilon[grammar.start]:
             new_rules.add(Rule(grammar.start, ()))
+            if self.provenance is not None:
+                fragments[Rule(grammar.start, ())] = [(Erased(grammar.start),)]
 
+        if self.weighting is not None:
+            self.__weigh(grammar.rules, produces_epsilon, grammar.start, new_rules)
         grammar.rules = new_rules
+        if self.provenance is not None:
+            self.provenance.fragments = {rule: fragments[rule] for rule in new_rules}
 
         super().handle(grammar)
 
 
 class SingleRuleEraser(Handler):
     @staticmethod
-    def __dfs(non: NonTerminal,
-              right: Tuple[GrammarSymbol, ...],
-              used: Dict[NonTerminal, bool],
-              reverse_graph: Dict[NonTerminal, Set[NonTerminal]],
-              added_rules: Set[Rule]) -> None:
-        if used[non]:
-            return
-        used[non] = True
-        for ancestor in reverse_graph[non]:
-            added_rules.add(Rule(ancestor, right))
-            SingleRuleEraser.__dfs(ancestor, right, used, reverse_graph, added_rules)
+    def __components(graph: List[List[int]]) -> List[List[int]]:
+        # Tarjan, iterative: strongly connected components, every one goes after all the ones reachable from it
+        index: List[int] = [-1] * len(graph)
+        low: List[int] = [0] * len(graph)
+        on_stack: List[bool] = [False] * len(graph)
+        stack: List[int] = []
+        components: List[List[int]] = []
+        counter = 0
+        for root in range(len(graph)):
+            if index[root] >= 0:
+                continue
+            calls: List[Tuple[int, int]] = [(root, 0)]  # (vertex, next edge to visit)
+            while len(calls) > 0:
+                vertex, edge = calls.pop()
+                if edge == 0:
+                    index[vertex] = low[vertex] = counter
+                    counter += 1
+                    stack.append(vertex)
+                    on_stack[vertex] = True
+                elif index[graph[vertex][edge - 1]] > index[vertex]:  # returned from the call
+                    low[vertex] = min(low[vertex], low[graph[vertex][edge - 1]])
+                while edge < len(graph[vertex]):
+                    target = graph[vertex][edge]
+                    edge += 1
+                    if index[target] < 0:
+                        calls.append((vertex, edge))
+                        calls.append((target, 0))
+                        break
+                    if on_stack[target]:
+                        low[vertex] = min(low[vertex], index[target])
+                else:
+                    if low[vertex] == index[vertex]:
+                        component: List[int] = []
+                        while True:
+                            member = stack.pop()
+                            on_stack[member] = False
+                            component.append(member)
+                            if member == vertex:
+                                break
+                        components.append(component)
+        return components
+
+    def __trace(self, rules: Set[Rule], new_rules: Set[Rule]) -> None:
+        # A -> α inherited from B -> α is marked with the chains A =>* B, they are expanded with the trees
+        units = self.provenance.units
+        others: Dict[NonTerminal, List[Rule]] = {}
+        for rule in rules:
+            if len(rule.right) == 1 and isinstance(rule.right[0], NonTerminal):
+                units.setdefault(rule.left, []).extend((rule.right[0], fragment)
+                                                       for fragment in self.provenance.fragments[rule])
+            else:
+                others.setdefault(rule.left, []).append(rule)
+
+        fragments: Dict[Rule, List[Fragment]] = {}
+        chained = self.provenance.chained
+        for left in {rule.left for rule in new_rules} | units.keys():
+            reached: Set[NonTerminal] = {left}
+            stack: List[NonTerminal] = [left]
+            while len(stack) > 0:
+                middle = stack.pop()
+                for rule in others.get(middle, ()):
+                    fragments.setdefault(Rule(left, rule.right), []).extend(
+                        (Chain(left, middle, fragment),) for fragment in self.provenance.fragments[rule])
+                for target, _ in units.get(middle, ()):
+                    if target not in reached:
+                        reached.add(target)
+                        stack.append(target)
+            chained[left] = reached
+        self.provenance.fragments = {rule: fragments[rule] for rule in new_rules}
+
+    def __weigh(self, rules: Set[Rule], new_rules: Set[Rule], size: int) -> None:
+        # A -> α inherited from B -> α sums over the chains of unit rules A =>* B
+        weighting = self.weighting
+        semiring = weighting.semiring
+        units = {rule for rule in rules if len(rule.right) == 1 and isinstance(rule.right[0], NonTerminal)}
+        lefts = {rule.left for rule in new_rules}
+        units_by_left: Dict[NonTerminal, List[Rule]] = {}
+        for rule in units:
+            units_by_left.setdefault(rule.left, []).append(rule)
+
+        def step(values: Dict[Tuple[NonTerminal, NonTerminal], Any]) -> Dict[Tuple[NonTerminal, NonTerminal], Any]:
+            result: Dict[Tuple[NonTerminal, NonTerminal], Any] = {(left, left): semiring.one for left in lefts}
+            for (left, middle), value in values.items():
+                for rule in units_by_left.get(middle, ()):
+                    weighting.add(result, (left, rule.right[0]), semiring.times(value, weighting.weights[rule]))
+            return result
+
+        chains = weighting.fixpoint(step, size)
+
+        others: Dict[NonTerminal, List[Rule]] = {}
+        for rule in rules:
+            if rule not in units:
+                others.setdefault(rule.left, []).append(rule)
+        weights: Dict[Rule, Any] = {}
+        for (left, middle), value in chains.items():
+            for rule in others.get(middle, ()):
+                weighting.add(weights, Rule(left, rule.right), semiring.times(value, weighting.weights[rule]))
+        weighting.weights = {rule: weights[rule] for rule in new_rules}
 
     def handle(self, grammar: Grammar) -> None:
-        reverse_graph: Dict[NonTerminal, Set[NonTerminal]] = {non: set() for non in grammar.non_terminals}
-        added_rules: Set[Rule] = set()
-        used_template: Dict[NonTerminal, bool] = {non: False for non in grammar.non_terminals}
+        # A =>* B by unit rules gives A the non-unit rules of B. Unit cycles are condensed, then the relation is
+        # propagated as bitsets over the components, the ones reachable from a component are processed before it.
+        non_terminals = list(grammar.non_terminals | {rule.left for rule in grammar.rules} |
+                             {sym for rule in grammar.rules for sym in rule.right if isinstance(sym, NonTerminal)})
+        ids: Dict[NonTerminal, int] = {non: i for i, non in enumerate(non_terminals)}
+        graph: List[List[int]] = [[] for _ in non_terminals]
+        rights: List[Set[Tuple[GrammarSymbol, ...]]] = [set() for _ in non_terminals]  # non-unit rules
+        new_rules: Set[Rule] = set()
 
         for rule in grammar.rules:
             if len(rule.right) == 1 and isinstance(rule.right[0], NonTerminal):
-                reverse_graph[rule.right[0]].add(rule.left)
-
-        for rule in grammar.rules:
-            if len(rule.right) == 2 or (len(rule.right) == 1 and isinstance(rule.right[0], Terminal)):
-                SingleRuleEraser.__dfs(rule.left, rule.right, used_template.copy(), reverse_graph, added_rules)
+                graph[ids[rule.left]].append(ids[rule.right[0]])
+            else:
+                rights[ids[rule.left]].add(rule.right)
+                new_rules.add(rule)
 
-        new_rules = {rule for rule in grammar.rules
-                     if len(rule.right) != 1 or isinstance(rule.right[0], Terminal)}
-        new_rules |= added_rules
+        components = SingleRuleEraser.__components(graph)
+        component_of: List[int] = [0] * len(non_terminals)
+        for i, component in enumerate(components):
+            for member in component:
+                component_of[member] = i
+
+        derivable: List[int] = []  # component -> bitset of non-terminals derivable by unit rules
+        for i, component in enumerate(components):
+            mask = 0
+            for member in component:
+                mask |= 1 << member
+                for target in graph[member]:
+                    if component_of[target] != i:
+                        mask |= derivable[component_of[target]]
+            derivable.append(mask)
+
+        for i, component in enumerate(components):
+            inherited: Set[Tuple[GrammarSymbol, ...]] = set()
+            mask = derivable[i]
+            while mask:
+                lowest = mask & -mask
+                inherited |= rights[lowest.bit_length() - 1]
+                mask ^= lowest
+            for member in component:
+                new_rules.update(Rule(non_terminals[member], right) for right in inherited)
+
+        if self.provenance is not None:
+            self.__trace(grammar.rules, new_rules)
+        if self.weighting is not None:
+            self.__weigh(grammar.rules, new_rules, len(non_terminals))
         grammar.rules = new_rules
 
         super().handle(grammar)
@@ -287,9 +723,24 @@ class SingleRuleEraser(Handler):
 
 class ChomskyNormalizer:
     handlers: List[Handler]
-
-    def __init__(self) -> None:
+    traced: bool  # rules of the normal form are mapped to derivations in the original grammar
+    provenance: Optional[Provenance]  # of the last normalized grammar
+    semiring: Optional[Semiring]  # rules of the normal form are weighted in it
+    weighting: Optional[Weighting]  # of the last normalized grammar
+    stats: Optional[Stats]  # time and size of the grammar after every stage if set
+
+    def __init__(self, traced: bool = False, semiring: Optional[Semiring] = None,
+                 stats: Optional[Stats] = None) -> None:
+        self.traced = traced
+        self.stats = stats
+        self.provenance = None
+        self.semiring = semiring
+        self.weighting = None
+        # useless non-terminals are erased first as well: the sums over their derivations of epsilon and over their
+        # unit cycles do not weigh any word, but they may be infinite
         self.handlers = [
+            NonProducingEraser(),
+            UnreachableEraser(),
             StartOnTheRightEraser(),
             MixedRulesFixer(),
             LongRulesDecomposer(),
@@ -302,5 +753,26 @@ class ChomskyNormalizer:
             self.handlers[i].set_next(self.handlers[i + 1])
 
     def normalize(self, grammar: Grammar) -> Grammar:
-        self.handlers[0].handle(grammar)
+        self.provenance = Provenance(grammar.rules) if self.traced else None
+        self.weighting = Weighting(grammar.rules, self.semiring) if self.semiring is not None else None
+        for handler in self.handlers:
+            handler.provenance = self.provenance
+            handler.weighting = self.weighting
+        if self.stats is None:
+            self.handlers[0].handle(grammar)
+            return grammar
+
+        # stages are run one by one to be timed, otherwise every handler passes the grammar to the next one
+        try:
+            for handler in self.handlers:
+                handler.next = None
+            for handler in self.handlers:
+                begin = time.perf_counter()
+                handler.handle(grammar)
+                self.stats.event(f"chomsky.{handler.__class__.__name__}",
+                                 {"seconds": time.perf_counter() - begin, "rules": len(grammar.rules),
+                                  "non_terminals": len(grammar.non_terminals)})
+        finally:
+            for i in range(len(self.handlers) - 1):
+                self.handlers[i].set_next(self.handlers[i + 1])
         return grammar
@@ -0,0 +1,138 @@
+from src.grammar.compiled import CompiledGrammar
+from src.parsing.tree import ParseTree, Derivations
+from src.grammar.grammar import NonTerminal
+from src.parsing.implementations.cyk.chomsky import Fragment, Marker, Provenance, markers, resolve
+from typing import List, Dict, Tuple, Optional, Sequence, Iterator, Union, FrozenSet
+
+
+# Back-pointers of a CYK chart: the cell of (start, end) maps a non-terminal to the ways it deduces the subword,
+# every way is one int, rule id * len(word) + end of the first part (start for rules A -> a).
+
+Chart = List[List[Dict[int, List[int]]]]
+
+
+def instantiate(fragment: Fragment, holes: Sequence[List[ParseTree]]) -> List[ParseTree]:
+    # trees of the original grammar, position i of the fragment expands to holes[i]
+    result: List[ParseTree] = []
+    stack: List[Tuple[Fragment, int, List[ParseTree]]] = [(fragment, 0, result)]  # (pieces, index, children)
+    while len(stack) > 0:
+        pieces, i, children = stack.pop()
+        if i == len(pieces):
+            continue
+        stack.append((pieces, i + 1, children))
+        piece = pieces[i]
+        if isinstance(piece, int):
+            children.extend(holes[piece])
+        else:
+            tree = ParseTree(piece[0].left, piece[0])
+            children.append(tree)
+            stack.append((piece[1], 0, tree.children))
+    return result
+
+
+# A task of the enumeration is a chart cell (non-terminal, start, end) or a marker of a fragment with its banned
+# non-terminals, an alternative of it is (fragment, tasks of its markers, rule, split point), the rule is None for
+# markers.
+
+Task = Union[Tuple[int, int, int], Tuple[Marker, FrozenSet[NonTerminal]]]
+Alternative = Tuple[Fragment, List[Task], Optional[int], int]
+
+no_banned: FrozenSet[NonTerminal] = frozenset()
+
+
+class CYKDerivations(Derivations):
+    compiled: CompiledGrammar  # of the normal form
+    fragments: List[List[Fragment]]  # rule id -> the derivations in the original grammar it stands for
+    provenance: Provenance  # expands the markers of the fragments
+    word: Sequence[int]
+    chart: Chart
+
+    def __init__(self, compiled: CompiledGrammar, fragments: List[List[Fragment]], provenance: Provenance,
+                 word: Sequence[int], chart: Chart):
+        self.compiled = compiled
+        self.fragments = fragments
+        self.provenance = provenance
+        self.word = word
+        self.chart = chart
+
+    def trees(self) -> Iterator[ParseTree]:
+        # Derivations are enumerated depth first over the choices of alternatives of the tasks, the tasks still to
+        # visit are a linked list shared by the choice points. A cell chooses a back-pointer and a fragment of its
+        # rule, a marker chooses one step of its expansion, and the tasks of the choice go first. The normal form has
+        # no unit and empty rules below the start and expansions have no cycles, so every derivation is finite, and
+        # a choice without alternatives backtracks.
+        chosen: List[Alternative] = []  # in preorder
+        choices: List[Tuple[tuple, int, int, List[Alternative]]] = []  # (pending, length of chosen, index, all)
+        pending: Optional[tuple] = ((self.compiled.start, 0, len(self.word) - 1), None)
+        index = 0
+        alternatives = self.__alternatives(pending[0])
+        while True:
+            if pending is None:
+                yield self.__tree(chosen)
+            elif index < len(alternatives):
+                choices.append((pending, len(chosen), index, alternatives))
+                alternative = alternatives[index]
+                chosen.append(alternative)
+                fragment, tasks, rule, mid = alternative
+                rest = pending[1]
+                if rule is not None and len(self.compiled.rights[rule]) == 2:
+                    right = self.compiled.rights[rule]
+                    rest = ((right[1], mid + 1, pending[0][2]), rest)
+                    rest = ((right[0], pending[0][1], mid), rest)
+                for task in reversed(tasks):
+                    rest = (task, rest)
+                pending = rest
+                index = 0
+                if pending is not None:
+                    alternatives = self.__alternatives(pending[0])
+                continue
+
+            while True:  # the next alternative of the last task that has one
+                if len(choices) == 0:
+                    return
+                pending, length, index, alternatives = choices.pop()
+                del chosen[length:]
+                index += 1
+                if index < len(alternatives):
+                    break
+
+    def __alternatives(self, task: Task) -> List[Alternative]:
+        if len(task) == 2:  # markers of another kind start without banned non-terminals
+            kind = type(task[0])
+            return [(fragment, [(marker, banned if type(marker) is kind else no_banned)
+                                for marker in markers(fragment)], None, 0)
+                    for fragment, banned in self.provenance.expansions(*task)]
+        non, start, end = task
+        n = len(self.word)
+        if n == 0:
+            pointers = [rule for rule in self.compiled.by_left[non] if len(self.compiled.rights[rule]) == 0]
+        else:
+            pointers = self.chart[start][end][non]
+        result: List[Alternative] = []
+        for pointer in pointers:
+            rule, mid = divmod(pointer, n) if n > 0 else (pointer, 0)
+            result.extend((fragment, [(marker, no_banned) for marker in markers(fragment)], rule, mid)
+                          for fragment in self.fragments[rule])
+        return result
+
+    def __tree(self, chosen: List[Alternative]) -> ParseTree:
+        # alternatives in preorder, the expansions of markers and the trees of cells are built before their parent,
+        # so the results of the tasks of an alternative are on the top of the stack in their order
+        results: List[Union[Fragment, List[ParseTree]]] = []
+        for fragment, tasks, rule, mid in reversed(chosen):
+            expansions = [results.pop() for _ in tasks]
+            resolved = resolve(fragment, expansions) if len(tasks) > 0 else fragment
+            if rule is None:
+                results.append(resolved)
+                continue
+            right = self.compiled.rights[rule]
+            if len(right) == 2:
+                first = results.pop()
+                second = results.pop()
+                holes = [first, second]
+            elif len(right) == 1:  # A -> a
+                holes = [[ParseTree(self.compiled.terminals[self.word[mid]])]]
+            else:
+                holes = []
+            results.append(instantiate(resolved, holes))
+        return results[0][0]
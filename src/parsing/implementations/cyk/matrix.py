@@ -0,0 +1,164 @@
+from src.grammar.grammar import Grammar, Terminal
+from src.grammar.compiled import CompiledGrammar
+from src.parsing.parser import Parser, GrammarClass, ParserError
+from typing import List, Dict, Sequence, Optional, Tuple, Any, Union
+from src.parsing.implementations.cyk.chomsky import ChomskyNormalizer
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is an optional dependency, only this parser needs it
+    np = None
+
+
+# CYK by boolean matrix products: Valiant's divide and conquer in Okhotin's formulation.
+# table[A, i, j] is True iff A deduces word[i:j]. Blocks of the table are completed in such an order that every cell
+# is deduced by batched matrix products over all binary rules before it is used. Blocks of at most leaf_size
+# positions are filled diagonal by diagonal, every diagonal in one vectorized step.
+class MatrixCYKParser(Parser):
+    grammar_class: GrammarClass
+    grammar: Optional[Grammar]
+    compiled: Optional[CompiledGrammar]
+    leaf_size: int
+    terminal_masks: Any  # np.ndarray[|terminals|, |non-terminals|] of bool
+    firsts: Any  # np.ndarray[|pairs|] of B-s in A -> BC
+    seconds: Any  # np.ndarray[|pairs|] of C-s in A -> BC
+    pair_lefts: Any  # np.ndarray[|non-terminals|, |pairs|], pair_lefts[A, p] = 1 iff A -> p
+    start: int
+    accepts_empty: bool
+
+    def __init__(self, leaf_size: int = 32) -> None:
+        if leaf_size < 1:
+            raise ValueError("Leaf size must be positive.")
+        self.grammar_class = GrammarClass("Context-free")
+        self.grammar = None
+        self.compiled = None
+        self.leaf_size = leaf_size
+        self.terminal_masks = None
+        self.firsts = None
+        self.seconds = None
+        self.pair_lefts = None
+        self.start = 0
+        self.accepts_empty = False
+
+    def fit(self, grammar: Grammar) -> None:
+        if np is None:
+            raise ParserError("MatrixCYKParser requires NumPy.")
+
+        normalizer = ChomskyNormalizer()
+        self.grammar = normalizer.normalize(grammar)
+        self.compiled = CompiledGrammar(self.grammar)
+        non_terminals = len(self.compiled.non_terminals)
+
+        self.terminal_masks = np.zeros((len(self.compiled.terminals), non_terminals), dtype=bool)
+        pairs: Dict[Tuple[int, int], List[int]] = {}
+        for left, right in zip(self.compiled.lefts, self.compiled.rights):
+            if len(right) == 1:  # A -> a
+                self.terminal_masks[~right[0], left] = True
+            elif len(right) == 2:  # A -> BC
+                pairs.setdefault(right, []).append(left)
+
+        self.firsts = np.array([first for first, _ in pairs.keys()], dtype=np.intp)
+        self.seconds = np.array([second for _, second in pairs.keys()], dtype=np.intp)
+        self.pair_lefts = np.zeros((non_terminals, len(pairs)), dtype=np.float32)
+        for p, lefts in enumerate(pairs.values()):
+            self.pair_lefts[lefts, p] = 1
+
+        self.start = self.compiled.start
+        self.accepts_empty = self.compiled.has_epsilon_rule(self.compiled.start)
+
+    def __apply(self, table: Any, rows: Any, columns: Any, products: Any) -> None:
+        # products[p, ...] > 0 means that pair p deduces the cell, A -> p makes A deduce it too
+        deduced = np.tensordot(self.pair_lefts, products, axes=1) > 0
+        table[:, rows, columns] |= deduced
+
+    def __fill(self, table: Any, rows: Any, columns: Any, middles: Any) -> None:
+        # Cells (rows[c], columns[c]) are independent of each other, every middle point is already computed
+        firsts = table[self.firsts[:, None, None], rows[None, :, None], middles[None, None, :]]
+        seconds = table[self.seconds[:, None, None], middles[None, None, :], columns[None, :, None]]
+        self.__apply(table, rows, columns, (firsts & seconds).any(axis=2))
+
+    def __leaf_compute(self, table: Any, low: int, high: int) -> None:
+        middles = np.arange(low, high)
+        for length in range(2, high - low):
+            rows = np.arange(low, high - length)
+            self.__fill(table, rows, rows + length, middles)
+
+    def __leaf_complete(self, table: Any, rows: Tuple[int, int], columns: Tuple[int, int]) -> None:
+        middles = np.concatenate((np.arange(*rows), np.arange(*columns)))
+        for length in range(columns[0] - rows[1] + 1, columns[1] - rows[0]):
+            first = max(rows[0], columns[0] - length)
+            last = min(rows[1], columns[1] - length)  # exclusively
+            cell_rows = np.arange(first, last)
+            self.__fill(table, cell_rows, cell_rows + length, middles)
+
+    def __multiply(self, table: Any,
+                   rows: Tuple[int, int], middles: Tuple[int, int], columns: Tuple[int, int]) -> None:
+        firsts = table[self.firsts, rows[0]:rows[1], middles[0]:middles[1]]
+        if not firsts.any():
+            return
+        seconds = table[self.seconds, middles[0]:middles[1], columns[0]:columns[1]]
+        products = np.matmul(firsts.astype(np.float32), seconds.astype(np.float32))
+        self.__apply(table, slice(*rows), slice(*columns), products)
+
+    @staticmethod
+    def __halves(segment: Tuple[int, int]) -> List[Tuple[int, int]]:
+        if segment[1] - segment[0] <= 1:
+            return [segment]
+        mid = (segment[0] + segment[1]) // 2
+        return [(segment[0], mid), (mid, segment[1])]
+
+    def __complete(self, table: Any, rows: Tuple[int, int], columns: Tuple[int, int]) -> None:
+        # Requires: both triangles are computed, all middle points between rows and columns are multiplied
+        if rows[1] - rows[0] <= self.leaf_size and columns[1] - columns[0] <= self.leaf_size:
+            self.__leaf_complete(table, rows, columns)
+            return
+
+        row_blocks = self.__halves(rows)[::-1]  # bottom to top
+        column_blocks = self.__halves(columns)  # left to right
+        for j, column_block in enumerate(column_blocks):
+            for i, row_block in enumerate(row_blocks):
+                for below in row_blocks[:i]:
+                    self.__multiply(table, row_block, below, column_block)
+                for before in column_blocks[:j]:
+                    self.__multiply(table, row_block, before, column_block)
+                self.__complete(table, row_block, column_block)
+
+    def __compute(self, table: Any, low: int, high: int) -> None:
+        if high - low <= self.leaf_size:
+            self.__leaf_compute(table, low, high)
+            return
+        mid = (low + high) // 2
+        self.__compute(table, low, mid)
+        self.__compute(table, mid, high)
+        self.__complete(table, (low, mid), (mid, high))
+
+    def predict(self, word: List[Terminal]) -> bool:
+        if self.grammar is None or self.compiled is None:
+            raise ParserError("Parser is not fit.")
+
+        encoded = self.compiled.encode(word)
+        if encoded is None:
+            return False  # the word has terminals which are not in the grammar
+        return self.predict_ids(encoded)
+
+    def settings(self) -> Optional[Dict[str, Union[str, int, bool]]]:
+        return {"leaf_size": self.leaf_size}
+
+    def terminal_ids(self) -> Optional[Dict[Terminal, int]]:
+        return self.compiled.terminal_ids if self.compiled is not None else None
+
+    def predict_ids(self, word: Sequence[int]) -> bool:
+        if self.grammar is None or self.compiled is None:
+            raise ParserError("Parser is not fit.")
+
+        if len(word) == 0:
+            return self.accepts_empty
+        positions = np.arange(len(word))
+
+        table = np.zeros((len(self.compiled.non_terminals), len(word) + 1, len(word) + 1), dtype=bool)
+        table[:, positions, positions + 1] = self.terminal_masks[np.fromiter(word, dtype=np.intp, count=len(word))].T
+
+        if len(self.firsts) > 0:
+            self.__compute(table, 0, len(word) + 1)
+
+        return bool(table[self.start, 0, len(word)])
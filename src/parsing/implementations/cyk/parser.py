@@ -1,58 +1,89 @@
-from src.grammar.grammar import Grammar, Terminal, NonTerminal, GrammarSymbol, Rule
+from src.grammar.grammar import Grammar, Terminal
+from src.grammar.compiled import CompiledGrammar
 from src.parsing.parser import Parser, GrammarClass, ParserError
-from typing import List, Set, Dict, Optional
-from src.parsing.implementations.cyk.chomsky import ChomskyNormalizer
+from typing import List, Dict, Sequence, Tuple, Optional, Union
+from src.parsing.implementations.cyk.chomsky import ChomskyNormalizer, Fragment, Provenance
+from src.parsing.implementations.cyk.derivations import CYKDerivations, Chart
+from src.parsing.stats import Stats
 
 
 class CYKParser(Parser):
     grammar_class: GrammarClass
     grammar: Optional[Grammar]
-    predicts: Dict[NonTerminal, List[List[bool]]]
+    compiled: Optional[CompiledGrammar]
+    terminal_lefts: List[List[int]]  # terminal id -> ids of A-s such that A -> a
+    binary_rules: List[Tuple[int, int, int]]  # (A, B, C) for every A -> BC
+    predicts: List[List[List[bool]]]  # non-terminal id -> table
+    traced: bool  # parse is supported, rules of the normal form are mapped to the original grammar
+    fragments: List[List[Fragment]]  # rule id -> the derivations in the original grammar it stands for, if traced
+    provenance: Optional[Provenance]  # expands the erased steps of the fragments, if traced
+    stats: Optional[Stats]  # counts of every word and of the normalization if set
 
-    def __init__(self) -> None:
+    def __init__(self, traced: bool = False, stats: Optional[Stats] = None) -> None:
         self.grammar_class = GrammarClass("Context-free")
         self.grammar = None
-        self.predicts = {}
+        self.compiled = None
+        self.terminal_lefts = []
+        self.binary_rules = []
+        self.predicts = []
+        self.traced = traced
+        self.fragments = []
+        self.provenance = None
+        self.stats = stats
 
     def fit(self, grammar: Grammar) -> None:
-        normalizer = ChomskyNormalizer()
+        normalizer = ChomskyNormalizer(self.traced, stats=self.stats)
         self.grammar = normalizer.normalize(grammar)
+        self.compiled = CompiledGrammar(self.grammar)
+        if self.traced:
+            self.fragments = [normalizer.provenance.fragments[rule] for rule in self.compiled.rules]
+            self.provenance = normalizer.provenance
 
-    def __base(self, word: List[Terminal]) -> None:
-        terms = self.grammar.terminals | set(word)
-        terms_to_nons: Dict[Terminal, Set[NonTerminal]] = {term: set() for term in terms}
-        for rule in self.grammar.rules:
-            if len(rule.right) == 1 and isinstance(rule.right[0], Terminal):
-                terms_to_nons[rule.right[0]].add(rule.left)
+        self.terminal_lefts = [[] for _ in self.compiled.terminals]
+        self.binary_rules = []
+        for left, right in zip(self.compiled.lefts, self.compiled.rights):
+            if len(right) == 1:  # A -> a
+                self.terminal_lefts[~right[0]].append(left)
+            elif len(right) == 2:  # A -> BC
+                self.binary_rules.append((left, right[0], right[1]))
+
+    def __base(self, word: Sequence[int]) -> None:
         for i, term in enumerate(word):
-            for non in terms_to_nons[term]:
+            for non in self.terminal_lefts[term]:
                 self.predicts[non][i][i] = True
 
-    def __deduces_epsilon(self):
-        return Rule(self.grammar.start, ())
-
-    def __step(self, length: int, word: List[Terminal]) -> None:
+    def __step(self, length: int, word: Sequence[int]) -> None:
         for start in range(0, len(word) - length + 1):
             end = start + length - 1
             for mid in range(start, end):  # in A -> BC, C -> u the |u| is at least 1 (because C != S)
-                for rule in self.grammar.rules:
-                    if len(rule.right) == 2:  # A -> BC
-                        left: NonTerminal = rule.left
-                        first: NonTerminal = rule.right[0]
-                        second: NonTerminal = rule.right[1]
-                        self.predicts[left][start][end] |= (self.predicts[first][start][mid] and
-                                                            self.predicts[second][mid + 1][end])
+                for left, first, second in self.binary_rules:  # A -> BC
+                    self.predicts[left][start][end] |= (self.predicts[first][start][mid] and
+                                                        self.predicts[second][mid + 1][end])
 
     def predict(self, word: List[Terminal]) -> bool:
-        if self.grammar is None:
+        if self.grammar is None or self.compiled is None:
+            raise ParserError("Parser is not fit.")
+
+        encoded = self.compiled.encode(word)
+        if encoded is None:
+            return False  # the word has terminals which are not in the grammar
+        return self.predict_ids(encoded)
+
+    def settings(self) -> Optional[Dict[str, Union[str, int, bool]]]:
+        return {"traced": self.traced}  # stats only count
+
+    def terminal_ids(self) -> Optional[Dict[Terminal, int]]:
+        return self.compiled.terminal_ids if self.compiled is not None else None
+
+    def predict_ids(self, word: Sequence[int]) -> bool:
+        if self.grammar is None or self.compiled is None:
             raise ParserError("Parser is not fit.")
 
         if len(word) == 0:
-            return Rule(self.grammar.start, ()) in self.grammar.rules
+            return self.compiled.has_epsilon_rule(self.compiled.start)
 
-        self.predicts = {}
-        for non in self.grammar.non_terminals:
-            self.predicts[non] = [[False for _ in range(len(word))] for __ in range(len(word))]
+        self.predicts = [[[False for _ in range(len(word))] for __ in range(len(word))]
+                         for ___ in self.compiled.non_terminals]
 
         # Base of induction:
 
@@ -63,4 +94,57 @@ class CYKParser(Parser):
         for length in range(2, len(word) + 1):  # ... so, with rule A -> BC neither B nor C deduces epsilon
             self.__step(length, word)
 
-        return self.predicts[self.grammar.start][0][len(word) - 1]
+        if self.stats is not None:
+            self.__count(word)
+        return self.predicts[self.compiled.start][0][len(word) - 1]
+
+    def __count(self, word: Sequence[int]) -> None:
+        # the induction has no early exits, so the applications of A -> BC are the triples (start, mid, end) times
+        # the binary rules, the ones of A -> a are the lefts of the terminals
+        n = len(word)
+        filled = sum(1 for start in range(n) for end in range(start, n)
+                     if any(table[start][end] for table in self.predicts))
+        entries = sum(row.count(True) for table in self.predicts for row in table)
+        applications = (n + 1) * n * (n - 1) // 6 * len(self.binary_rules) + \
+            sum(len(self.terminal_lefts[term]) for term in word)
+        self.stats.event("cyk.word", {"words": 1, "cells": n * (n + 1) // 2, "filled": filled, "entries": entries,
+                                      "applications": applications}, {"length": n})
+
+    def parse(self, word: List[Terminal]) -> Optional[CYKDerivations]:  # None if the word is not in the language
+        if self.grammar is None or self.compiled is None:
+            raise ParserError("Parser is not fit.")
+        if not self.traced:
+            raise ParserError("Parser is not traced, derivations need CYKParser(traced=True).")
+
+        encoded = self.compiled.encode(word)
+        if encoded is None:
+            return None
+        n = len(encoded)
+        if n == 0:
+            if not self.compiled.has_epsilon_rule(self.compiled.start):
+                return None
+            return CYKDerivations(self.compiled, self.fragments, self.provenance, encoded, [])
+
+        # the same induction as in predict_ids, every cell keeps the ways its non-terminals deduce the subword
+        binary = [(rule, left, right[0], right[1])
+                  for rule, (left, right) in enumerate(zip(self.compiled.lefts, self.compiled.rights))
+                  if len(right) == 2]
+        chart: Chart = [[{} for _ in range(n)] for __ in range(n)]
+        for i, term in enumerate(encoded):
+            for rule in self.compiled.by_right.get((~term,), ()):
+                chart[i][i].setdefault(self.compiled.lefts[rule], []).append(rule * n + i)
+        for length in range(2, n + 1):
+            for start in range(0, n - length + 1):
+                end = start + length - 1
+                cell = chart[start][end]
+                for mid in range(start, end):
+                    firsts, seconds = chart[start][mid], chart[mid + 1][end]
+                    if len(firsts) == 0 or len(seconds) == 0:
+                        continue
+                    for rule, left, first, second in binary:
+                        if first in firsts and second in seconds:
+                            cell.setdefault(left, []).append(rule * n + mid)
+
+        if self.compiled.start not in chart[0][n - 1]:
+            return None
+        return CYKDerivations(self.compiled, self.fragments, self.provenance, encoded, chart)
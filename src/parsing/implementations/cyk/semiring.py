@@ -0,0 +1,65 @@
+from src.grammar.grammar import Rule
+from typing import Dict, Any, Callable
+import operator
+import math
+
+
+# A semiring gives the values of CYK cells: a cell is the sum over the derivations of the subword, the value of
+# a derivation is the product of the values of its rules. The scalar operations are used at fit, the chart is
+# computed by the NumPy ufuncs of the same names.
+
+class Semiring:
+    name: str
+    zero: Any
+    one: Any
+    plus: Callable[[Any, Any], Any]
+    times: Callable[[Any, Any], Any]
+    plus_ufunc: str  # name of the NumPy ufunc
+    times_ufunc: str
+    dtype: str  # of NumPy charts
+    weighted: bool  # the value of a rule is its weight, otherwise one
+    exact: bool  # sums over cyclic derivations are reached in finitely many steps or do not exist
+
+    def __init__(self, name: str, zero: Any, one: Any, plus: Callable[[Any, Any], Any],
+                 times: Callable[[Any, Any], Any], plus_ufunc: str, times_ufunc: str, dtype: str,
+                 weighted: bool, exact: bool):
+        self.name = name
+        self.zero = zero
+        self.one = one
+        self.plus = plus
+        self.times = times
+        self.plus_ufunc = plus_ufunc
+        self.times_ufunc = times_ufunc
+        self.dtype = dtype
+        self.weighted = weighted
+        self.exact = exact
+
+    def value(self, rule: Rule) -> Any:
+        return rule.weight if self.weighted else self.one
+
+    def equal(self, first: Any, second: Any) -> bool:  # approximations are compared with a relative tolerance
+        if self.exact:
+            return first == second
+        return math.isclose(first, second, rel_tol=1e-12)
+
+    def finite(self, value: Any) -> bool:  # approximations of divergent sums end at infinity
+        return self.exact or math.isfinite(value)
+
+    def __reduce__(self):  # semirings are shared module objects, so parsers are pickled with a reference
+        return semiring_by_name, (self.name,)
+
+
+boolean = Semiring("boolean", False, True, operator.or_, operator.and_, "logical_or", "logical_and", "bool",
+                   weighted=False, exact=True)
+counting = Semiring("counting", 0, 1, operator.add, operator.mul, "add", "multiply", "object",  # big ints
+                    weighted=False, exact=True)
+viterbi = Semiring("viterbi", 0.0, 1.0, max, operator.mul, "maximum", "multiply", "float64",  # the best derivation
+                   weighted=True, exact=True)
+inside = Semiring("inside", 0.0, 1.0, operator.add, operator.mul, "add", "multiply", "float64",
+                  weighted=True, exact=False)
+
+semirings: Dict[str, Semiring] = {semiring.name: semiring for semiring in [boolean, counting, viterbi, inside]}
+
+
+def semiring_by_name(name: str) -> Semiring:
+    return semirings[name]
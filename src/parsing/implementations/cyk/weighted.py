@@ -0,0 +1,127 @@
+from src.grammar.grammar import Grammar, Terminal
+from src.grammar.compiled import CompiledGrammar
+from src.parsing.parser import Parser, GrammarClass, ParserError
+from typing import List, Dict, Sequence, Optional, Any, Union
+from src.parsing.implementations.cyk.chomsky import ChomskyNormalizer
+from src.parsing.implementations.cyk.semiring import Semiring, inside
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is an optional dependency, only the NumPy parsers need it
+    np = None
+
+
+# CYK over a semiring: chart[A, i, j] is the sum over the derivations of word[i:j] from A of the products of the rule
+# values. The normal form is weighted by the normalizer, so the sums are the ones of the original grammar.
+# Cells of one length are computed at once: every binary rule with every start and split point is one element of
+# an array, the products are summed over split points, then over the rules of the same left part.
+class WeightedCYKParser(Parser):
+    grammar_class: GrammarClass
+    grammar: Optional[Grammar]
+    compiled: Optional[CompiledGrammar]
+    semiring: Semiring
+    terminal_values: Any  # np.ndarray[|terminals|, |non-terminals|], values of A -> a
+    firsts: Any  # np.ndarray[|binary rules|] of B-s in A -> BC
+    seconds: Any  # np.ndarray[|binary rules|] of C-s in A -> BC
+    lefts: Any  # np.ndarray[|binary rules|] of A-s in A -> BC
+    values: Any  # np.ndarray[|binary rules|] of values of A -> BC
+    start: int
+    empty: Any  # value of the empty word
+
+    def __init__(self, semiring: Semiring = inside) -> None:
+        self.grammar_class = GrammarClass("Context-free")
+        self.grammar = None
+        self.compiled = None
+        self.semiring = semiring
+        self.terminal_values = None
+        self.firsts = None
+        self.seconds = None
+        self.lefts = None
+        self.values = None
+        self.start = 0
+        self.empty = semiring.zero
+
+    def fit(self, grammar: Grammar) -> None:
+        if np is None:
+            raise ParserError("WeightedCYKParser requires NumPy.")
+
+        normalizer = ChomskyNormalizer(semiring=self.semiring)
+        self.grammar = normalizer.normalize(grammar)
+        self.compiled = CompiledGrammar(self.grammar)
+        weights = normalizer.weighting.weights
+        zero = self.semiring.zero
+
+        self.terminal_values = np.full((len(self.compiled.terminals), len(self.compiled.non_terminals)), zero,
+                                       dtype=self.semiring.dtype)
+        binary: List[int] = []
+        self.empty = zero
+        for rule, (left, right) in enumerate(zip(self.compiled.lefts, self.compiled.rights)):
+            if len(right) == 1:  # A -> a
+                self.terminal_values[~right[0], left] = weights[self.compiled.rules[rule]]
+            elif len(right) == 2:  # A -> BC
+                binary.append(rule)
+            elif left == self.compiled.start:  # S -> ε
+                self.empty = weights[self.compiled.rules[rule]]
+
+        self.firsts = np.array([self.compiled.rights[rule][0] for rule in binary], dtype=np.intp)
+        self.seconds = np.array([self.compiled.rights[rule][1] for rule in binary], dtype=np.intp)
+        self.lefts = np.array([self.compiled.lefts[rule] for rule in binary], dtype=np.intp)
+        self.values = np.empty(len(binary), dtype=self.semiring.dtype)
+        for i, rule in enumerate(binary):
+            self.values[i] = weights[self.compiled.rules[rule]]
+        self.start = self.compiled.start
+
+    def score(self, word: List[Terminal]) -> Any:  # zero of the semiring if the word is not in the language
+        if self.grammar is None or self.compiled is None:
+            raise ParserError("Parser is not fit.")
+
+        encoded = self.compiled.encode(word)
+        if encoded is None:
+            return self.semiring.zero  # the word has terminals which are not in the grammar
+        return self.score_ids(encoded)
+
+    def score_ids(self, word: Sequence[int]) -> Any:
+        if self.grammar is None or self.compiled is None:
+            raise ParserError("Parser is not fit.")
+
+        n = len(word)
+        if n == 0:
+            return self.empty
+        plus = getattr(np, self.semiring.plus_ufunc)
+        times = getattr(np, self.semiring.times_ufunc)
+        positions = np.arange(n)
+
+        chart = np.full((len(self.compiled.non_terminals), n + 1, n + 1), self.semiring.zero, dtype=self.semiring.dtype)
+        chart[:, positions, positions + 1] = self.terminal_values[np.fromiter(word, dtype=np.intp, count=n)].T
+
+        if len(self.lefts) > 0:
+            firsts = self.firsts[:, None, None]
+            seconds = self.seconds[:, None, None]
+            values = self.values[:, None, None]
+            for length in range(2, n + 1):
+                starts = np.arange(n - length + 1)
+                ends = starts + length
+                mids = starts[:, None] + np.arange(1, length)[None, :]  # [start, split point]
+                products = times(times(chart[firsts, starts[None, :, None], mids[None]],
+                                       chart[seconds, mids[None], ends[None, :, None]]), values)
+                cells = chart[:, starts, ends]
+                plus.at(cells, self.lefts, plus.reduce(products, axis=2))  # rules with the same left part are summed
+                chart[:, starts, ends] = cells
+
+        result = chart[self.start, 0, n]
+        return result.item() if isinstance(result, np.generic) else result
+
+    def score_many(self, words: List[List[Terminal]]) -> List[Any]:
+        return [self.score(word) for word in words]
+
+    def predict(self, word: List[Terminal]) -> bool:
+        return self.score(word) != self.semiring.zero
+
+    def settings(self) -> Optional[Dict[str, Union[str, int, bool]]]:
+        return {"semiring": self.semiring.name}
+
+    def terminal_ids(self) -> Optional[Dict[Terminal, int]]:
+        return self.compiled.terminal_ids if self.compiled is not None else None
+
+    def predict_ids(self, word: Sequence[int]) -> bool:
+        return self.score_ids(word) != self.semiring.zero
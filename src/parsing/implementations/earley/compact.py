@@ -0,0 +1,220 @@
+from src.grammar.compiled import CompiledGrammar, DottedRules, is_terminal
+from src.parsing.stats import Stats, CountingSet
+from typing import Optional, List, Dict, Set, Tuple
+from array import array
+
+
+# An item (situation) is one int: origin * states + state, where a state is a rule with a point.
+# States of a rule are consecutive, so moving the point of an item is item + 1.
+
+
+class CompactColumn:
+    __slots__ = ('items', 'waiting', 'scans', 'leo', 'accepting')
+
+    items: array  # all items of the column
+    waiting: Dict[int, array]  # non-terminal id -> items with it after the point
+    scans: Dict[int, array]  # terminal id -> items with it after the point
+    leo: Dict[int, int]  # non-terminal id -> the topmost item of its deterministic reduction path, -1 if none
+    accepting: bool
+
+    def __init__(self) -> None:
+        self.items = array('q')
+        self.waiting = {}
+        self.scans = {}
+        self.leo = {}
+        self.accepting = False
+
+    def is_empty(self) -> bool:
+        return len(self.items) == 0
+
+
+class CompactEarley:
+    states: int
+    state_next: List[Optional[int]]  # state -> encoded symbol after the point, None if completed
+    state_left: List[int]  # state -> non-terminal id of the rule
+    nullable: List[bool]
+    predictions: List[List[int]]  # non-terminal id -> closed set of predicted states (Aycock-Horspool)
+    predicted: List[List[int]]  # non-terminal id -> non-terminals whose predictions are in the same closed set
+    target: int  # completed start rule from the origin 0
+    stats: Optional[Stats]
+
+    def __init__(self, compiled: CompiledGrammar, nullable: List[bool], start_rule: int,
+                 stats: Optional[Stats] = None):
+        dotted = DottedRules(compiled)
+        firsts = dotted.firsts
+        self.state_next = dotted.next
+        self.state_left = dotted.lefts
+        self.states = len(dotted)
+        self.nullable = nullable
+
+        self.predictions = []
+        self.predicted = []
+        for non in range(len(compiled.non_terminals)):
+            predictions: List[int] = []
+            predicted: List[int] = [non]
+            seen: Set[int] = {non}
+            i = 0
+            while i < len(predicted):
+                for rule in compiled.by_left[predicted[i]]:
+                    state = firsts[rule]
+                    while True:
+                        predictions.append(state)
+                        symbol = self.state_next[state]
+                        if symbol is None or is_terminal(symbol):
+                            break
+                        if symbol not in seen:
+                            seen.add(symbol)
+                            predicted.append(symbol)
+                        if not nullable[symbol]:
+                            break
+                        state += 1
+                i += 1
+            self.predictions.append(predictions)
+            self.predicted.append(predicted)
+
+        self.target = firsts[start_rule] + 1
+        self.stats = stats
+        self.__install()
+
+    def __install(self) -> None:
+        if self.stats is not None:  # the counted steps replace the plain ones
+            self.initial = self.__counted_initial
+            self.advance = self.__counted_advance
+
+    def __getstate__(self):  # bound methods are not pickled, they are installed again
+        state = self.__dict__.copy()
+        state.pop("initial", None)
+        state.pop("advance", None)
+        return state
+
+    def __setstate__(self, state) -> None:
+        self.__dict__.update(state)
+        self.__install()
+
+    def __index(self, column: CompactColumn, item: int, symbol: int) -> None:
+        index = column.scans if is_terminal(symbol) else column.waiting
+        key = ~symbol if is_terminal(symbol) else symbol
+        if key not in index:
+            index[key] = array('q')
+        index[key].append(item)
+
+    def __leo(self, chart: List[CompactColumn], position: int, non: int) -> int:
+        # Leo: if the only item waiting for non is B -> γ·non, completing non completes B as well, and so on.
+        # Only the topmost completed item of such a path gets into the chart, so right recursion stays linear.
+        states = self.states
+        path: List[Tuple[int, int]] = []
+        result = -1
+        while True:
+            memo = chart[position].leo.get(non)
+            if memo is not None:
+                if memo == -2:  # the path is a cycle of unit completions, it has no top
+                    result = -1
+                    path.append((position, non))
+                elif memo >= 0:
+                    result = memo
+                break
+            parents = chart[position].waiting.get(non)
+            if parents is None or len(parents) != 1 or self.state_next[parents[0] % states + 1] is not None:
+                chart[position].leo[non] = -1
+                break
+            chart[position].leo[non] = -2
+            path.append((position, non))
+            result = parents[0] + 1  # the completed parent
+            position, non = parents[0] // states, self.state_left[parents[0] % states]
+        for position, non in path:
+            chart[position].leo[non] = result
+        return result
+
+    def __closure(self, chart: List[CompactColumn], column: CompactColumn, seeds: List[int], seen: Set[int]) -> None:
+        # seen is the dedup index of the column, it is dropped after the closure
+        position = len(chart)  # the column is not in the chart yet
+        states = self.states
+        state_next = self.state_next
+        base = position * states
+        predicted: Set[int] = set()
+        agenda: List[int] = []
+
+        for item in seeds:
+            if item not in seen:
+                seen.add(item)
+                column.items.append(item)
+                agenda.append(item)
+
+        while len(agenda) > 0:
+            item = agenda.pop()
+            origin, state = divmod(item, states)
+            symbol = state_next[state]
+
+            if symbol is None:  # Complete
+                if origin == position:
+                    continue  # the parents have already moved over the nullable non-terminal
+                top = self.__leo(chart, origin, self.state_left[state])
+                if top >= 0:
+                    if top not in seen:
+                        seen.add(top)
+                        column.items.append(top)
+                        agenda.append(top)
+                    continue
+                parents = chart[origin].waiting.get(self.state_left[state])
+                if parents is not None:
+                    for parent in parents:
+                        if parent + 1 not in seen:
+                            seen.add(parent + 1)
+                            column.items.append(parent + 1)
+                            agenda.append(parent + 1)
+
+            elif is_terminal(symbol):  # waits for the scan
+                self.__index(column, item, symbol)
+
+            else:  # Predict
+                self.__index(column, item, symbol)
+                if symbol not in predicted:
+                    predicted.update(self.predicted[symbol])
+                    for predicted_state in self.predictions[symbol]:  # closed, so they skip the agenda
+                        if base + predicted_state not in seen:
+                            seen.add(base + predicted_state)
+                            column.items.append(base + predicted_state)
+                            if state_next[predicted_state] is not None:
+                                self.__index(column, base + predicted_state, state_next[predicted_state])
+                if self.nullable[symbol] and item + 1 not in seen:
+                    seen.add(item + 1)
+                    column.items.append(item + 1)
+                    agenda.append(item + 1)
+
+        column.accepting = self.target in seen  # the target has the origin 0
+
+    def initial(self) -> CompactColumn:
+        column = CompactColumn()
+        self.__closure([], column, [self.target - 1], set())
+        return column
+
+    def advance(self, chart: List[CompactColumn], terminal: int) -> CompactColumn:
+        column = CompactColumn()
+        scanned = chart[-1].scans.get(terminal)
+        if scanned is not None:
+            self.__closure(chart, column, [item + 1 for item in scanned], set())
+        return column
+
+    def __counted_initial(self) -> CompactColumn:
+        column = CompactColumn()
+        seen = CountingSet()
+        self.__closure([], column, [self.target - 1], seen)
+        self.__count(0, column, seen, 0)
+        return column
+
+    def __counted_advance(self, chart: List[CompactColumn], terminal: int) -> CompactColumn:
+        column = CompactColumn()
+        seen = CountingSet()
+        scanned = chart[-1].scans.get(terminal, ())
+        self.__closure(chart, column, [item + 1 for item in scanned], seen)  # makes the acceptance test if empty
+        self.__count(len(chart), column, seen, len(scanned))
+        return column
+
+    def __count(self, position: int, column: CompactColumn, seen: CountingSet, scans: int) -> None:
+        # every insertion into seen follows a failed test, the acceptance test is the only other one
+        states = self.states
+        predictions = sum(1 for item in column.items if item // states == position) - (1 if position == 0 else 0)
+        completions = sum(1 for item in column.items if self.state_next[item % states] is None)
+        self.stats.event("earley.column", {"items": len(column.items), "deduplicated": seen.checks - len(seen) - 1,
+                                           "predictions": predictions, "completions": completions, "scans": scans},
+                         {"position": position})
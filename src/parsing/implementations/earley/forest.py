@@ -0,0 +1,123 @@
+from src.grammar.compiled import CompiledGrammar, DottedRules, is_terminal
+from src.parsing.tree import ForestNode
+from typing import List, Dict, Set, Tuple, Optional, Sequence
+
+
+# Earley recognition that builds the shared packed parse forest on the way (Scott, "SPPF-style parsing from Earley
+# recognisers", 2008). An item is (dotted state, origin) with the forest node of the part before the point.
+# Completions of nullable non-terminals inside a column are remembered (H), so items predicted later in the column
+# still move over them.
+
+Item = Tuple[int, int, Optional[ForestNode]]  # (state, origin, node)
+
+
+class ForestBuilder:
+    compiled: CompiledGrammar
+    dotted: DottedRules
+    start: int  # non-terminal id the word is derived from
+
+    def __init__(self, compiled: CompiledGrammar, dotted: DottedRules, start: int):
+        self.compiled = compiled
+        self.dotted = dotted
+        self.start = start
+
+    def build(self, word: Sequence[int]) -> Optional[ForestNode]:  # the root, None if the word is not derived
+        dotted = self.dotted
+        firsts = dotted.firsts
+        columns: List[Dict[Tuple[int, int], Optional[ForestNode]]] = []  # (state, origin) -> node
+        waiting: List[Dict[int, List[Item]]] = []  # non-terminal id -> items with it after the point
+        families: Set[Tuple[ForestNode, int, Optional[ForestNode], Optional[ForestNode]]] = set()
+        nodes: Dict[Tuple[int, int, int], ForestNode] = {}  # nodes ending at the current position
+        scans: List[Item] = []  # items of the current column with the next terminal after the point
+
+        def make_node(state: int, origin: int, end: int, left: Optional[ForestNode],
+                      right: ForestNode) -> ForestNode:
+            # the node of the part of the rule before the point of state, it has just moved over right
+            point = state - firsts[dotted.rules[state]]
+            finished = dotted.next[state] is None
+            if point == 1 and not finished:
+                return right  # the first symbol of a rule needs no intermediate node
+            key = (0, dotted.lefts[state], origin) if finished else (1, state, origin)
+            node = nodes.get(key)
+            if node is None:
+                node = ForestNode(dotted.lefts[state], None, origin, end) if finished \
+                    else ForestNode(None, state, origin, end)
+                nodes[key] = node
+            family = (node, state, left, right)
+            if family not in families:
+                families.add(family)
+                node.packs.append((state, left, right))
+            return node
+
+        def add(position: int, item: Item, agenda: List[Item], following: List[Item]) -> None:
+            state, origin, node = item
+            symbol = dotted.next[state]
+            if symbol is not None and is_terminal(symbol):
+                if position < len(word) and ~symbol == word[position]:
+                    following.append(item)  # items are added once, their keys are checked by callers
+                return
+            key = (state, origin)
+            if key in columns[position]:
+                return
+            columns[position][key] = node
+            if symbol is not None:
+                waiting[position].setdefault(symbol, []).append(item)
+            agenda.append(item)
+
+        pending: List[Item] = [(firsts[rule], 0, None) for rule in self.compiled.by_left[self.start]]
+        seen_scans: Set[Tuple[int, int]] = set()
+        for position in range(len(word) + 1):
+            columns.append({})
+            waiting.append({})
+            agenda: List[Item] = []
+            scans = []
+            completed: Dict[int, ForestNode] = {}  # H: non-terminals completed with an empty part of the word
+            for item in pending:
+                add(position, item, agenda, scans)
+            seen_scans.clear()
+
+            while len(agenda) > 0:
+                state, origin, node = agenda.pop()
+                symbol = dotted.next[state]
+                if symbol is not None:  # Predict
+                    for rule in self.compiled.by_left[symbol]:
+                        add(position, (firsts[rule], position, None), agenda, scans)
+                    if symbol in completed:
+                        moved = make_node(state + 1, origin, position, node, completed[symbol])
+                        add(position, (state + 1, origin, moved), agenda, scans)
+                    continue
+
+                left = dotted.lefts[state]  # Complete
+                if node is None:  # an empty rule
+                    node = nodes.get((0, left, position))
+                    if node is None:
+                        node = ForestNode(left, None, position, position)
+                        nodes[(0, left, position)] = node
+                    family = (node, state, None, None)
+                    if family not in families:
+                        families.add(family)
+                        node.packs.append((state, None, None))
+                if origin == position:
+                    completed[left] = node
+                parents = waiting[origin].get(left, [])
+                i = 0
+                while i < len(parents):  # the list may grow if origin is the current column
+                    parent_state, parent_origin, parent_node = parents[i]
+                    moved = make_node(parent_state + 1, parent_origin, position, parent_node, node)
+                    add(position, (parent_state + 1, parent_origin, moved), agenda, scans)
+                    i += 1
+
+            if position == len(word):
+                break
+            # Scan: nodes ending at the next position are made from here on
+            nodes = {}
+            leaf = ForestNode(~word[position], None, position, position + 1)
+            pending = []
+            for state, origin, node in scans:
+                if (state, origin) in seen_scans:
+                    continue
+                seen_scans.add((state, origin))
+                pending.append((state + 1, origin, make_node(state + 1, origin, position + 1, node, leaf)))
+            if len(pending) == 0:
+                return None
+        return nodes.get((0, self.start, 0))
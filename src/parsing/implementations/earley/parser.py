@@ -1,177 +1,202 @@
 from src.grammar.grammar import Grammar, Rule, GrammarSymbol, Terminal, NonTerminal
-from typing import Optional, List, Dict, Set
+from src.grammar.compiled import CompiledGrammar, DottedRules, is_terminal
+from src.grammar.analysis import nullable, productive
+from typing import Optional, List, Dict, Set, Tuple, Sequence, Union
 from src.parsing.parser import Parser, GrammarClass, ParserError
 from src.parsing.implementations.earley.situation import Situation, SituationFactory
 from src.parsing.implementations.earley.utils import a_access, a_add, EarlyLogger
+from src.parsing.implementations.earley.compact import CompactEarley, CompactColumn
+from src.parsing.implementations.earley.session import EarleySession
+from src.parsing.implementations.earley.forest import ForestBuilder
+from src.parsing.tree import ParseForest
+from src.parsing.stats import Stats
+from src.parsing.utils.trie import PrefixTrie
 
 
 class EarleyParser(Parser):
     grammar: Optional[Grammar]
     original_start: Optional[NonTerminal]
-    rules: Optional[Dict[NonTerminal, Set[Rule]]]
-
-    def __init__(self):
+    compiled: Optional[CompiledGrammar]
+    rules: Optional[Dict[NonTerminal, List[Rule]]]
+    nullable: Set[NonTerminal]
+    predictions: Dict[NonTerminal, List[Tuple[Rule, int]]]  # closed set of (rule, point) predicted by a non-terminal
+    predicted: Dict[NonTerminal, List[NonTerminal]]  # non-terminals whose predictions are in the same closed set
+    initial: Dict[Optional[GrammarSymbol], Set[Situation]]  # closed column 0
+    compact: bool  # items are packed ints in arrays (EarlyLogger does not print them)
+    engine: Optional[CompactEarley]
+    streaming: Optional[CompactEarley]  # engine of sessions if the parser is not compact, it is built on demand
+    forest: Optional[ForestBuilder]  # built by the first parse
+    stats: Optional[Stats]  # counts of every column if set
+
+    def __init__(self, compact: bool = False, stats: Optional[Stats] = None):
         super().__init__()
+        self.compact = compact
+        self.stats = stats
+        self.engine = None
+        self.streaming = None
+        self.forest = None
         self.grammar_class = GrammarClass("Context-free")
         self.grammar = None
+        self.compiled = None
         self.rules = None
         self.original_start = None
+        self.nullable = set()
+        self.predictions = {}
+        self.predicted = {}
+        self.initial = {}
 
     def fit(self, grammar: Grammar) -> None:
         new_start = NonTerminal()
         new_rule = Rule(new_start, (grammar.start,))
         self.original_start = grammar.start
+        augmented = CompiledGrammar(Grammar(grammar.non_terminals | {new_start},
+                                            grammar.terminals,
+                                            new_start,
+                                            grammar.rules | {new_rule}))
+        # rules with unproductive non-terminals never complete, without them every situation is on a way to a word,
+        # so a non-empty column means the prefix can be continued
+        flags = productive(augmented)
+        useful = {rule for rule, right in zip(augmented.rules, augmented.rights)
+                  if all(is_terminal(symbol) or flags[symbol] for symbol in right)}
         self.grammar = Grammar(grammar.non_terminals | {new_start},
                                grammar.terminals,
                                new_start,
-                               grammar.rules | {new_rule})
-        self.rules = {}
-        for rule in self.grammar.rules:
-            if rule.left not in self.rules.keys():
-                self.rules[rule.left] = set()
-            self.rules[rule.left].add(rule)
+                               useful | {new_rule})
+        self.compiled = CompiledGrammar(self.grammar)
+        self.rules = {non: [self.compiled.rules[rule] for rule in self.compiled.by_left[i]]
+                      for i, non in enumerate(self.compiled.non_terminals)}
+
+        flags = nullable(self.compiled)
+        self.nullable = {non for i, non in enumerate(self.compiled.non_terminals) if flags[i]}
+        self.predictions = {}
+        self.predicted = {}
+        for non in self.compiled.non_terminals:
+            self.__fit_predictions(non)
+
+        self.initial = {}
+        for rule, point in [(new_rule, 0)] + self.predictions[new_start]:
+            sit = Situation(rule, point, 0, 0)
+            a_add(self.initial, sit.next_symbol(), sit)
+
+        self.engine = None
+        self.streaming = None
+        self.forest = None
+        if self.compact:
+            start_rule = self.compiled.by_left[self.compiled.start][0]
+            self.engine = CompactEarley(self.compiled, flags, start_rule, self.stats)
+
+    def __fit_predictions(self, non: NonTerminal) -> None:
+        # Aycock-Horspool: the point is also moved over nullable non-terminals right at the prediction
+        predictions: List[Tuple[Rule, int]] = []
+        predicted: List[NonTerminal] = [non]
+        seen: Set[NonTerminal] = {non}
+        i = 0
+        while i < len(predicted):
+            for rule in self.rules[predicted[i]]:
+                for point in range(len(rule.right) + 1):
+                    predictions.append((rule, point))
+                    if point == len(rule.right) or isinstance(rule.right[point], Terminal):
+                        break
+                    if rule.right[point] not in seen:
+                        seen.add(rule.right[point])
+                        predicted.append(rule.right[point])
+                    if rule.right[point] not in self.nullable:
+                        break
+            i += 1
+        self.predictions[non] = predictions
+        self.predicted[non] = predicted
 
     def __basic_rule(self) -> Rule:
         if self.grammar is None or self.rules is None or self.original_start is None:
             raise ParserError("Parser is not fit.")
         return next(iter(self.rules[self.grammar.start]))
 
-    def __original_start(self) -> NonTerminal:
-        if self.grammar is None or self.rules is None or self.original_start is None:
-            raise ParserError("Parser is not fit.")
-        ret = self.__basic_rule().right[0]
-        if not isinstance(ret, NonTerminal):
-            raise ParserError("Fit incorrectly.")  # assume, it never happens
-        return ret
-
-    def __get_start(self) -> Situation:
-        return Situation(self.__basic_rule(), 0, 0, 0)
-
     def __get_target(self, word_length: int) -> Situation:
         return Situation(self.__basic_rule(), 1, 0, word_length)
 
     @staticmethod
-    def __predict(rule: Rule,
-                  situation_map: Dict[Optional[GrammarSymbol], Set[Situation]],
-                  result_map: Dict[Optional[GrammarSymbol], Set[Situation]]) -> bool:
-        if rule.left not in situation_map.keys():
-            return False
-        ret = False
-        if rule.left in situation_map.keys():
-            for sit in situation_map[rule.left]:
-                predicted = SituationFactory.predict(sit, rule)
-                if predicted is not None:
-                    a_add(result_map, predicted.next_symbol(), predicted)
-                    ret = True
-        return ret
+    def __add(column: Dict[Optional[GrammarSymbol], Set[Situation]],
+              situation: Situation,
+              agenda: List[Situation]) -> None:
+        key = situation.next_symbol()
+        if key not in column.keys():
+            column[key] = set()
+        if situation not in column[key]:  # every situation gets into the agenda exactly once
+            column[key].add(situation)
+            agenda.append(situation)
 
     @staticmethod
-    def __complete(parents_map: Dict[Optional[GrammarSymbol], Set[Situation]],
-                   kid_iterable: Set[Situation],
-                   result_map: Dict[Optional[GrammarSymbol], Set[Situation]]) -> bool:
-        ret = False
-        for kid in kid_iterable:
-            if kid.rule.left in parents_map.keys():
-                for parent in parents_map[kid.rule.left]:
-                    completed = SituationFactory.complete(parent, kid)
-                    if completed is not None:
-                        ret = True
-                        a_add(result_map, completed.next_symbol(), completed)
-        return ret
-
-    @staticmethod
-    def __complete_ancestors(space: List[Dict[Optional[GrammarSymbol], Set[Situation]]],
-                             kids_iterable: Set[Situation],
-                             result_map: Dict[Optional[GrammarSymbol], Set[Situation]]) -> bool:
-        ret = False
-        for kid in kids_iterable:
-            if kid.previous < kid.current:
-                parents_map = space[kid.previous]
-                if kid.rule.left in parents_map.keys():
-                    for parent in parents_map[kid.rule.left]:
-                        completed = SituationFactory.complete(parent, kid)
-                        if completed is not None:
-                            ret = True
-                            a_add(result_map, completed.next_symbol(), completed)
-        return ret
+    def __leo(space: List[Dict[Optional[GrammarSymbol], Set[Situation]]],
+              leo: List[Dict[NonTerminal, Optional[Tuple[Rule, int]]]],
+              position: int,
+              non: NonTerminal) -> Optional[Tuple[Rule, int]]:
+        # Leo: if the only situation waiting for non is B -> γ·non, completing non completes B as well, and so on.
+        # Only the topmost completed situation of such a path gets into the chart, so right recursion stays linear.
+        resolving = (non, -1)  # marks the path being resolved
+        path: List[Tuple[int, NonTerminal]] = []
+        result: Optional[Tuple[Rule, int]] = None
+        while True:
+            if non in leo[position].keys():
+                if leo[position][non] is resolving:  # the path is a cycle of unit completions, it has no top
+                    result = None
+                    path.append((position, non))
+                elif leo[position][non] is not None:
+                    result = leo[position][non]
+                break
+            parents = space[position].get(non, ())
+            parent = next(iter(parents)) if len(parents) == 1 else None
+            if parent is None or parent.point != len(parent.rule.right) - 1:
+                leo[position][non] = None
+                break
+            leo[position][non] = resolving
+            path.append((position, non))
+            result = (parent.rule, parent.previous)
+            position, non = parent.previous, parent.rule.left
+        for position, non in path:
+            leo[position][non] = result
+        return result
 
     def __closure(self,
-                  cell: Dict[Optional[GrammarSymbol], Set[Situation]],
-                  everything: Set[Situation],
-                  space: List[Dict[Optional[GrammarSymbol], Set[Situation]]]):
-
-        layers: List[Dict[Optional[GrammarSymbol], Set[Situation]]] = [cell.copy()]
-
-        target = 1
-        start = 0
-
-        # Complete & Predict global closure {
-
-        global_changes = True
-        while global_changes:
-            global_changes = False
-
-            # Complete closure {
-
-            changes = True
-            while changes:
-                changes = False
-
-                # With the previous cells:
-                if None in layers[target - 1].keys():
-                    self.__complete_ancestors(space, layers[target - 1][None], a_access(layers, target))
-
-                # With the current cell:
-                layers.append({})
-                for i in range(0, target):
-                    if None in layers[target - 1].keys():
-                        self.__complete(layers[i], layers[target - 1][None], a_access(layers, target))
-                    if None in layers[i].keys():
-                        self.__complete(layers[target - 1], layers[i][None], a_access(layers, target))
-
-                for key, value in layers[target].items():
-                    value.difference_update(everything)  # removes copies
-                    if len(value) > 0:
-                        global_changes = True
-                        changes = True
-                        everything.update(value)
-
-                if changes:
-                    target += 1
-
-            # }
-
-            # Predict on new ones {
-
-            changes = True
-            while changes:
-                changes = False
-
-                for non, rule_iterable in self.rules.items():
-                    for rule in rule_iterable:
-                        for i in range(start, target):
-                            self.__predict(rule, layers[i], a_access(layers, target))
-                start = target
-
-                for key, value in layers[target].items():
-                    value.difference_update(everything)  # remove copies
-                    if len(value) > 0:
-                        global_changes = True
-                        changes = True
-                        everything.update(value)
-
-                if changes:
-                    target += 1
-
-            # }
-
-        # }
-
-        for i in range(1, target):
-            for key, value in layers[i].items():
-                if key not in cell.keys():
-                    cell[key] = set()
-                cell[key].update(value)
+                  position: int,
+                  space: List[Dict[Optional[GrammarSymbol], Set[Situation]]],
+                  leo: List[Dict[NonTerminal, Optional[Tuple[Rule, int]]]]) -> None:
+        column = space[position]  # situations are indexed by the symbol after the point
+        agenda: List[Situation] = [sit for situations in column.values() for sit in situations]
+        predicted: Set[NonTerminal] = set()
+
+        while len(agenda) > 0:
+            sit = agenda.pop()
+            symbol = sit.next_symbol()
+
+            if symbol is None:  # Complete
+                if sit.previous == position:
+                    continue  # the parents have already moved over the nullable non-terminal
+                top = self.__leo(space, leo, sit.previous, sit.rule.left)
+                if top is not None:
+                    self.__add(column, Situation(top[0], len(top[0].right), top[1], position), agenda)
+                    continue
+                for parent in space[sit.previous].get(sit.rule.left, ()):
+                    self.__add(column, Situation(parent.rule, parent.point + 1, parent.previous, position), agenda)
+
+            elif isinstance(symbol, NonTerminal):  # Predict
+                if symbol not in predicted:
+                    predicted.update(self.predicted[symbol])
+                    for rule, point in self.predictions[symbol]:  # closed, so they skip the agenda
+                        a_add(column, rule.right[point] if point < len(rule.right) else None,
+                              Situation(rule, point, position, position))
+                if symbol in self.nullable:
+                    self.__add(column, Situation(sit.rule, sit.point + 1, sit.previous, position), agenda)
+
+    def __count(self, space: List[Dict[Optional[GrammarSymbol], Set[Situation]]], position: int,
+                word: List[Terminal]) -> None:
+        # the same numbers as the ones of CompactEarley, except deduplicated: situations are not counted on insertion
+        column = space[position]
+        predictions = sum(1 for situations in column.values() for sit in situations if sit.previous == position)
+        scans = len(space[position - 1].get(word[position - 1], ())) if position > 0 else 0
+        self.stats.event("earley.column", {"items": sum(len(situations) for situations in column.values()),
+                                           "predictions": predictions - (1 if position == 0 else 0),
+                                           "completions": len(column.get(None, ())), "scans": scans},
+                         {"position": position})
 
     @staticmethod
     def __scan(space: List[Dict[Optional[GrammarSymbol], Set[Situation]]],
@@ -189,27 +214,124 @@ class EarleyParser(Parser):
         EarlyLogger.print(f"After scan:", a_access(space, position + 1))
         return ret
 
+    def __compact_predict(self, encoded: Sequence[int]) -> bool:
+        chart: List[CompactColumn] = [self.engine.initial()]
+        for term in encoded:
+            chart.append(self.engine.advance(chart, term))
+            if chart[-1].is_empty():
+                return False  # no situation could be continued
+        return chart[-1].accepting
+
     def predict(self, word: List[Terminal]) -> bool:
         if self.grammar is None or self.rules is None or self.original_start is None:
             raise ParserError("Parser is not fit before prediction.")
 
+        if self.engine is not None:
+            encoded = self.compiled.encode(word)
+            if encoded is None:
+                return False  # the word has terminals which are not in the grammar
+            return self.__compact_predict(encoded)
+
         EarlyLogger.print("Starting prediction of this word:", word)
 
         space: List[Dict[Optional[GrammarSymbol], Set[Situation]]] = list()
-
-        space.append({})
-        space[0][self.__original_start()] = {self.__get_start()}
-        everything = space[0][self.__original_start()].copy()
-
-        self.__closure(space[0], everything, space)
+        space.append({key: value.copy() for key, value in self.initial.items()})  # already closed
+        leo: List[Dict[NonTerminal, Optional[Tuple[Rule, int]]]] = [{}]
 
         for position in range(len(word)):
             self.__scan(space, position, word)
-            for key, value in a_access(space, position + 1).items():
-                everything.difference_update(value)
+            leo.append({})
+            self.__closure(position + 1, space, leo)
+
+        EarlyLogger.print("\nLet's see what we have at the end:", space[len(word)], '')
+        if self.stats is not None:  # columns are kept, so they are counted once per word
+            for position in range(len(space)):
+                self.__count(space, position, word)
+
+        return self.__get_target(len(word)) in space[len(word)].get(None, set())
 
-            self.__closure(space[position + 1], everything, space)
+    def settings(self) -> Optional[Dict[str, Union[str, int, bool]]]:
+        return {"compact": self.compact}  # stats only count
+
+    def terminal_ids(self) -> Optional[Dict[Terminal, int]]:
+        return self.compiled.terminal_ids if self.compiled is not None else None
+
+    def predict_ids(self, word: Sequence[int]) -> bool:
+        if self.grammar is None or self.rules is None or self.original_start is None:
+            raise ParserError("Parser is not fit before prediction.")
+        if self.engine is not None:
+            return self.__compact_predict(word)
+        return self.predict([self.compiled.terminals[terminal] for terminal in word])  # situations hold terminals
 
-        EarlyLogger.print("\nLet's see what we have at the end:", everything, '')
+    def start(self) -> EarleySession:  # the word is fed terminal by terminal
+        if self.grammar is None or self.rules is None or self.original_start is None:
+            raise ParserError("Parser is not fit before prediction.")
+        if self.engine is not None:
+            return EarleySession(self.engine, self.compiled)
+        if self.streaming is None:
+            start_rule = self.compiled.by_left[self.compiled.start][0]
+            self.streaming = CompactEarley(self.compiled, nullable(self.compiled), start_rule, self.stats)
+        return EarleySession(self.streaming, self.compiled)
+
+    def parse(self, word: List[Terminal]) -> Optional[ParseForest]:  # None if the word is not in the language
+        if self.grammar is None or self.rules is None or self.original_start is None:
+            raise ParserError("Parser is not fit before parsing.")
+        encoded = self.compiled.encode(word)
+        if encoded is None:
+            return None
+        if self.forest is None:
+            start = self.compiled.non_terminal_ids[self.original_start]
+            self.forest = ForestBuilder(self.compiled, DottedRules(self.compiled), start)
+        root = self.forest.build(encoded)
+        return ParseForest(self.compiled, self.forest.dotted, root) if root is not None else None
+
+    def predict_many(self, words: List[List[Terminal]]) -> List[bool]:
+        # Words are walked as a prefix trie, depth first: the chart of a prefix is shared by all its words,
+        # going back up the trie just drops the last columns.
+        if self.grammar is None or self.rules is None or self.original_start is None:
+            raise ParserError("Parser is not fit before prediction.")
 
-        return self.__get_target(len(word)) in everything
+        trie = PrefixTrie(words)
+        results = [False] * len(words)
+        chart: List[CompactColumn] = []
+        space: List[Dict[Optional[GrammarSymbol], Set[Situation]]] = []
+        leo: List[Dict[NonTerminal, Optional[Tuple[Rule, int]]]] = []
+        prefix: List[Terminal] = []
+        if self.engine is not None:
+            chart.append(self.engine.initial())
+            accepting = chart[-1].accepting
+        else:
+            space.append({key: value.copy() for key, value in self.initial.items()})
+            leo.append({})
+            accepting = self.__get_target(0) in space[0].get(None, set())
+        for i in trie.ends[0]:
+            results[i] = accepting
+
+        agenda = [(child, 0, term) for term, child in trie.children[0].items()]  # (node, depth of parent, edge)
+        while len(agenda) > 0:
+            node, depth, term = agenda.pop()
+            if self.engine is not None:
+                del chart[depth + 1:]
+                terminal = self.compiled.terminal_ids.get(term)
+                if terminal is None:
+                    continue  # the terminal is not in the grammar, no word below is accepted
+                chart.append(self.engine.advance(chart, terminal))
+                if chart[-1].is_empty():
+                    continue
+                accepting = chart[-1].accepting
+            else:
+                del space[depth + 1:]
+                del leo[depth + 1:]
+                del prefix[depth:]
+                prefix.append(term)
+                if not self.__scan(space, depth, prefix):
+                    continue
+                leo.append({})
+                self.__closure(depth + 1, space, leo)
+                if self.stats is not None:
+                    self.__count(space, depth + 1, prefix)
+                accepting = self.__get_target(depth + 1) in space[depth + 1].get(None, set())
+            for i in trie.ends[node]:
+                results[i] = accepting
+            agenda.extend((child, depth + 1, symbol) for symbol, child in trie.children[node].items())
+        return results
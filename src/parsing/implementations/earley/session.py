@@ -0,0 +1,47 @@
+from src.grammar.grammar import Terminal
+from src.grammar.compiled import CompiledGrammar
+from src.parsing.implementations.earley.compact import CompactEarley, CompactColumn
+from typing import List, Set, Optional
+
+
+class EarleySession:  # incremental recognition: one column per fed terminal, it stops at the first bad one
+    engine: CompactEarley
+    compiled: CompiledGrammar
+    chart: List[CompactColumn]
+    failed_at: Optional[int]  # position of the first terminal that can not continue the prefix
+
+    def __init__(self, engine: CompactEarley, compiled: CompiledGrammar):
+        self.engine = engine
+        self.compiled = compiled
+        self.chart = [engine.initial()]
+        self.failed_at = None if self.__viable(self.chart[0]) else 0  # the language is empty
+
+    def feed(self, terminal: Terminal) -> bool:  # False if the prefix can not be continued to a word anymore
+        if self.failed_at is not None:
+            return False
+        encoded = self.compiled.terminal_ids.get(terminal)
+        column = self.engine.advance(self.chart, encoded) if encoded is not None else None
+        if column is None or not self.__viable(column):
+            self.failed_at = len(self.chart) - 1
+            return False
+        self.chart.append(column)
+        return True
+
+    @staticmethod
+    def __viable(column: CompactColumn) -> bool:
+        # the parser has no rules with unproductive non-terminals, so a column either accepts or waits for a terminal
+        return column.accepting or len(column.scans) > 0
+
+    def is_accepting(self) -> bool:  # the fed prefix is a word of the language
+        return self.failed_at is None and self.chart[-1].accepting
+
+    def is_viable_prefix(self) -> bool:
+        return self.failed_at is None
+
+    def expected_terminals(self) -> Set[Terminal]:  # the ones that keep the prefix viable
+        if self.failed_at is not None:
+            return set()
+        return {self.compiled.terminals[terminal] for terminal in self.chart[-1].scans.keys()}
+
+    def position(self) -> int:  # number of accepted terminals
+        return len(self.chart) - 1
@@ -0,0 +1,178 @@
+from src.grammar.compiled import CompiledGrammar, DottedRules, is_terminal
+from src.grammar.analysis import nullable, first_sets
+from typing import List, Dict, Set, Tuple, FrozenSet
+
+
+# An LR(1) item is a state of DottedRules with a set of lookahead terminal ids, a set of items is Dict[state, Set].
+# In the tables a shift to the state s is s, a reduction by the rule r is ~r. The reduction by the start rule
+# on the end marker is the acceptance.
+
+Items = Dict[int, Set[int]]
+
+
+class LRAutomaton:
+    kind: str  # "LR(1)" or "LALR(1)"
+    compiled: CompiledGrammar  # augmented: the start rule is the only rule of the start non-terminal
+    start_rule: int
+    end: int  # terminal id of the end marker
+    dotted: DottedRules
+    nullable: List[bool]
+    firsts: List[Set[int]]
+    actions: List[Dict[int, List[int]]]  # state -> terminal id -> actions
+    gotos: List[Dict[int, int]]  # state -> non-terminal id -> state
+    conflicts: List[Tuple[int, int]]  # (state, terminal id) with more than one action
+    kernels: List[Items]
+
+    def __init__(self, compiled: CompiledGrammar, start_rule: int, kind: str = "LALR(1)"):
+        if kind not in ("LR(1)", "LALR(1)"):
+            raise ValueError(f"Automaton kind {kind} is not supported.")
+        self.kind = kind
+        self.compiled = compiled
+        self.start_rule = start_rule
+        self.end = len(compiled.terminals)
+        self.dotted = DottedRules(compiled)
+        self.nullable = nullable(compiled)
+        self.firsts = first_sets(compiled, self.nullable)
+
+        if kind == "LR(1)":
+            kernels, transitions = self.__canonical()
+        else:
+            kernels, transitions = self.__lalr()
+        self.__tables(kernels, transitions)
+
+    def __first_of(self, state: int, lookaheads: Set[int]) -> Set[int]:  # FIRST of the rest of the rule + lookaheads
+        result: Set[int] = set()
+        symbol = self.dotted.next[state]
+        while symbol is not None:
+            if is_terminal(symbol):
+                result.add(~symbol)
+                return result
+            result |= self.firsts[symbol]
+            if not self.nullable[symbol]:
+                return result
+            state += 1
+            symbol = self.dotted.next[state]
+        return result | lookaheads
+
+    def closure(self, kernel: Items) -> Items:
+        items: Items = {state: set(lookaheads) for state, lookaheads in kernel.items()}
+        agenda = list(items.keys())
+        while len(agenda) > 0:
+            state = agenda.pop()
+            symbol = self.dotted.next[state]
+            if symbol is None or is_terminal(symbol):
+                continue
+            lookaheads = self.__first_of(state + 1, items[state])
+            for rule in self.compiled.by_left[symbol]:
+                predicted = self.dotted.firsts[rule]
+                if predicted not in items:
+                    items[predicted] = set(lookaheads)
+                    agenda.append(predicted)
+                elif not lookaheads <= items[predicted]:
+                    items[predicted] |= lookaheads
+                    agenda.append(predicted)
+        return items
+
+    def __successors(self, items: Items) -> Dict[int, Items]:  # symbol after the point -> kernel of goto
+        result: Dict[int, Items] = {}
+        for state, lookaheads in items.items():
+            symbol = self.dotted.next[state]
+            if symbol is not None:
+                if symbol not in result:
+                    result[symbol] = {}
+                result[symbol][state + 1] = set(lookaheads)
+        return result
+
+    def __canonical(self) -> Tuple[List[Items], List[Dict[int, int]]]:
+        kernels: List[Items] = [{self.dotted.firsts[self.start_rule]: {self.end}}]
+        index: Dict[FrozenSet, int] = {}
+        transitions: List[Dict[int, int]] = []
+        i = 0
+        while i < len(kernels):
+            transitions.append({})
+            for symbol, kernel in self.__successors(self.closure(kernels[i])).items():
+                key = frozenset((state, frozenset(lookaheads)) for state, lookaheads in kernel.items())
+                if key not in index:
+                    index[key] = len(kernels)
+                    kernels.append(kernel)
+                transitions[i][symbol] = index[key]
+            i += 1
+        return kernels, transitions
+
+    def __lalr(self) -> Tuple[List[Items], List[Dict[int, int]]]:
+        # LR(0) automaton, then lookaheads are generated spontaneously and propagated (the Dragon book way)
+        cores: List[FrozenSet[int]] = [frozenset([self.dotted.firsts[self.start_rule]])]
+        index: Dict[FrozenSet[int], int] = {cores[0]: 0}
+        transitions: List[Dict[int, int]] = []
+        i = 0
+        while i < len(cores):
+            transitions.append({})
+            closed = self.closure({state: set() for state in cores[i]})
+            for symbol, kernel in self.__successors(closed).items():
+                core = frozenset(kernel.keys())
+                if core not in index:
+                    index[core] = len(cores)
+                    cores.append(core)
+                transitions[i][symbol] = index[core]
+            i += 1
+
+        dummy = self.end + 1  # stands for "whatever the lookahead of the kernel item is"
+        kernels: List[Items] = [{state: set() for state in core} for core in cores]
+        propagation: Dict[Tuple[int, int], List[Tuple[int, int]]] = {}
+        for i, core in enumerate(cores):
+            for kernel_state in core:
+                for state, lookaheads in self.closure({kernel_state: {dummy}}).items():
+                    symbol = self.dotted.next[state]
+                    if symbol is None:
+                        continue
+                    target = transitions[i][symbol]
+                    for lookahead in lookaheads:
+                        if lookahead == dummy:
+                            propagation.setdefault((i, kernel_state), []).append((target, state + 1))
+                        else:
+                            kernels[target][state + 1].add(lookahead)
+
+        kernels[0][self.dotted.firsts[self.start_rule]].add(self.end)
+        agenda = [(i, state) for i, kernel in enumerate(kernels) for state, lookaheads in kernel.items()
+                  if len(lookaheads) > 0]
+        while len(agenda) > 0:
+            source = agenda.pop()
+            for target in propagation.get(source, ()):
+                lookaheads = kernels[source[0]][source[1]]
+                if not lookaheads <= kernels[target[0]][target[1]]:
+                    kernels[target[0]][target[1]] |= lookaheads
+                    agenda.append(target)
+        return kernels, transitions
+
+    def __tables(self, kernels: List[Items], transitions: List[Dict[int, int]]) -> None:
+        self.kernels = kernels
+        self.actions = []
+        self.gotos = []
+        self.conflicts = []
+        for i, kernel in enumerate(kernels):
+            actions: Dict[int, List[int]] = {}
+            for state, lookaheads in self.closure(kernel).items():
+                if self.dotted.next[state] is None:
+                    for lookahead in lookaheads:
+                        actions.setdefault(lookahead, []).append(~self.dotted.rules[state])
+            gotos: Dict[int, int] = {}
+            for symbol, target in transitions[i].items():
+                if is_terminal(symbol):
+                    actions.setdefault(~symbol, []).append(target)
+                else:
+                    gotos[symbol] = target
+            for lookahead, variants in actions.items():
+                if len(variants) > 1:
+                    self.conflicts.append((i, lookahead))
+            self.actions.append(actions)
+            self.gotos.append(gotos)
+
+    def is_lr0(self) -> bool:  # every state with a completed item has nothing else, lookaheads are not needed
+        for kernel in self.kernels:
+            items = self.closure(kernel)
+            if len(items) > 1 and any(self.dotted.next[state] is None for state in items):
+                return False
+        return True
+
+    def __len__(self) -> int:
+        return len(self.actions)
@@ -0,0 +1,144 @@
+from src.grammar.grammar import Grammar, Rule, Terminal, NonTerminal
+from src.grammar.compiled import CompiledGrammar
+from src.parsing.parser import Parser, GrammarClass, ParserError
+from src.parsing.implementations.lr.automaton import LRAutomaton
+from typing import List, Dict, Set, Sequence, Tuple, Optional, Union
+
+
+class StackNode:  # node of the graph-structured stack
+    __slots__ = ('state', 'edges')
+
+    state: int
+    edges: Set['StackNode']  # nodes under this one
+
+    def __init__(self, state: int) -> None:
+        self.state = state
+        self.edges = set()
+
+
+class GLRParser(Parser):  # Tomita's algorithm with Farshi's correction for epsilon rules
+    grammar_class: GrammarClass
+    grammar: Optional[Grammar]
+    compiled: Optional[CompiledGrammar]
+    kind: str  # automaton kind, "LALR(1)" or "LR(1)"
+    start_rule: int
+    actions: List[Dict[int, List[int]]]  # state -> terminal id -> all actions, shift s is s, reduction by r is ~r
+    gotos: List[Dict[int, int]]
+    lengths: List[int]
+    lefts: List[int]
+    longest: int  # length of the longest right part
+
+    def __init__(self, kind: str = "LALR(1)"):
+        self.grammar_class = GrammarClass("Context-free")
+        self.kind = kind
+        self.grammar = None
+        self.compiled = None
+        self.start_rule = 0
+        self.actions = []
+        self.gotos = []
+        self.lengths = []
+        self.lefts = []
+        self.longest = 0
+
+    def fit(self, grammar: Grammar) -> None:
+        new_start = NonTerminal()
+        self.grammar = Grammar(grammar.non_terminals | {new_start},
+                               grammar.terminals,
+                               new_start,
+                               grammar.rules | {Rule(new_start, (grammar.start,))})
+        self.compiled = CompiledGrammar(self.grammar)
+        self.start_rule = self.compiled.by_left[self.compiled.start][0]
+        automaton = LRAutomaton(self.compiled, self.start_rule, self.kind)  # conflicts are forks
+        self.actions = automaton.actions
+        self.gotos = automaton.gotos
+        self.lengths = [len(right) for right in self.compiled.rights]
+        self.lefts = self.compiled.lefts
+        self.longest = max(self.lengths)
+
+    @staticmethod
+    def __ancestors(node: StackNode, length: int) -> Set[StackNode]:  # ends of all paths of the length
+        layer = {node}
+        for _ in range(length):
+            layer = {lower for upper in layer for lower in upper.edges}
+        return layer
+
+    @staticmethod
+    def __reaching(frontier: Dict[int, StackNode], node: StackNode, limit: int) -> List[Tuple[StackNode, int]]:
+        # (upper, distance): paths inside the level from upper to node, such edges come from epsilon reductions
+        result = [(node, 0)]
+        layer = {node}
+        for distance in range(1, limit):
+            layer = {upper for upper in frontier.values() if not upper.edges.isdisjoint(layer)}
+            if len(layer) == 0:
+                break
+            result.extend((upper, distance) for upper in layer)
+        return result
+
+    def __reduce(self, frontier: Dict[int, StackNode], terminal: int) -> None:
+        accept = ~self.start_rule
+        # (node, first, depth): reduce along the paths from node, if first is not None, only along the ones
+        # whose edge number depth + 1 leads to first
+        pending: List[Tuple[StackNode, Optional[StackNode], int]] = [(node, None, 0) for node in frontier.values()]
+        while len(pending) > 0:
+            node, first, depth = pending.pop()
+            for action in self.actions[node.state].get(terminal, ()):
+                if action >= 0 or action == accept:
+                    continue
+                rule = ~action
+                if first is None:
+                    lowers = self.__ancestors(node, self.lengths[rule])
+                elif self.lengths[rule] > depth:
+                    lowers = self.__ancestors(first, self.lengths[rule] - depth - 1)
+                else:
+                    continue  # the path is too short to use the edge
+                for lower in lowers:
+                    state = self.gotos[lower.state][self.lefts[rule]]
+                    if state not in frontier:
+                        frontier[state] = StackNode(state)
+                        frontier[state].edges.add(lower)
+                        pending.append((frontier[state], None, 0))
+                    elif lower not in frontier[state].edges:
+                        frontier[state].edges.add(lower)
+                        # Farshi: the paths through the new edge are reduced, including the ones from other nodes
+                        for upper, distance in self.__reaching(frontier, frontier[state], self.longest):
+                            pending.append((upper, lower, distance))
+
+    def __shift(self, frontier: Dict[int, StackNode], terminal: int) -> Dict[int, StackNode]:
+        shifted: Dict[int, StackNode] = {}
+        for node in frontier.values():
+            for action in self.actions[node.state].get(terminal, ()):
+                if action >= 0:
+                    if action not in shifted:
+                        shifted[action] = StackNode(action)
+                    shifted[action].edges.add(node)
+        return shifted
+
+    def predict(self, word: List[Terminal]) -> bool:
+        if self.compiled is None:
+            raise ParserError("Parser is not fit.")
+
+        encoded = self.compiled.encode(word)
+        if encoded is None:
+            return False  # the word has terminals which are not in the grammar
+        return self.predict_ids(encoded)
+
+    def settings(self) -> Optional[Dict[str, Union[str, int, bool]]]:
+        return {"kind": self.kind}
+
+    def terminal_ids(self) -> Optional[Dict[Terminal, int]]:
+        return self.compiled.terminal_ids if self.compiled is not None else None
+
+    def predict_ids(self, word: Sequence[int]) -> bool:
+        if self.compiled is None:
+            raise ParserError("Parser is not fit.")
+
+        frontier: Dict[int, StackNode] = {0: StackNode(0)}
+        for terminal in word:
+            self.__reduce(frontier, terminal)
+            frontier = self.__shift(frontier, terminal)
+            if len(frontier) == 0:
+                return False
+
+        end = len(self.compiled.terminals)
+        self.__reduce(frontier, end)
+        return any(~self.start_rule in self.actions[node.state].get(end, ()) for node in frontier.values())
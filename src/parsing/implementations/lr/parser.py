@@ -0,0 +1,90 @@
+from src.grammar.grammar import Grammar, Rule, Terminal, NonTerminal
+from src.grammar.compiled import CompiledGrammar
+from src.parsing.parser import Parser, GrammarClass, GrammarClassError, ParserError
+from src.parsing.implementations.lr.automaton import LRAutomaton
+from typing import List, Dict, Sequence, Optional, Union
+from itertools import chain
+
+
+class LRParser(Parser):
+    grammar_class: GrammarClass
+    grammar: Optional[Grammar]
+    compiled: Optional[CompiledGrammar]
+    kind: str  # "LR(1)" (canonical tables) or "LALR(1)"
+    start_rule: int
+    actions: List[Dict[int, int]]  # state -> terminal id -> shift s is s, reduction by r is ~r
+    gotos: List[Dict[int, int]]  # state -> non-terminal id -> state
+    lengths: List[int]  # rule id -> length of the right part
+    lefts: List[int]  # rule id -> non-terminal id
+
+    def __init__(self, kind: str = "LALR(1)"):
+        self.grammar_class = GrammarClass(kind)
+        self.kind = kind
+        self.grammar = None
+        self.compiled = None
+        self.start_rule = 0
+        self.actions = []
+        self.gotos = []
+        self.lengths = []
+        self.lefts = []
+
+    def fit(self, grammar: Grammar) -> None:
+        new_start = NonTerminal()
+        self.grammar = Grammar(grammar.non_terminals | {new_start},
+                               grammar.terminals,
+                               new_start,
+                               grammar.rules | {Rule(new_start, (grammar.start,))})
+        compiled = CompiledGrammar(self.grammar)
+        start_rule = compiled.by_left[compiled.start][0]
+        automaton = LRAutomaton(compiled, start_rule, self.kind)
+
+        if len(automaton.conflicts) > 0:
+            self.compiled = None
+            state, terminal = automaton.conflicts[0]
+            raise GrammarClassError(f"Grammar is not {self.kind}: {len(automaton.conflicts)} conflicts "
+                                    f"(the first one is in state {state} on terminal {terminal}).")
+
+        self.compiled = compiled
+        self.start_rule = start_rule
+        self.actions = [{terminal: variants[0] for terminal, variants in actions.items()}
+                        for actions in automaton.actions]
+        self.gotos = automaton.gotos
+        self.lengths = [len(right) for right in compiled.rights]
+        self.lefts = compiled.lefts
+
+    def predict(self, word: List[Terminal]) -> bool:
+        if self.compiled is None:
+            raise ParserError("Parser is not fit.")
+
+        encoded = self.compiled.encode(word)
+        if encoded is None:
+            return False  # the word has terminals which are not in the grammar
+        return self.predict_ids(encoded)
+
+    def settings(self) -> Optional[Dict[str, Union[str, int, bool]]]:
+        return {"kind": self.kind}
+
+    def terminal_ids(self) -> Optional[Dict[Terminal, int]]:
+        return self.compiled.terminal_ids if self.compiled is not None else None
+
+    def predict_ids(self, word: Sequence[int]) -> bool:
+        if self.compiled is None:
+            raise ParserError("Parser is not fit.")
+
+        accept = ~self.start_rule
+        stack: List[int] = [0]
+        for terminal in chain(word, (len(self.compiled.terminals),)):  # with the end marker
+            while True:
+                action = self.actions[stack[-1]].get(terminal)
+                if action is None:
+                    return False
+                if action >= 0:  # Shift
+                    stack.append(action)
+                    break
+                if action == accept:
+                    return True
+                rule = ~action  # Reduce
+                if self.lengths[rule] > 0:
+                    del stack[-self.lengths[rule]:]
+                stack.append(self.gotos[stack[-1]][self.lefts[rule]])
+        return False
@@ -0,0 +1,99 @@
+from src.grammar.grammar import Grammar, Terminal
+from src.grammar.compiled import CompiledGrammar, DottedRules, is_terminal
+from src.grammar.analysis import is_right_linear
+from src.parsing.parser import Parser, GrammarClass, GrammarClassError, ParserError
+from typing import List, Dict, Set, Sequence, FrozenSet, Optional, Union
+
+
+# A right-linear grammar is a nondeterministic automaton: its states are rules with a point before a terminal
+# or at the end. States of the deterministic automaton are sets of them, they are built lazily, on demand.
+
+
+class RegularParser(Parser):
+    grammar_class: GrammarClass
+    compiled: Optional[CompiledGrammar]
+    dotted: Optional[DottedRules]
+    states: List[FrozenSet[int]]  # id -> set of dotted rules
+    index: Dict[FrozenSet[int], int]
+    transitions: List[Dict[int, int]]  # id -> terminal id -> id, -1 if the word is rejected
+    accepting: List[bool]
+    initial: int
+
+    def __init__(self):
+        self.grammar_class = GrammarClass("Regular")
+        self.compiled = None
+        self.dotted = None
+        self.states = []
+        self.index = {}
+        self.transitions = []
+        self.accepting = []
+        self.initial = -1
+
+    def fit(self, grammar: Grammar) -> None:
+        compiled = CompiledGrammar(grammar)
+        if not is_right_linear(compiled):
+            self.compiled = None
+            raise GrammarClassError("Grammar is not right-linear.")
+        self.compiled = compiled
+        self.dotted = DottedRules(compiled)
+        self.states = []
+        self.index = {}
+        self.transitions = []
+        self.accepting = []
+        self.initial = self.__state({self.dotted.firsts[rule] for rule in compiled.by_left[compiled.start]})
+
+    def __state(self, seeds: Set[int]) -> int:
+        result: Set[int] = set()
+        expanded: Set[int] = set()
+        agenda = list(seeds)
+        while len(agenda) > 0:
+            state = agenda.pop()
+            symbol = self.dotted.next[state]
+            if symbol is None or is_terminal(symbol):
+                result.add(state)
+            elif symbol not in expanded:  # the last symbol of the rule, it is replaced with its rules
+                expanded.add(symbol)
+                agenda.extend(self.dotted.firsts[rule] for rule in self.compiled.by_left[symbol])
+        if len(result) == 0:
+            return -1
+
+        key = frozenset(result)
+        if key not in self.index:
+            self.index[key] = len(self.states)
+            self.states.append(key)
+            self.transitions.append({})
+            self.accepting.append(any(self.dotted.next[state] is None for state in key))
+        return self.index[key]
+
+    def predict(self, word: List[Terminal]) -> bool:
+        if self.compiled is None:
+            raise ParserError("Parser is not fit.")
+
+        encoded = self.compiled.encode(word)
+        if encoded is None:
+            return False  # the word has terminals which are not in the grammar
+        return self.predict_ids(encoded)
+
+    def settings(self) -> Optional[Dict[str, Union[str, int, bool]]]:
+        return {}
+
+    def terminal_ids(self) -> Optional[Dict[Terminal, int]]:
+        return self.compiled.terminal_ids if self.compiled is not None else None
+
+    def predict_ids(self, word: Sequence[int]) -> bool:
+        if self.compiled is None:
+            raise ParserError("Parser is not fit.")
+
+        current = self.initial
+        if current < 0:
+            return False  # the start non-terminal has no rules
+        for terminal in word:
+            following = self.transitions[current].get(terminal)
+            if following is None:
+                following = self.__state({state + 1 for state in self.states[current]
+                                          if self.dotted.next[state] == ~terminal})
+                self.transitions[current][terminal] = following
+            if following < 0:
+                return False
+            current = following
+        return self.accepting[current]
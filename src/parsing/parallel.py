@@ -0,0 +1,72 @@
+from src.parsing.parser import NaiveParser, TokenParser, ParserError
+from concurrent.futures import ProcessPoolExecutor, Future
+from collections import deque
+from itertools import islice
+import os
+from typing import List, Iterable, Iterator, Optional, Deque, Union
+
+
+Facade = Union[NaiveParser, TokenParser]
+
+worker_parser: Optional[Facade] = None  # the fitted parser of a worker process
+
+
+def init_worker(parser: Facade) -> None:  # runs once per worker, so the grammar is shipped once
+    global worker_parser
+    worker_parser = parser
+
+
+def predict_chunk(words: List[str]) -> List[bool]:
+    return worker_parser.predict_many(words)
+
+
+class ParallelParser:  # fitted NaiveParser or TokenParser on a pool of processes, results are in the order of words
+    parser: Facade
+    workers: int
+    chunk_size: int  # words in one task
+    executor: Optional[ProcessPoolExecutor]
+
+    def __init__(self, parser: Facade, workers: Optional[int] = None, chunk_size: int = 256):  # None is all CPUs
+        if parser.representor is None:
+            raise ParserError("Parser is not fit.")
+        if chunk_size < 1:
+            raise ValueError("Chunk size must be positive.")
+        self.parser = parser
+        self.workers = workers if workers is not None else (os.cpu_count() or 1)
+        self.chunk_size = chunk_size
+        self.executor = None
+
+    def __enter__(self) -> 'ParallelParser':
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def __pool(self) -> ProcessPoolExecutor:
+        if self.executor is None:
+            self.executor = ProcessPoolExecutor(self.workers, initializer=init_worker, initargs=(self.parser,))
+        return self.executor
+
+    def imap(self, words: Iterable[str]) -> Iterator[bool]:
+        # words are read lazily, only a couple of chunks per worker are in flight
+        pool = self.__pool()
+        limit = 2 * self.workers
+        iterator = iter(words)
+        pending: Deque[Future] = deque()
+        while True:
+            while len(pending) < limit:
+                chunk = list(islice(iterator, self.chunk_size))
+                if len(chunk) == 0:
+                    break
+                pending.append(pool.submit(predict_chunk, chunk))
+            if len(pending) == 0:
+                return
+            yield from pending.popleft().result()
+
+    def predict_many(self, words: Iterable[str]) -> List[bool]:
+        return list(self.imap(words))
+
+    def close(self) -> None:
+        if self.executor is not None:
+            self.executor.shutdown()
+            self.executor = None
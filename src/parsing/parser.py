@@ -1,19 +1,51 @@
 from src.grammar.grammar import Grammar, Terminal
-from typing import List, Optional
+from typing import List, Dict, Set, Sequence, Optional, Union
 from src.grammar.utils.interface import NaiveGrammar, naive_grammar_to_grammar
 from src.grammar.utils.representor import Representor
+from src.grammar.utils.symbols import SymbolTable
+from src.grammar.utils.translator import Translator, Word
+from src.parsing.prefilter import Prefilter
+from src.parsing.tree import Derivations
 
 
 valid_grammar_classes = [
     "Context-free",
     "LR(k)",
     "LR(1)",
+    "LALR(1)",
     "LR(0)",
+    "LL(1)",
+    "Regular",
     "Unknown"
 ]
 
-
-class GrammarClass:
+# The classes are partially ordered by inclusion, every class is listed with the classes that include it directly.
+# LL(1) grammars are LR(1) but not always LALR(1), and LR(0) grammars are not always LL(1). Right-linear grammars may
+# be ambiguous, so they are only context-free. Nothing is known to include the unknown class, nor to be included.
+wider_grammar_classes: Dict[str, List[str]] = {
+    "Context-free": [],
+    "LR(k)": ["Context-free"],
+    "LR(1)": ["LR(k)"],
+    "LALR(1)": ["LR(1)"],
+    "LR(0)": ["LALR(1)"],
+    "LL(1)": ["LR(1)"],
+    "Regular": ["Context-free"],
+    "Unknown": []
+}
+
+
+def including_grammar_classes(class_name: str) -> Set[str]:  # the class itself and all the wider ones
+    including = {class_name}
+    stack = [class_name]
+    while len(stack) > 0:
+        for wider in wider_grammar_classes[stack.pop()]:
+            if wider not in including:
+                including.add(wider)
+                stack.append(wider)
+    return including
+
+
+class GrammarClass:  # a <= b if every grammar of b is in a, the classes of incomparable names are not ordered
     category: int
 
     def __init__(self, class_name: str):
@@ -21,14 +53,11 @@ class GrammarClass:
             raise ValueError(f"Grammar class {class_name} is not valid.")
         self.category = valid_grammar_classes.index(class_name)
 
-    def __str__(self):
-        return valid_grammar_classes[self.category]
-
     def __le__(self, other):
-        return self.category <= other.category
+        return str(self) in including_grammar_classes(str(other))
 
     def __ge__(self, other):
-        return self.category >= other.category
+        return other <= self
 
     def __eq__(self, other):
         return self.category == other.category
@@ -46,6 +75,21 @@ class Parser:
     def predict(self, word: List[Terminal]) -> bool:
         pass
 
+    def predict_many(self, words: List[List[Terminal]]) -> List[bool]:  # results are in the order of words
+        return [self.predict(word) for word in words]
+
+    def settings(self) -> Optional[Dict[str, Union[str, int, bool]]]:  # the options that change the fitted state,
+        return None  # None if they are not known, e.g. for cache keys
+
+    def terminal_ids(self) -> Optional[Dict[Terminal, int]]:  # ids for predict_ids, None if it is not supported
+        return None
+
+    def predict_ids(self, word: Sequence[int]) -> bool:  # the word is already encoded by terminal_ids
+        raise ParserError(f"{self.__class__.__name__} does not support encoded words.")
+
+    def parse(self, word: List[Terminal]) -> Optional[Derivations]:  # None if the word is not in the language
+        raise ParserError(f"{self.__class__.__name__} does not build parse trees.")
+
 
 class GrammarClassError(Exception):
     pass
@@ -58,32 +102,153 @@ class ParserError(Exception):
 class NaiveParser:  # Facade
     parser: Parser
     representor: Optional[Representor]
+    translator: Optional[Translator]  # built at fit, words are translated without the representor
+    encoded: bool  # the parser takes terminal ids
+    filtering: bool  # words are checked by a prefilter before the parser
+    prefilter: Optional[Prefilter]
 
-    def __init__(self, parser: Parser):
+    def __init__(self, parser: Parser, filtering: bool = True):
         self.parser = parser
         self.representor = None
-
-    def __translate(self, word: str) -> List[Terminal]:
-        if self.representor is None:
-            raise ParserError("Representor is not initialized.")
-        translated = []
-        for symbol in word:
-            if not self.representor.is_known(symbol):
-                term = Terminal()
-                self.representor.add(symbol, term)
-            else:
-                term = self.representor.as_terminal(symbol)
-            translated.append(term)
-        return translated
+        self.translator = None
+        self.encoded = False
+        self.filtering = filtering
+        self.prefilter = None
 
     def fit(self, naive: NaiveGrammar) -> None:
         grammar, representor = naive_grammar_to_grammar(naive)
         self.representor = representor
         self.parser.fit(grammar)
+        terminal_ids = self.parser.terminal_ids()
+        self.translator = Translator(representor, terminal_ids)
+        self.encoded = terminal_ids is not None
+        self.prefilter = Prefilter(grammar, self.translator.terminal_ids()) if self.filtering else None
+
+    def __ids(self, word: Word) -> Optional[bytes]:  # None if the word is rejected before the parser
+        ids = self.translator.ids(word)
+        if self.prefilter is not None and not self.prefilter.check(ids):
+            return None
+        return ids
+
+    def predict(self, word: Word) -> bool:
+        if self.translator is None:
+            raise ParserError("Representor is not initialized.")
+        ids = self.__ids(word)
+        if ids is None:
+            return False
+        if self.encoded:
+            return self.parser.predict_ids(ids)
+        return self.parser.predict(self.translator.terminals_by_ids(ids))
+
+    def predict_many(self, words: List[Word]) -> List[bool]:
+        if self.translator is None:
+            raise ParserError("Representor is not initialized.")
+        results = [False] * len(words)  # rejected words are not given to the parser
+        known: List[int] = []
+        translated: List[List[Terminal]] = []
+        for i, word in enumerate(words):
+            ids = self.__ids(word)
+            if ids is not None:
+                known.append(i)
+                translated.append(self.translator.terminals_by_ids(ids))
+        for i, result in zip(known, self.parser.predict_many(translated)):
+            results[i] = result
+        return results
+
+    def parse(self, word: Word) -> Optional[Derivations]:
+        if self.translator is None:
+            raise ParserError("Representor is not initialized.")
+        ids = self.__ids(word)
+        if ids is None:
+            return None
+        return self.parser.parse(self.translator.terminals_by_ids(ids))
+
+    def grammar_class(self) -> GrammarClass:
+        return self.parser.grammar_class
+
+
+class TokenParser:  # Facade for grammars with named terminals (e.g. read by read_bnf), a word is a line of tokens
+    parser: Parser
+    representor: Optional[SymbolTable]
+    ids: Optional[Dict[str, int]]  # token -> terminal id, built at fit
+    terminals: List[Optional[Terminal]]  # terminal id -> terminal
+    encoded: bool  # the parser takes terminal ids
+    characters: bool  # every character is a token, otherwise tokens are separated by whitespace
+    filtering: bool
+    prefilter: Optional[Prefilter]
+
+    def __init__(self, parser: Parser, characters: bool = False, filtering: bool = True):
+        self.parser = parser
+        self.representor = None
+        self.ids = None
+        self.terminals = []
+        self.encoded = False
+        self.characters = characters
+        self.filtering = filtering
+        self.prefilter = None
+
+    def fit(self, grammar: Grammar, table: SymbolTable) -> None:
+        self.parser.fit(grammar)
+        terminal_ids = self.parser.terminal_ids()
+        self.encoded = terminal_ids is not None
+        if terminal_ids is None:  # ids in the order of creation, as in Translator
+            terminal_ids = {term: i for i, term in enumerate(sorted(grammar.terminals, key=lambda t: t.serial))}
+        self.terminals = [None] * len(terminal_ids)
+        for term, i in terminal_ids.items():
+            self.terminals[i] = term
+        self.ids = {name: terminal_ids[term] for name, term in table.symbol_to_terminal.items() if term in terminal_ids}
+        self.representor = table
+        self.prefilter = Prefilter(grammar, terminal_ids) if self.filtering else None
+
+    def encode(self, word: str) -> Optional[List[int]]:  # None if some token is not a terminal of the grammar
+        ids = self.ids
+        try:
+            return [ids[token] for token in (word if self.characters else word.split())]
+        except KeyError:
+            return None
+
+    def __ids(self, word: str) -> Optional[List[int]]:  # None if the word is rejected before the parser
+        ids = self.encode(word)
+        if self.prefilter is not None and not self.prefilter.check(ids):
+            return None
+        return ids
+
+    def __terminals(self, ids: List[int]) -> List[Terminal]:
+        terminals = self.terminals
+        return [terminals[i] for i in ids]
 
     def predict(self, word: str) -> bool:
-        translated = self.__translate(word)
-        return self.parser.predict(translated)
+        if self.ids is None:
+            raise ParserError("Parser is not fit.")
+        ids = self.__ids(word)
+        if ids is None:
+            return False
+        if self.encoded:
+            return self.parser.predict_ids(ids)
+        return self.parser.predict(self.__terminals(ids))
+
+    def predict_many(self, words: List[str]) -> List[bool]:
+        if self.ids is None:
+            raise ParserError("Parser is not fit.")
+        results = [False] * len(words)  # rejected words are not given to the parser
+        known: List[int] = []
+        translated: List[List[Terminal]] = []
+        for i, word in enumerate(words):
+            ids = self.__ids(word)
+            if ids is not None:
+                known.append(i)
+                translated.append(self.__terminals(ids))
+        for i, result in zip(known, self.parser.predict_many(translated)):
+            results[i] = result
+        return results
+
+    def parse(self, word: str) -> Optional[Derivations]:
+        if self.ids is None:
+            raise ParserError("Parser is not fit.")
+        ids = self.__ids(word)
+        if ids is None:
+            return None
+        return self.parser.parse(self.__terminals(ids))
 
     def grammar_class(self) -> GrammarClass:
         return self.parser.grammar_class
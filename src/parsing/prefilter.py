@@ -0,0 +1,122 @@
+from src.grammar.grammar import Grammar, Rule, Terminal
+from src.grammar.compiled import CompiledGrammar, is_terminal
+from src.grammar.analysis import nullable, productive, reachable, first_sets, min_lengths
+from typing import List, Dict, Set, Sequence, Optional
+
+
+# Necessary conditions of membership derived from the grammar at fit. A word that fails one of them is not in the
+# language, a word that passes all of them is given to the parser. The conditions are checked in one pass over the
+# word, sets of terminals are bitmasks over terminal ids.
+
+reasons = ["alphabet", "length", "first", "last", "pair"]
+
+
+def useful_rules(grammar: Grammar) -> Set[Rule]:  # rules of productive non-terminals reachable from the start
+    compiled = CompiledGrammar(grammar)
+    flags = productive(compiled)
+    rules = {compiled.rules[rule] for rule, right in enumerate(compiled.rights)
+             if all(is_terminal(symbol) or flags[symbol] for symbol in right)}
+    compiled = CompiledGrammar(Grammar(grammar.non_terminals, grammar.terminals, grammar.start, rules))
+    flags = reachable(compiled)
+    return {rule for rule, left in zip(compiled.rules, compiled.lefts) if flags[left]}
+
+
+class Prefilter:
+    min_length: Optional[int]  # None if the language is empty
+    alphabet: int  # terminals that occur in words of the language
+    firsts: int  # terminals a non-empty word of the language can start with
+    lasts: int  # terminals it can end with
+    follows: List[int]  # terminal id -> terminals that can stand right after it
+    checked: int
+    rejected: Dict[str, int]  # reason -> number of rejected words
+
+    def __init__(self, grammar: Grammar, terminal_ids: Optional[Dict[Terminal, int]] = None):
+        rules = useful_rules(grammar)
+        compiled = CompiledGrammar(Grammar(grammar.non_terminals, grammar.terminals, grammar.start, rules))
+        if terminal_ids is None:
+            terminal_ids = compiled.terminal_ids
+        self.checked = 0
+        self.rejected = {reason: 0 for reason in reasons}
+        self.min_length = min_lengths(compiled)[compiled.start]
+        self.alphabet = self.firsts = self.lasts = 0
+        self.follows = [0] * len(terminal_ids)
+        if self.min_length is None:
+            return
+
+        # LAST sets are FIRST sets of the grammar with reversed right parts, non-terminal ids are the same
+        flags = nullable(compiled)
+        firsts = first_sets(compiled, flags)
+        reversed_rules = {Rule(rule.left, rule.right[::-1]) for rule in rules}
+        lasts = first_sets(CompiledGrammar(Grammar(grammar.non_terminals, grammar.terminals, grammar.start,
+                                                   reversed_rules)), flags)
+
+        # own ids are translated to the ids of the parser, terminals it does not know can not reach a check
+        own = [terminal_ids.get(term) for term in compiled.terminals]
+
+        def mask(ids: Set[int]) -> int:
+            result = 0
+            for i in ids:
+                if own[i] is not None:
+                    result |= 1 << own[i]
+            return result
+
+        first_masks = [mask(ids) for ids in firsts]
+        self.firsts = first_masks[compiled.start]
+        self.lasts = mask(lasts[compiled.start])
+
+        # a pair of adjacent terminals comes from the lowest rule that covers both: the left one ends a symbol of
+        # the rule, the right one starts a later symbol, and every symbol between them is nullable
+        for right in compiled.rights:
+            for i, symbol in enumerate(right):
+                if is_terminal(symbol):
+                    self.alphabet |= mask({~symbol})
+                    ending = {~symbol}
+                else:
+                    ending = lasts[symbol]
+                following = 0
+                for later in right[i + 1:]:
+                    if is_terminal(later):
+                        following |= mask({~later})
+                        break
+                    following |= first_masks[later]
+                    if not flags[later]:
+                        break
+                if following != 0:
+                    for term in ending:
+                        if own[term] is not None:
+                            self.follows[own[term]] |= following
+
+    def __reason(self, word: Optional[Sequence[int]]) -> Optional[str]:  # None if the word passes
+        if word is None:
+            return "alphabet"  # the word has characters that are not terminals
+        if self.min_length is None or len(word) < self.min_length:
+            return "length"
+        if len(word) == 0:
+            return None
+        if not (self.firsts >> word[0]) & 1:
+            return "alphabet" if not (self.alphabet >> word[0]) & 1 else "first"
+        if not (self.lasts >> word[-1]) & 1:
+            return "alphabet" if not (self.alphabet >> word[-1]) & 1 else "last"
+        follows = self.follows
+        previous = word[0]
+        for i in range(1, len(word)):
+            current = word[i]
+            if not (follows[previous] >> current) & 1:
+                return "alphabet" if not (self.alphabet >> current) & 1 else "pair"
+            previous = current
+        return None
+
+    def check(self, word: Optional[Sequence[int]]) -> bool:  # False only if the word is not in the language
+        self.checked += 1
+        reason = self.__reason(word)
+        if reason is None:
+            return True
+        self.rejected[reason] += 1
+        return False
+
+    def hit_rate(self) -> float:  # share of checked words rejected without the parser
+        return sum(self.rejected.values()) / self.checked if self.checked > 0 else 0.0
+
+    def reset(self) -> None:
+        self.checked = 0
+        self.rejected = {reason: 0 for reason in reasons}
@@ -0,0 +1,44 @@
+from typing import Dict, Any, Optional, Callable, Union
+
+
+# Counters of parsers and the normalizer. They are collected only if a Stats object is given to the constructor:
+# engines choose counted versions of their steps once, so without it no check is made in the loops. Counters are
+# summed over all calls, the hook gets every event with its own numbers (an Earley column, a CYK word, a normalization
+# stage).
+
+Hook = Callable[[str, Dict[str, Any]], None]  # (event, numbers)
+
+
+class Stats:
+    counters: Dict[str, Union[int, float]]  # e.g. "earley.column.items", "chomsky.SingleRuleEraser.seconds"
+    hook: Optional[Hook]
+
+    def __init__(self, hook: Optional[Hook] = None):
+        self.counters = {}
+        self.hook = hook
+
+    def event(self, name: str, numbers: Dict[str, Union[int, float]], labels: Optional[Dict[str, Any]] = None) -> None:
+        # numbers are added to the counters "name.key", labels (e.g. a position) only go to the hook
+        for key, value in numbers.items():
+            counter = f"{name}.{key}"
+            self.counters[counter] = self.counters.get(counter, 0) + value
+        if self.hook is not None:
+            self.hook(name, {**labels, **numbers} if labels is not None else dict(numbers))
+
+    def get(self, counter: str) -> Union[int, float]:
+        return self.counters.get(counter, 0)
+
+    def reset(self) -> None:
+        self.counters = {}
+
+
+class CountingSet(set):  # a set that counts membership tests, it replaces the dedup sets of counted engines
+    checks: int
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.checks = 0
+
+    def __contains__(self, item: Any) -> bool:
+        self.checks += 1
+        return super().__contains__(item)
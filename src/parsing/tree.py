@@ -0,0 +1,205 @@
+from src.grammar.grammar import GrammarSymbol, Terminal, Rule
+from src.grammar.compiled import CompiledGrammar, DottedRules
+from typing import List, Dict, Set, Tuple, Optional, Union, Callable, Iterator
+import math
+
+
+class ParseTree:
+    symbol: GrammarSymbol
+    rule: Optional[Rule]  # None for a terminal
+    children: List["ParseTree"]
+
+    def __init__(self, symbol: GrammarSymbol, rule: Optional[Rule] = None,
+                 children: Optional[List["ParseTree"]] = None):
+        self.symbol = symbol
+        self.rule = rule
+        self.children = children if children is not None else []
+
+    def leaves(self) -> List[Terminal]:  # the derived word
+        result: List[Terminal] = []
+        stack: List[ParseTree] = [self]
+        while len(stack) > 0:
+            tree = stack.pop()
+            if tree.rule is None:
+                result.append(tree.symbol)
+            stack.extend(reversed(tree.children))
+        return result
+
+    def format(self, name: Callable[[GrammarSymbol], str]) -> str:  # e.g. S(a S() b), name is Representor.as_symbol
+        parts: List[str] = []
+        stack: List[Union[ParseTree, str]] = [self]
+        while len(stack) > 0:
+            tree = stack.pop()
+            if isinstance(tree, str):
+                parts.append(tree)
+                continue
+            parts.append(name(tree.symbol))
+            if tree.rule is not None:
+                parts.append("(")
+                stack.append(")")
+                for i, child in enumerate(reversed(tree.children)):
+                    stack.append(child)
+                    if i < len(tree.children) - 1:
+                        stack.append(" ")
+        return "".join(parts)
+
+
+class Derivations:  # derivation trees of one word, enumerated lazily
+    def trees(self) -> Iterator[ParseTree]:
+        pass
+
+    def first(self) -> ParseTree:
+        return next(self.trees())
+
+
+# Shared packed parse forest (Scott). A symbol node (X, i, j) stands for all derivations of word[i:j] from X,
+# an intermediate node (A -> αx·β, i, j) for all derivations of word[i:j] from αx. Every family (packed node) of a node
+# is (dotted state, left, right): right is the node of x, left the node of α, so the forest is binarized and has
+# a cubic number of families.
+
+class ForestNode:
+    __slots__ = ("symbol", "state", "start", "end", "packs")
+    symbol: Optional[int]  # encoded symbol, None for an intermediate node
+    state: Optional[int]  # dotted state of an intermediate node
+    start: int
+    end: int
+    packs: List[Tuple[int, Optional["ForestNode"], Optional["ForestNode"]]]  # empty for a terminal
+
+    def __init__(self, symbol: Optional[int], state: Optional[int], start: int, end: int):
+        self.symbol = symbol
+        self.state = state
+        self.start = start
+        self.end = end
+        self.packs = []
+
+
+class ParseForest(Derivations):
+    compiled: CompiledGrammar
+    dotted: DottedRules
+    root: ForestNode
+
+    def __init__(self, compiled: CompiledGrammar, dotted: DottedRules, root: ForestNode):
+        self.compiled = compiled
+        self.dotted = dotted
+        self.root = root
+
+    def nodes(self) -> List[ForestNode]:  # reachable from the root
+        result: List[ForestNode] = [self.root]
+        seen: Set[ForestNode] = {self.root}
+        i = 0
+        while i < len(result):
+            for _, left, right in result[i].packs:
+                for child in (left, right):
+                    if child is not None and child not in seen:
+                        seen.add(child)
+                        result.append(child)
+            i += 1
+        return result
+
+    def size(self) -> int:  # nodes and families
+        return sum(1 + len(node.packs) for node in self.nodes())
+
+    def is_ambiguous(self) -> bool:
+        return any(len(node.packs) > 1 for node in self.nodes())
+
+    def count(self) -> Union[int, float]:  # number of derivations, math.inf if the forest has a cycle
+        counts: Dict[ForestNode, int] = {}
+        entered: Set[ForestNode] = {self.root}
+        stack: List[Tuple[ForestNode, Iterator[ForestNode]]] = [(self.root, self.__children(self.root))]
+        while len(stack) > 0:
+            node, children = stack[-1]
+            child = next(children, None)
+            if child is None:
+                stack.pop()
+                counts[node] = sum(math.prod(counts[child] for child in (left, right) if child is not None)
+                                   for _, left, right in node.packs) if len(node.packs) > 0 else 1
+                continue
+            if child in counts:
+                continue
+            if child in entered:
+                return math.inf  # a derivation of the node goes through the node itself
+            entered.add(child)
+            stack.append((child, self.__children(child)))
+        return counts[self.root]
+
+    @staticmethod
+    def __children(node: ForestNode) -> Iterator[ForestNode]:
+        return (child for _, left, right in node.packs for child in (left, right) if child is not None)
+
+    def trees(self) -> Iterator[ParseTree]:
+        # Trees are enumerated lazily, depth first over the choices of families. Nodes still to visit are a linked
+        # list (node, rest) shared by the choice points, None in it closes the last opened symbol node. A symbol node
+        # can not be opened inside itself, so a cyclic forest yields its trees without cycles.
+        events: List[Union[Tuple[int, int], ForestNode, None]] = []  # opened node, terminal, closed node
+        path: List[ForestNode] = []
+        on_path: Set[ForestNode] = set()
+        log: List[Tuple[bool, ForestNode]] = []  # (opened, node) to undo changes of the path
+        choices: List[Tuple[tuple, int, int, int]] = []  # (pending with the node first, events, log, family)
+        pending: Optional[tuple] = (self.root, None)
+        family = 0
+        while True:
+            blocked = False
+            while pending is not None:
+                item, rest = pending
+                if item is None:
+                    node = path.pop()
+                    on_path.discard(node)
+                    log.append((False, node))
+                    events.append(None)
+                    pending = rest
+                elif len(item.packs) == 0:
+                    events.append(item)
+                    pending = rest
+                elif item in on_path:
+                    blocked = True
+                    break
+                else:
+                    choices.append((pending, len(events), len(log), family))
+                    state, left, right = item.packs[family]
+                    family = 0
+                    if item.symbol is not None:
+                        events.append((item.symbol, state))
+                        path.append(item)
+                        on_path.add(item)
+                        log.append((True, item))
+                        rest = (None, rest)
+                    if right is not None:
+                        rest = (right, rest)
+                    if left is not None:
+                        rest = (left, rest)
+                    pending = rest
+            if not blocked:
+                yield self.__tree(events)
+
+            while True:  # the next family of the last choice point that has one
+                if len(choices) == 0:
+                    return
+                pending, length, log_length, family = choices.pop()
+                while len(log) > log_length:
+                    opened, node = log.pop()
+                    if opened:
+                        path.pop()
+                        on_path.discard(node)
+                    else:
+                        path.append(node)
+                        on_path.add(node)
+                del events[length:]
+                family += 1
+                if family < len(pending[0].packs):
+                    break
+
+    def __tree(self, events: List[Union[Tuple[int, int], ForestNode, None]]) -> ParseTree:
+        compiled = self.compiled
+        roots: List[ParseTree] = []
+        stack: List[List[ParseTree]] = [roots]  # children of the open nodes
+        for event in events:
+            if event is None:
+                stack.pop()
+            elif isinstance(event, ForestNode):
+                stack[-1].append(ParseTree(compiled.decode_symbol(event.symbol)))
+            else:
+                symbol, state = event
+                tree = ParseTree(compiled.decode_symbol(symbol), compiled.rules[self.dotted.rules[state]])
+                stack[-1].append(tree)
+                stack.append(tree.children)
+        return roots[0]
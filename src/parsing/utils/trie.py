@@ -0,0 +1,24 @@
+from typing import List, Dict, Sequence, Hashable
+
+
+class PrefixTrie:  # words of a batch, the ones with a common prefix share its path, the root is 0
+    children: List[Dict[Hashable, int]]  # node -> symbol -> node
+    ends: List[List[int]]  # node -> indices of the words ending there
+
+    def __init__(self, words: Sequence[Sequence[Hashable]]):
+        self.children = [{}]
+        self.ends = [[]]
+        for i, word in enumerate(words):
+            node = 0
+            for symbol in word:
+                following = self.children[node].get(symbol)
+                if following is None:
+                    following = len(self.children)
+                    self.children[node][symbol] = following
+                    self.children.append({})
+                    self.ends.append([])
+                node = following
+            self.ends[node].append(i)
+
+    def __len__(self) -> int:
+        return len(self.children)
@@ -0,0 +1,93 @@
+import unittest
+from src.parsing.parser import NaiveParser, GrammarClass, GrammarClassError
+from src.parsing import classifier
+from src.parsing.classifier import classify
+from src.grammar.utils.interface import NaiveGrammar, NaiveRule, naive_grammar_to_grammar
+from src.parsing.implementations.auto.parser import AutoParser
+from src.parsing.implementations.regular.parser import RegularParser
+from tests.utils.loader import test_data
+from typing import Dict, Any
+
+
+class TestAuto(unittest.TestCase):
+    data: Dict[str, Any]  # Any = List[NaiveGrammar, GrammarClass, List[Dict[str, Union[str, bool]]]]
+
+    def setUp(self):
+        self.data = test_data()
+
+    def test_01_grammar_class(self):
+        for name, test_set in self.data.items():
+            naive = NaiveParser(AutoParser())
+            naive.fit(test_set[0])
+            self.assertEqual(test_set[1], naive.grammar_class(),
+                             f"Test '{name}'. Grammar class {naive.grammar_class()} is wrong.")
+
+    def test_02_predict(self):
+        for name, test_set in self.data.items():
+            naive = NaiveParser(AutoParser())
+            naive.fit(test_set[0])
+            for test in test_set[2]:
+                result = naive.predict(test['word'])
+                self.assertEqual(test['result'], result,
+                                 f"Test '{name}'. Prediction on '{test['word']}' is wrong.")
+
+    def test_03_class_order(self):  # a <= b if a includes b
+        lr0, lalr1, lr1 = GrammarClass("LR(0)"), GrammarClass("LALR(1)"), GrammarClass("LR(1)")
+        ll1, regular = GrammarClass("LL(1)"), GrammarClass("Regular")
+        context_free, unknown = GrammarClass("Context-free"), GrammarClass("Unknown")
+        self.assertTrue(lr1 <= lalr1 <= lr0 and lr1 <= ll1 and ll1 >= lr1)  # LL(1) grammars go to LR(1) tables
+        self.assertTrue(context_free <= regular and context_free <= ll1 and GrammarClass("LR(k)") <= lr0)
+        for a, b in [(ll1, lr0), (lr0, ll1), (lalr1, ll1), (lr1, regular), (regular, ll1), (context_free, unknown),
+                     (unknown, context_free)]:
+            self.assertFalse(a <= b, f"{a} includes {b}.")
+            self.assertFalse(b >= a, f"{a} includes {b}.")
+        self.assertTrue(unknown <= unknown and lr0 >= lr0)
+
+    def test_04_engine_class(self):  # the engine takes some class of the grammar
+        for name, test_set in self.data.items():
+            naive = NaiveParser(AutoParser())
+            naive.fit(test_set[0])
+            analysis = naive.parser.analysis
+            classes = [GrammarClass(class_name) for flag, class_name in
+                       [(analysis.regular, "Regular"), (analysis.ll1, "LL(1)"), (analysis.lr0, "LR(0)"),
+                        (analysis.lalr1, "LALR(1)"), (analysis.lr1, "LR(1)"), (True, "Context-free")] if flag]
+            self.assertTrue(any(naive.parser.engine.grammar_class <= grammar_class for grammar_class in classes),
+                            f"Test '{name}'. Engine {naive.parser.engine.grammar_class} does not take the grammar.")
+            self.assertIn(naive.grammar_class(), classes)
+            self.assertFalse(any(naive.grammar_class() <= grammar_class and naive.grammar_class() != grammar_class
+                                 for grammar_class in classes),
+                             f"Test '{name}'. A class of the grammar is narrower than {naive.grammar_class()}.")
+
+    def test_05_analysis_cache(self):  # the cache keeps the recently used grammars only
+        first = naive_grammar_to_grammar(self.data["palindrome"][0])[0]
+        analysis = classify(first)
+        for length in range(1, 2 * classifier.analysis_cache_size):
+            grammar = naive_grammar_to_grammar(NaiveGrammar({'S'}, {'a'}, 'S', {NaiveRule('S', 'a' * length)}))[0]
+            classify(grammar)
+            classify(first)
+            self.assertLessEqual(len(classifier.analysis_cache), classifier.analysis_cache_size)
+        self.assertIs(analysis, classify(first))  # used after every other grammar, so it is not evicted
+        self.assertEqual(classifier.analysis_cache_size, len(classifier.analysis_cache))
+
+
+class TestRegular(unittest.TestCase):
+    data: Dict[str, Any]
+
+    def setUp(self):
+        self.data = test_data()
+
+    def test_01_not_regular(self):
+        for name in ["correct_bracket_sequence", "palindrome", "arithmetic_expression"]:
+            with self.assertRaises(GrammarClassError, msg=f"Test '{name}'. Grammar is not right-linear."):
+                NaiveParser(RegularParser()).fit(self.data[name][0])
+
+    def test_02_predict(self):
+        naive = NaiveParser(RegularParser())
+        naive.fit(self.data["right_recursive_list"][0])
+        for test in self.data["right_recursive_list"][2]:
+            self.assertEqual(test['result'], naive.predict(test['word']),
+                             f"Prediction on '{test['word']}' is wrong.")
+
+
+if __name__ == '__main__':
+    unittest.main()
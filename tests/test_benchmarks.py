@@ -0,0 +1,43 @@
+import unittest
+import random
+from src.parsing.implementations.earley.parser import EarleyParser
+from benchmarks.generators import families, random_family
+from benchmarks.parsing import measure_words, compare
+
+
+class TestGenerators(unittest.TestCase):
+    def test_01_families(self):  # generated words are in the languages
+        rng = random.Random(0)
+        for name, family in list(families.items()) + [("random", random_family(60, seed)) for seed in range(5)]:
+            parser = EarleyParser()
+            parser.fit(family.grammar)
+            for length in [1, 2, 7, 30]:
+                word = family.word(length, rng)
+                self.assertTrue(parser.predict(word), f"Family '{name}'. The word of length {length} is not derived.")
+
+    def test_02_lengths(self):
+        rng = random.Random(0)
+        for name in ["dyck", "palindromes", "ambiguous"]:
+            self.assertEqual(40, len(families[name].word(40, rng)))
+        family = random_family(100)
+        self.assertEqual([50] * 5, [len(family.word(50, rng)) for _ in range(5)])
+
+
+class TestParsingBenchmark(unittest.TestCase):
+    def test_01_measure(self):
+        measured = measure_words(families["dyck"], "earley", [4, 8, 16], 1, 10.0, 0)
+        self.assertEqual([4, 8, 16], [size for size, _, _ in measured["points"]])
+        self.assertTrue(all(memory > 0 for _, _, memory in measured["points"]))
+        self.assertIsNotNone(measured["exponent"])
+
+    def test_02_compare(self):
+        def run(seconds):
+            return {"words": {"dyck": {"cyk": {"points": [[8, seconds, 0], [16, 4 * seconds, 0]], "fit": 0.01}}},
+                    "grammars": {}}
+        self.assertEqual([], compare(run(0.01), run(0.012), 1.5))
+        self.assertEqual(2, len(compare(run(0.01), run(0.02), 1.5)))
+        self.assertEqual([], compare(run(0.0001), run(0.0002), 1.5))  # too short to compare
+
+
+if __name__ == '__main__':
+    unittest.main()
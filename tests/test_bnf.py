@@ -0,0 +1,88 @@
+import unittest
+from src.grammar.grammar import Grammar, Rule, NonTerminal, Terminal
+from src.grammar.errors import GrammarSyntaxError
+from src.grammar.utils.symbols import SymbolTable
+from src.grammar.utils.bnf import read_bnf, write_bnf
+from src.grammar.utils.interface import grammar_to_naive_grammar
+from src.parsing.implementations.earley.parser import EarleyParser
+
+
+arithmetic = """
+# token types are bare names without rules
+expr   ::= expr "+" term | term
+term   ::= term "*" factor | factor ;
+factor ::= "(" expr ")" | NUMBER | IDENTIFIER
+<args> ::= <expr> "," <args> | <expr> | ""
+"""
+
+
+def rules_of(grammar: Grammar, table: SymbolTable):
+    return sorted((table.as_symbol(rule.left), tuple(map(table.as_symbol, rule.right))) for rule in grammar.rules)
+
+
+class TestSymbolTable(unittest.TestCase):
+    def test_01_interning(self):
+        table = SymbolTable()
+        self.assertIs(table.terminal("NUMBER"), table.terminal("NUMBER"))
+        self.assertIsNot(table.terminal("expr"), table.non_terminal("expr"))  # the kinds have separate names
+        self.assertIs(table.non_terminal("expr"), table.as_grammar_symbol("expr"))
+        self.assertEqual([table.terminal("NUMBER")] * 2, table.word(["NUMBER", "NUMBER"]))
+        self.assertIsNone(table.word(["NUMBER", "STRING"]))
+
+    def test_02_fresh_names(self):
+        table = SymbolTable()
+        table.non_terminal("_N0")
+        names = {table.auto_add(NonTerminal()) for _ in range(1000)}
+        self.assertEqual(1000, len(names))
+        self.assertNotIn("_N0", names)
+
+    def test_03_many_symbols(self):  # grammars of the naive interface are limited to single characters
+        table = SymbolTable()
+        non_terminals = [table.non_terminal(f"rule{i}") for i in range(100)]
+        term = table.terminal("x")
+        rules = {Rule(non_terminals[i], (term, non_terminals[i + 1])) for i in range(99)} | \
+            {Rule(non_terminals[99], (term,))}
+        grammar = Grammar(set(non_terminals), {term}, non_terminals[0], rules)
+        self.assertEqual(100, len(read_bnf(write_bnf(grammar, table))[0].rules))
+        self.assertRaises(Exception, grammar_to_naive_grammar, grammar)
+
+
+class TestBNF(unittest.TestCase):
+    def test_01_read(self):
+        grammar, table = read_bnf(arithmetic)
+        self.assertEqual("expr", table.as_symbol(grammar.start))
+        self.assertEqual({"+", "*", "(", ")", ",", "NUMBER", "IDENTIFIER"}, table.terminal_symbols())
+        self.assertEqual({"expr", "term", "factor", "args"}, table.non_terminal_symbols())
+        self.assertIn(("args", ()), rules_of(grammar, table))
+        self.assertEqual(10, len(grammar.rules))
+
+        parser = EarleyParser()
+        parser.fit(grammar)
+        for text, result in [("NUMBER + ( IDENTIFIER * NUMBER )", True), ("NUMBER +", False), ("", False)]:
+            self.assertEqual(result, parser.predict(table.word(text.split())), f"Prediction on '{text}' is wrong.")
+
+    def test_02_round_trip(self):
+        grammar, table = read_bnf(arithmetic + "<quote> -> '\"' \"\\\\\" |")
+        again, again_table = read_bnf(write_bnf(grammar, table))
+        self.assertEqual(rules_of(grammar, table), rules_of(again, again_table))
+        self.assertIn(("quote", ('"', "\\")), rules_of(again, again_table))
+
+    def test_03_errors(self):
+        for text, line in [("a b ::= c", 1), ("::= a", 1), ('"a" ::= b', 1), ("a ::= b ;\n|", 2),
+                           ("a ::= b\nc d ; e", 2), ("a ::= b\n  @", 2), ("", None)]:
+            with self.assertRaises(GrammarSyntaxError, msg=f"Text {text!r}.") as context:
+                read_bnf(text)
+            if line is not None:
+                self.assertTrue(str(context.exception).startswith(f"Line {line}:"), str(context.exception))
+
+    def test_04_large(self):
+        lines = [f"<n{i}> ::= \"t{i % 50}\" <n{i + 1}> | \"t{i % 7}\"" for i in range(30000)]
+        lines.append("<n30000> ::= \"end\"")
+        grammar, table = read_bnf("\n".join(lines))
+        self.assertEqual(60001, len(grammar.rules))
+        self.assertEqual(30001, len(grammar.non_terminals))
+        self.assertEqual(51, len(grammar.terminals))
+
+
+if __name__ == '__main__':
+    unittest.main()
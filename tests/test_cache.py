@@ -0,0 +1,122 @@
+import unittest
+import tempfile
+import pickle
+import os
+from pathlib import Path
+from src.grammar.utils.interface import NaiveGrammar, NaiveRule
+from src.parsing.parser import ParserError
+from src.parsing.cache import ParserCache
+from src.parsing.stats import Stats
+from src.parsing.implementations.cyk import weighted
+from src.parsing.implementations.cyk.weighted import WeightedCYKParser
+from src.parsing.implementations.cyk.semiring import boolean, counting, viterbi, inside
+from src.parsing.implementations.cyk.parser import CYKParser
+from src.parsing.implementations.earley.parser import EarleyParser
+from src.parsing.implementations.lr.parser import LRParser
+from tests.utils.loader import test_data
+from typing import Dict, Any
+
+
+class TestCache(unittest.TestCase):
+    data: Dict[str, Any]  # Any = List[NaiveGrammar, GrammarClass, List[Dict[str, Union[str, bool]]]]
+
+    def setUp(self):
+        self.data = test_data()
+
+    def test_01_keys(self):
+        with tempfile.TemporaryDirectory() as directory:
+            cache = ParserCache(directory)
+            naive = self.data["arithmetic_expression"][0]
+            self.assertEqual(cache.key(CYKParser(), naive), cache.key(CYKParser(), naive))
+            self.assertNotEqual(cache.key(CYKParser(), naive), cache.key(EarleyParser(), naive))
+            self.assertNotEqual(cache.key(LRParser("LR(1)"), naive), cache.key(LRParser("LALR(1)"), naive))
+            self.assertNotEqual(cache.key(CYKParser(), naive),
+                                cache.key(CYKParser(), self.data["correct_bracket_sequence"][0]))
+
+    def test_02_predict(self):
+        with tempfile.TemporaryDirectory() as directory:
+            cache = ParserCache(directory)
+            for name, test_set in self.data.items():
+                key = cache.key(CYKParser(), test_set[0])
+                self.assertIsNone(cache.load(key))
+                cache.fit(CYKParser(), test_set[0])
+                loaded = cache.load(key)
+                self.assertIsNotNone(loaded, f"Test '{name}'. Parser is not cached.")
+                for test in test_set[2]:
+                    self.assertEqual(test['result'], loaded.predict(test['word']),
+                                     f"Test '{name}'. Prediction on '{test['word']}' is wrong.")
+
+    def test_03_broken_file(self):
+        with tempfile.TemporaryDirectory() as directory:
+            cache = ParserCache(directory)
+            naive = self.data["correct_bracket_sequence"][0]
+            key = cache.key(EarleyParser(), naive)
+            with open(f"{directory}/{key}.pickle", "wb") as file:
+                file.write(b"broken")
+            self.assertIsNone(cache.load(key))
+            self.assertTrue(cache.fit(EarleyParser(), naive).predict("(())()"))
+            self.assertIsNotNone(cache.load(key))
+
+    def test_04_authentication(self):  # entries which are not signed by the secret are not unpickled
+        with tempfile.TemporaryDirectory() as directory:
+            naive = self.data["correct_bracket_sequence"][0]
+            cache = ParserCache(directory)
+            key = cache.key(CYKParser(), naive)
+            cache.fit(CYKParser(), naive)
+            self.assertIsNotNone(ParserCache(directory).load(key))  # the secret is kept in the directory
+            self.assertIsNone(ParserCache(directory, b"other secret").load(key))
+
+            path = Path(directory) / f"{key}.pickle"
+            data = path.read_bytes()
+            path.write_bytes(data[:-1] + bytes([data[-1] ^ 1]))
+            self.assertIsNone(cache.load(key))
+            path.write_bytes(data[:32] + pickle.dumps(("fingerprint", key)) + pickle.dumps(None))
+            self.assertIsNone(cache.load(key))
+            self.assertTrue(cache.fit(CYKParser(), naive).predict("(())()"))
+            self.assertIsNotNone(cache.load(key))
+
+    @unittest.skipIf(not hasattr(os, "getuid"), "File owners are not checked.")
+    def test_05_shared_secret(self):
+        with tempfile.TemporaryDirectory() as directory:
+            ParserCache(directory)
+            os.chmod(Path(directory) / "secret", 0o644)
+            self.assertRaises(PermissionError, ParserCache, directory)
+            ParserCache(directory, b"given secret")
+
+    @unittest.skipIf(weighted.np is None, "NumPy is not installed.")
+    def test_06_semirings(self):  # the settings which are not plain values are in the key too
+        with tempfile.TemporaryDirectory() as directory:
+            cache = ParserCache(directory)
+            naive = NaiveGrammar({'S'}, {'a'}, 'S', {NaiveRule('S', 'SS', 0.4), NaiveRule('S', 'a', 0.6)})
+            keys = {cache.key(WeightedCYKParser(semiring), naive) for semiring in [boolean, counting, viterbi, inside]}
+            self.assertEqual(4, len(keys))
+            cache.fit(WeightedCYKParser(inside), naive)
+            best = cache.fit(WeightedCYKParser(viterbi), naive)
+            self.assertAlmostEqual(0.4 ** 2 * 0.6 ** 3, best.parser.score(best.translator.terminals_of('aaa')))
+
+    def test_07_stats(self):  # stats are not stored, so hooks of any kind do not break the store
+        with tempfile.TemporaryDirectory() as directory:
+            cache = ParserCache(directory)
+            naive = self.data["correct_bracket_sequence"][0]
+            events = []
+            for parser, plain in [(CYKParser(stats=Stats(lambda name, numbers: events.append(name))), CYKParser()),
+                                  (EarleyParser(True, Stats(lambda name, numbers: events.append(name))),
+                                   EarleyParser(True))]:
+                self.assertEqual(cache.key(plain, naive), cache.key(parser, naive))
+                self.assertTrue(cache.fit(parser, naive).predict("(())"))
+                loaded = cache.load(cache.key(parser, naive))
+                self.assertIsNone(loaded.parser.stats)
+                self.assertTrue(loaded.predict("(())()"))
+            self.assertLess(0, len(events))
+
+    def test_08_unknown_settings(self):
+        class Custom(EarleyParser):
+            def settings(self):
+                return None
+
+        with tempfile.TemporaryDirectory() as directory:
+            self.assertRaises(ParserError, ParserCache(directory).key, Custom(), self.data["palindrome"][0])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,93 @@
+import unittest
+import tempfile
+import io
+import contextlib
+from pathlib import Path
+from src.cli import main, read_blocks
+from src.grammar.utils.bnf import read_bnf, write_bnf
+from src.grammar.utils.interface import NaiveGrammar, naive_grammar_to_grammar
+from src.parsing.parser import TokenParser, ParserError
+from src.parsing.implementations.earley.parser import EarleyParser
+from src.parsing.implementations.cyk.parser import CYKParser
+from tests.utils.loader import test_data
+from typing import Dict, Any, List
+
+
+def naive_text(naive: NaiveGrammar) -> str:  # the format of input_naive_grammar
+    rules = [f"{rule.left} -> {rule.right}" for rule in naive.rules]
+    return "\n".join([f"{len(naive.non_terminals)} {len(naive.terminals)} {len(rules)}",
+                      "".join(sorted(naive.non_terminals)), "".join(sorted(naive.terminals))] + rules +
+                     [naive.start]) + "\n"
+
+
+class TestTokenParser(unittest.TestCase):
+    def test_01_predict(self):
+        grammar, table = read_bnf('list ::= item "," list | item\nitem ::= NUMBER | "[" list "]" | "[" "]"')
+        words = ["NUMBER", "[ NUMBER , [ ] ]", "NUMBER ,", "", "NUMBER , STRING", "[ [ NUMBER ] , NUMBER ]"]
+        for parser in [EarleyParser(), EarleyParser(compact=True), CYKParser()]:
+            for filtering in [True, False]:
+                tokens = TokenParser(parser, filtering=filtering)
+                tokens.fit(grammar, table)
+                self.assertEqual([True, True, False, False, False, True], tokens.predict_many(words))
+                self.assertEqual([True, True, False, False, False, True], list(map(tokens.predict, words)))
+
+    def test_02_not_fit(self):
+        with self.assertRaises(ParserError):
+            TokenParser(EarleyParser()).predict("a")
+
+
+class TestCLI(unittest.TestCase):
+    data: Dict[str, Any]  # Any = List[NaiveGrammar, GrammarClass, List[Dict[str, Union[str, bool]]]]
+
+    def setUp(self):
+        self.data = test_data()
+
+    def run_cli(self, arguments: List[str]) -> List[str]:  # lines of the output
+        with tempfile.TemporaryDirectory() as directory:
+            output = Path(directory) / "verdicts.txt"
+            self.assertEqual(0, main(arguments + ["--output", str(output)]))
+            return output.read_text().splitlines()
+
+    def test_01_formats(self):  # both formats of every grammar give the verdicts of the tests
+        with tempfile.TemporaryDirectory() as directory:
+            for name, test_set in self.data.items():
+                words = Path(directory) / "words.txt"
+                words.write_text("".join(test['word'] + "\n" for test in test_set[2]))
+                expected = ["Yes" if test['result'] else "No" for test in test_set[2]]
+                naive = Path(directory) / "grammar.txt"
+                naive.write_text(naive_text(test_set[0]))
+                bnf = Path(directory) / "grammar.bnf"
+                bnf.write_text(write_bnf(*naive_grammar_to_grammar(test_set[0])))
+                self.assertEqual(expected, self.run_cli([str(naive), str(words), "--format", "naive"]),
+                                 f"Test '{name}'. Verdicts on the naive grammar are wrong.")
+                self.assertEqual(expected, self.run_cli([str(bnf), str(words), "--characters", "--engine", "cyk"]),
+                                 f"Test '{name}'. Verdicts on the BNF grammar are wrong.")
+
+    def test_02_workers(self):
+        with tempfile.TemporaryDirectory() as directory:
+            grammar = Path(directory) / "grammar.bnf"
+            grammar.write_text("S ::= S S | \"(\" S \")\" | \"\"")
+            words = Path(directory) / "words.txt"
+            words.write_bytes(b"( )\r\n( ( ) ) ( )\n) (\n\n( ( )")  # the last line has no line break
+            expected = ["( )\tYes", "( ( ) ) ( )\tYes", ") (\tNo", "\tYes", "( ( )\tNo"]
+            self.assertEqual(expected, self.run_cli([str(grammar), str(words), "--echo"]))
+            self.assertEqual(expected, self.run_cli([str(grammar), str(words), "--echo", "--workers", "2",
+                                                     "--chunk-size", "2", "--engine", "earley_classic"]))
+
+    def test_03_blocks(self):  # lines cut by blocks are joined
+        data = "".join(f"word {i}\n" for i in range(1000)).encode()
+        blocks = list(read_blocks(io.BytesIO(data), 7))
+        self.assertEqual([f"word {i}" for i in range(1000)], [line for block in blocks for line in block])
+
+    def test_04_errors(self):
+        with tempfile.TemporaryDirectory() as directory:
+            grammar = Path(directory) / "grammar.bnf"
+            grammar.write_text("S ::= \"a\" S \"b\" |\n\"b\" ::= S")
+            with contextlib.redirect_stderr(io.StringIO()) as errors:
+                self.assertEqual(2, main([str(grammar)]))
+                self.assertEqual(2, main([str(Path(directory) / "missing.bnf")]))
+            self.assertIn("Line 2", errors.getvalue())
+
+
+if __name__ == '__main__':
+    unittest.main()
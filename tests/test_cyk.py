@@ -1,16 +1,28 @@
 import unittest
-from src.parsing.parser import NaiveParser, GrammarClassError
+from src.grammar.grammar import Grammar, Rule, Terminal, NonTerminal
+from src.parsing.parser import NaiveParser, GrammarClassError, ParserError
+from src.grammar.utils.interface import NaiveGrammar, NaiveRule
+from src.parsing.implementations.cyk.parser import CYKParser
 from src.parsing.implementations.earley.parser import EarleyParser
+from src.parsing.implementations.cyk.chomsky import ChomskyNormalizer
+from src.parsing.implementations.cyk.bitset import BitsetCYKParser
+from src.parsing.implementations.cyk import matrix
+from src.parsing.implementations.cyk.matrix import MatrixCYKParser
+from src.parsing.implementations.cyk import weighted
+from src.parsing.implementations.cyk.weighted import WeightedCYKParser
+from src.parsing.implementations.cyk.semiring import boolean, counting, viterbi, inside
+from src.parsing.stats import Stats
 from tests.utils.loader import test_data
 from typing import Dict, Any
+from itertools import islice
 
 
-class TestEarley(unittest.TestCase):
+class TestCYK(unittest.TestCase):
     naive: NaiveParser
     data: Dict[str, Any]  # Any = List[NaiveGrammar, GrammarClass, List[Dict[str, Union[str, bool]]]]
 
     def setUp(self):
-        self.naive = NaiveParser(EarleyParser())
+        self.naive = NaiveParser(CYKParser())
         self.data = test_data()
 
     def test_01_fit(self):
@@ -26,5 +38,191 @@ class TestEarley(unittest.TestCase):
                                  f"Test '{name}'. Prediction on '{test['word']}' is wrong.")
 
 
+class TestBitsetCYK(TestCYK):
+    def setUp(self):
+        self.naive = NaiveParser(BitsetCYKParser())
+        self.data = test_data()
+
+
+@unittest.skipIf(matrix.np is None, "NumPy is not installed.")
+class TestMatrixCYK(TestCYK):
+    def setUp(self):
+        self.naive = NaiveParser(MatrixCYKParser(leaf_size=2))  # small leaves to run the recursion on short words
+        self.data = test_data()
+
+
+class TestTracedCYK(TestCYK):
+    def setUp(self):
+        self.naive = NaiveParser(CYKParser(traced=True))
+        self.data = test_data()
+
+    def test_03_parse(self):
+        for name, test_set in self.data.items():
+            self.naive.fit(test_set[0])
+            name_of = self.naive.representor.as_symbol
+            rules = {(rule.left, rule.right) for rule in test_set[0].rules}
+            for test in test_set[2]:
+                derivations = self.naive.parse(test['word'])
+                self.assertEqual(test['result'], derivations is not None,
+                                 f"Test '{name}'. Parsing of '{test['word']}' is wrong.")
+                if derivations is None:
+                    continue
+                for tree in islice(derivations.trees(), 10):  # trees are in the original grammar
+                    self.assertEqual(test['word'], "".join(name_of(term) for term in tree.leaves()))
+                    stack = [tree]
+                    while len(stack) > 0:
+                        node = stack.pop()
+                        if node.rule is not None:
+                            self.assertIn((name_of(node.rule.left), "".join(map(name_of, node.rule.right))), rules)
+                            self.assertEqual(node.rule.right, tuple(child.symbol for child in node.children))
+                        stack.extend(node.children)
+
+    def test_04_ambiguous(self):
+        self.naive.fit(NaiveGrammar({'S'}, {'a'}, 'S', {NaiveRule('S', 'SS'), NaiveRule('S', 'a')}))
+        derivations = self.naive.parse('aaaa')
+        self.assertEqual(5, len(list(derivations.trees())))  # Catalan number
+        self.assertEqual("S(S(a) S(S(a) S(S(a) S(a))))", derivations.first().format(self.naive.representor.as_symbol))
+
+    def test_05_not_traced(self):
+        naive = NaiveParser(CYKParser())
+        naive.fit(self.data["palindrome"][0])
+        self.assertRaises(ParserError, naive.parse, "aba")
+
+    def test_06_all_derivations(self):  # trees of ambiguous unit chains and empty rules are the ones Earley gives
+        grammars = [
+            ({NaiveRule('S', 'A'), NaiveRule('S', 'B'), NaiveRule('A', 'a'), NaiveRule('B', 'a')}, ['a']),
+            ({NaiveRule('S', 'SSS'), NaiveRule('S', ''), NaiveRule('S', 'a')}, ['', 'a', 'aaa']),
+            ({NaiveRule('S', 'AB'), NaiveRule('A', 'B'), NaiveRule('A', ''), NaiveRule('B', 'A'), NaiveRule('B', 'b'),
+              NaiveRule('B', 'aB')}, ['', 'b', 'ab', 'bab']),
+        ]
+        for rules, words in grammars:
+            grammar = NaiveGrammar({rule.left for rule in rules}, {'a', 'b'}, 'S', rules)
+            self.naive.fit(grammar)
+            earley = NaiveParser(EarleyParser())
+            earley.fit(grammar)
+            for word in words:
+                trees = [tree.format(self.naive.representor.as_symbol) for tree in self.naive.parse(word).trees()]
+                expected = [tree.format(earley.representor.as_symbol) for tree in earley.parse(word).trees()]
+                self.assertEqual(sorted(expected), sorted(trees), f"Trees of '{word}' differ.")
+
+
+@unittest.skipIf(weighted.np is None, "NumPy is not installed.")
+class TestWeightedCYK(TestCYK):
+    def setUp(self):
+        self.naive = NaiveParser(WeightedCYKParser(boolean))
+        self.data = test_data()
+
+    def score(self, semiring, rules, word):
+        naive = NaiveParser(WeightedCYKParser(semiring))
+        naive.fit(NaiveGrammar({rule.left for rule in rules}, {'a', 'b'}, 'S', set(rules)))
+        return naive.parser.score(naive.translator.terminals_of(word))
+
+    def test_03_counting(self):
+        rules = [NaiveRule('S', 'SS'), NaiveRule('S', 'a')]
+        for length, catalan in [(1, 1), (2, 1), (4, 5), (8, 429), (12, 58786)]:
+            self.assertEqual(catalan, self.score(counting, rules, 'a' * length))
+        self.assertEqual(0, self.score(counting, rules, 'ab'))
+
+    def test_04_probabilities(self):
+        rules = [NaiveRule('S', 'SS', 0.4), NaiveRule('S', 'a', 0.6)]
+        self.assertAlmostEqual(2 * 0.4 ** 2 * 0.6 ** 3, self.score(inside, rules, 'aaa'))
+        self.assertAlmostEqual(0.4 ** 2 * 0.6 ** 3, self.score(viterbi, rules, 'aaa'))
+        rules = [NaiveRule('S', 'A', 0.5), NaiveRule('S', '', 0.5), NaiveRule('A', 'aS', 1.0)]
+        self.assertAlmostEqual(0.5 ** 3, self.score(inside, rules, 'aa'))  # units and empty rules are weighted
+        self.assertAlmostEqual(0.5, self.score(inside, rules, ''))
+        rules = [NaiveRule('S', 'S', 0.5), NaiveRule('S', 'a', 0.5)]
+        self.assertAlmostEqual(1.0, self.score(inside, rules, 'a'))  # a geometric series over unit cycles
+        self.assertAlmostEqual(0.5, self.score(viterbi, rules, 'a'))
+
+    def test_05_divergent(self):
+        rules = [NaiveRule('S', 'SS'), NaiveRule('S', ''), NaiveRule('S', 'a')]  # e = 1 + e ** 2 has no solution
+        for semiring in [counting, inside]:
+            self.assertRaises(GrammarClassError, self.score, semiring, rules, 'a')
+        self.assertTrue(self.score(boolean, rules, 'aa'))
+
+    def test_06_useless_divergence(self):  # cycles of useless non-terminals do not weigh any word
+        unreachable = [NaiveRule('S', 'a'), NaiveRule('A', 'A'), NaiveRule('A', 'a')]
+        unproductive = [NaiveRule('S', ''), NaiveRule('S', 'bAS'), NaiveRule('A', 'SA')]
+        for semiring, one in [(counting, 1), (inside, 1.0)]:
+            self.assertEqual(one, self.score(semiring, unreachable, 'a'))
+            self.assertEqual(one, self.score(semiring, unproductive, ''))
+            self.assertEqual(0, self.score(semiring, unproductive, 'b'))
+
+
+class TestCYKStats(unittest.TestCase):
+    def test_01_counters(self):
+        events = []
+        naive = NaiveParser(CYKParser(stats=Stats(lambda name, numbers: events.append((name, numbers)))))
+        naive.fit(NaiveGrammar({'S'}, {'a', 'b'}, 'S', {NaiveRule('S', 'SS'), NaiveRule('S', 'a')}))
+        stages = [numbers for name, numbers in events if name.startswith("chomsky.")]
+        self.assertEqual(len(ChomskyNormalizer().handlers), len(stages))
+        self.assertEqual(len(naive.parser.grammar.rules), stages[-1]['rules'])
+
+        self.assertTrue(naive.predict('aaaa'))
+        name, numbers = events[-1]
+        self.assertEqual("cyk.word", name)
+        self.assertEqual(4, numbers['length'])
+        self.assertEqual(10, numbers['filled'])  # every subword of a-s is derived
+        triples = sum(1 for start in range(4) for end in range(start, 4) for mid in range(start, end))
+        binary = len(naive.parser.binary_rules)
+        terminal = naive.parser.compiled.terminal_ids[naive.representor.as_terminal('a')]
+        self.assertEqual(triples * binary + 4 * len(naive.parser.terminal_lefts[terminal]), numbers['applications'])
+
+
+class TestDeepGrammar(unittest.TestCase):  # normalization passes must not depend on the recursion limit
+    def test_01_chain(self):
+        depth = 3000
+        terminal = Terminal()
+        non_terminals = [NonTerminal() for _ in range(depth + 1)]
+        rules = {Rule(non_terminals[depth], (terminal,))}
+        for i in range(depth):
+            rules.add(Rule(non_terminals[i], (terminal, non_terminals[i + 1])))
+            rules.add(Rule(non_terminals[i], ()))
+        parser = CYKParser()
+        parser.fit(Grammar(set(non_terminals), {terminal}, non_terminals[0], rules))
+        for length in [0, 1, 2, 10]:
+            self.assertTrue(parser.predict([terminal] * length), f"Prediction on a word of length {length} is wrong.")
+
+    def test_02_traced_nullable(self):  # derivations of epsilon are expanded with the trees, not at fit
+        depth = 300
+        terminal = Terminal()
+        start = NonTerminal()
+        towers = [NonTerminal() for _ in range(depth + 1)]  # B_i -> B_i+1 B_i+1 | e, exponentially many trees
+        rules = {Rule(start, (towers[0], terminal)), Rule(towers[depth], ())}
+        for i in range(depth):
+            rules.add(Rule(towers[i], (towers[i + 1], towers[i + 1])))
+            rules.add(Rule(towers[i], ()))
+        parser = CYKParser(traced=True)
+        parser.fit(Grammar(set(towers) | {start}, {terminal}, start, rules))
+        derivations = parser.parse([terminal])
+        first = derivations.first()
+        self.assertEqual([towers[0], terminal], [child.symbol for child in first.children])
+        self.assertEqual([], first.children[0].children)  # the smallest derivation of epsilon is the first one
+        for tree in islice(derivations.trees(), 100):
+            self.assertEqual([terminal], tree.leaves())
+
+    def test_03_traced_units(self):  # chains of unit rules too
+        depth = 300
+        terminal = Terminal()
+        chain = [NonTerminal() for _ in range(depth + 1)]
+        sides = [(NonTerminal(), NonTerminal()) for _ in range(depth)]  # X_i -> L_i | R_i, L_i -> X_i+1, R_i -> X_i+1
+        rules = {Rule(chain[depth], (terminal,))}
+        for i in range(depth):
+            for side in sides[i]:
+                rules.add(Rule(chain[i], (side,)))
+                rules.add(Rule(side, (chain[i + 1],)))
+        parser = CYKParser(traced=True)
+        parser.fit(Grammar(set(chain) | {side for pair in sides for side in pair}, {terminal}, chain[0], rules))
+        tree = parser.parse([terminal]).first()
+        self.assertEqual([terminal], tree.leaves())
+        nodes, stack = 0, [tree]
+        while len(stack) > 0:
+            nodes += 1
+            stack.extend(stack.pop().children)
+        self.assertEqual(2 * depth + 2, nodes)  # one side of every diamond and the terminal
+        trees = {tree.format(lambda symbol: str(id(symbol))) for tree in islice(parser.parse([terminal]).trees(), 100)}
+        self.assertEqual(100, len(trees))
+
+
 if __name__ == '__main__':
     unittest.main()
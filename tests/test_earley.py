@@ -1,7 +1,11 @@
 import unittest
 from src.parsing.parser import NaiveParser, GrammarClassError, ParserError
 from src.parsing.implementations.earley.parser import EarleyParser
+from src.parsing.stats import Stats
+from src.grammar.utils.interface import NaiveGrammar, NaiveRule
 from tests.utils.loader import test_data
+from itertools import islice
+from math import comb, inf
 from typing import Dict, Any
 
 
@@ -28,6 +32,107 @@ class TestEarley(unittest.TestCase):
                 self.assertEqual(test['result'], result,
                                  f"Test '{name}'. Prediction on '{test['word']}' is wrong.")
 
+    def test_03_predict_many(self):
+        for name, test_set in self.data.items():
+            self.naive.fit(test_set[0])
+            words = [test['word'] for test in test_set[2]]
+            words += [word + word for word in words]  # the batch shares prefixes
+            self.assertEqual([self.naive.predict(word) for word in words], self.naive.predict_many(words),
+                             f"Test '{name}'. Batch prediction is wrong.")
+
+    def test_04_session(self):
+        for name, test_set in self.data.items():
+            self.naive.fit(test_set[0])
+            representor = self.naive.representor
+            for test in test_set[2]:
+                session = self.naive.parser.start()
+                for symbol in test['word']:
+                    if not representor.is_known(symbol) or not session.feed(representor.as_terminal(symbol)):
+                        break
+                self.assertEqual(test['result'], session.is_accepting(),
+                                 f"Test '{name}'. Session on '{test['word']}' is wrong.")
+
+    def test_05_session_fails_fast(self):
+        self.naive.fit(self.data["correct_bracket_sequence"][0])
+        left, right = self.naive.representor.as_terminal('('), self.naive.representor.as_terminal(')')
+        session = self.naive.parser.start()
+        self.assertEqual({left}, session.expected_terminals())
+        self.assertTrue(session.feed(left))
+        self.assertEqual({left, right}, session.expected_terminals())
+        self.assertFalse(session.is_accepting())
+        self.assertTrue(session.feed(right))
+        self.assertTrue(session.is_accepting())
+        self.assertFalse(session.feed(right))
+        self.assertFalse(session.is_viable_prefix())
+        self.assertEqual(2, session.failed_at)
+        self.assertFalse(session.feed(left))
+
+    def test_06_parse(self):
+        for name, test_set in self.data.items():
+            self.naive.fit(test_set[0])
+            name_of = self.naive.representor.as_symbol
+            for test in test_set[2]:
+                forest = self.naive.parse(test['word'])
+                self.assertEqual(test['result'], forest is not None,
+                                 f"Test '{name}'. Parsing of '{test['word']}' is wrong.")
+                if forest is None:
+                    continue
+                trees = list(islice(forest.trees(), 20))
+                self.assertLess(0, len(trees))
+                self.assertEqual(len(trees), len({tree.format(name_of) for tree in trees}),
+                                 f"Test '{name}'. Trees of '{test['word']}' repeat.")
+                for tree in trees:
+                    self.assertEqual(test['word'], "".join(name_of(term) for term in tree.leaves()))
+
+    def test_07_forest_sharing(self):
+        self.naive.fit(NaiveGrammar({'S'}, {'a'}, 'S', {NaiveRule('S', 'SS'), NaiveRule('S', 'a')}))
+        forest = self.naive.parse('a' * 30)
+        self.assertEqual(comb(58, 29) // 30, forest.count())  # Catalan number, the trees are not enumerated
+        self.assertTrue(forest.is_ambiguous())
+        self.assertLess(forest.size(), 30 ** 3)
+        self.assertEqual("S(S(a) S(a))", next(self.naive.parse('aa').trees()).format(self.naive.representor.as_symbol))
+
+        self.naive.fit(self.data["unit_cycle"][0])
+        forest = self.naive.parse('ba')
+        self.assertEqual(inf, forest.count())  # S -> A -> B -> A ... derive the word in infinitely many ways
+        self.assertEqual(1, len(list(forest.trees())))  # trees without cycles only
+
+
+class TestCompactEarley(TestEarley):
+    def setUp(self):
+        self.naive = NaiveParser(EarleyParser(compact=True))
+        self.data = test_data()
+
+
+class TestEarleyStats(unittest.TestCase):
+    def test_01_engines_agree(self):
+        for name, test_set in test_data().items():
+            counted = []
+            for compact in [False, True]:
+                stats = Stats()
+                naive = NaiveParser(EarleyParser(compact, stats), filtering=False)
+                naive.fit(test_set[0])
+                for test in test_set[2]:
+                    naive.predict(test['word'])
+                counted.append(stats.counters)
+            self.assertGreaterEqual(counted[1].pop("earley.column.deduplicated", 0), 0)
+            self.assertEqual(counted[0], counted[1], f"Test '{name}'. Counters of the engines differ.")
+
+    def test_02_hook(self):
+        events = []
+        naive = NaiveParser(EarleyParser(True, Stats(lambda name, numbers: events.append(numbers))))
+        naive.fit(NaiveGrammar({'S'}, {'a'}, 'S', {NaiveRule('S', 'SS'), NaiveRule('S', 'a')}))
+        self.assertTrue(naive.predict('aaaa'))
+        self.assertEqual([0, 1, 2, 3, 4], [numbers['position'] for numbers in events])
+        self.assertEqual([0, 1, 1, 1, 1], [numbers['scans'] for numbers in events])
+        self.assertGreater(sum(numbers['deduplicated'] for numbers in events), 0)  # S -> SS completes S twice
+
+    def test_03_disabled(self):  # the plain steps are not replaced
+        naive = NaiveParser(EarleyParser(compact=True))
+        naive.fit(test_data()["palindrome"][0])
+        self.assertNotIn("advance", naive.parser.engine.__dict__)
+        self.assertIsNone(naive.parser.engine.stats)
+
 
 if __name__ == '__main__':
     unittest.main()
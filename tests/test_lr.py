@@ -0,0 +1,80 @@
+import unittest
+from src.grammar.utils.interface import NaiveGrammar, NaiveRule
+from src.parsing.parser import NaiveParser, GrammarClassError
+from src.parsing.implementations.lr.parser import LRParser
+from src.parsing.implementations.lr.glr import GLRParser
+from tests.utils.loader import test_data
+from typing import Dict, Any
+
+
+class TestLR(unittest.TestCase):
+    kind: str = "LR(1)"
+    data: Dict[str, Any]  # Any = List[NaiveGrammar, GrammarClass, List[Dict[str, Union[str, bool]]]]
+
+    def setUp(self):
+        self.data = test_data()
+
+    def test_01_fit(self):
+        for name in ["correct_bracket_sequence", "arithmetic_expression", "right_recursive_list"]:
+            NaiveParser(LRParser(self.kind)).fit(self.data[name][0])
+
+    def test_02_conflicts(self):
+        for name in ["palindrome", "strange_grammar", "nullable_completions"]:
+            with self.assertRaises(GrammarClassError, msg=f"Test '{name}'. Conflicts are not reported."):
+                NaiveParser(LRParser(self.kind)).fit(self.data[name][0])
+
+    def test_03_predict(self):
+        for name, test_set in self.data.items():
+            naive = NaiveParser(LRParser(self.kind))
+            try:
+                naive.fit(test_set[0])
+            except GrammarClassError:
+                continue
+            for test in test_set[2]:
+                result = naive.predict(test['word'])
+                self.assertEqual(test['result'], result,
+                                 f"Test '{name}'. Prediction on '{test['word']}' is wrong.")
+
+
+class TestLALR(TestLR):
+    kind: str = "LALR(1)"
+
+
+class TestLRNotLALR(unittest.TestCase):
+    naive: NaiveGrammar
+
+    def setUp(self):
+        rules = [('S', 'aAd'), ('S', 'bBd'), ('S', 'aBe'), ('S', 'bAe'), ('A', 'c'), ('B', 'c')]
+        self.naive = NaiveGrammar({'S', 'A', 'B'}, {'a', 'b', 'c', 'd', 'e'}, 'S',
+                                  {NaiveRule(left, right) for left, right in rules})
+
+    def test_01_lalr_conflicts(self):
+        with self.assertRaises(GrammarClassError):
+            NaiveParser(LRParser("LALR(1)")).fit(self.naive)
+
+    def test_02_lr_predict(self):
+        parser = NaiveParser(LRParser("LR(1)"))
+        parser.fit(self.naive)
+        for word, result in [("acd", True), ("bcd", True), ("ace", True), ("bce", True), ("acc", False), ("", False)]:
+            self.assertEqual(result, parser.predict(word), f"Prediction on '{word}' is wrong.")
+
+
+class TestGLR(unittest.TestCase):
+    data: Dict[str, Any]
+
+    def setUp(self):
+        self.data = test_data()
+
+    def test_01_predict(self):
+        for kind in ["LALR(1)", "LR(1)"]:
+            for name, test_set in self.data.items():
+                naive = NaiveParser(GLRParser(kind))
+                naive.fit(test_set[0])  # conflicts are allowed
+                for test in test_set[2]:
+                    result = naive.predict(test['word'])
+                    self.assertEqual(test['result'], result,
+                                     f"Test '{name}' ({kind}). Prediction on '{test['word']}' is wrong.")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,32 @@
+import unittest
+from src.parsing.parser import NaiveParser, ParserError
+from src.parsing.parallel import ParallelParser
+from src.parsing.implementations.earley.parser import EarleyParser
+from src.parsing.implementations.cyk.parser import CYKParser
+from tests.utils.loader import test_data
+from typing import Dict, Any
+
+
+class TestParallel(unittest.TestCase):
+    data: Dict[str, Any]  # Any = List[NaiveGrammar, GrammarClass, List[Dict[str, Union[str, bool]]]]
+
+    def setUp(self):
+        self.data = test_data()
+
+    def test_01_not_fit(self):
+        with self.assertRaises(ParserError):
+            ParallelParser(NaiveParser(EarleyParser()))
+
+    def test_02_predict_many(self):
+        for parser in [EarleyParser(compact=True), CYKParser()]:
+            for name, test_set in self.data.items():
+                naive = NaiveParser(parser)
+                naive.fit(test_set[0])
+                words = [test['word'] for test in test_set[2]] * 3
+                with ParallelParser(naive, workers=2, chunk_size=2) as pool:
+                    self.assertEqual([naive.predict(word) for word in words], pool.predict_many(iter(words)),
+                                     f"Test '{name}'. Parallel prediction is wrong.")
+
+
+if __name__ == '__main__':
+    unittest.main()
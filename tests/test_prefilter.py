@@ -0,0 +1,63 @@
+import unittest
+from src.grammar.utils.interface import NaiveGrammar, NaiveRule, naive_grammar_to_grammar
+from src.parsing.parser import NaiveParser
+from src.parsing.prefilter import Prefilter
+from src.parsing.implementations.earley.parser import EarleyParser
+from src.parsing.implementations.cyk.parser import CYKParser
+from tests.utils.loader import test_data
+from typing import Dict, Any
+
+
+class TestPrefilter(unittest.TestCase):
+    data: Dict[str, Any]  # Any = List[NaiveGrammar, GrammarClass, List[Dict[str, Union[str, bool]]]]
+
+    def setUp(self):
+        self.data = test_data()
+
+    def test_01_necessary(self):  # a word of the language is never rejected
+        for name, test_set in self.data.items():
+            naive = NaiveParser(EarleyParser())
+            naive.fit(test_set[0])
+            for test in test_set[2]:
+                ids = naive.translator.ids(test['word'])
+                if test['result']:
+                    self.assertTrue(naive.prefilter.check(ids),
+                                    f"Test '{name}'. Prefilter rejected '{test['word']}'.")
+
+    def test_02_reasons(self):
+        naive = NaiveParser(CYKParser())
+        naive.fit(self.data["arithmetic_expression"][0])
+        for word, reason in [("", "length"), ("+a", "first"), ("a*", "last"), ("a+()", "pair"), ("aa", "pair"),
+                             ("a-a", "alphabet")]:
+            before = naive.prefilter.rejected[reason]
+            self.assertFalse(naive.predict(word), f"Prediction on '{word}' is wrong.")
+            self.assertEqual(before + 1, naive.prefilter.rejected[reason], f"Reason of '{word}' is wrong.")
+        self.assertTrue(naive.predict("(a+a)*a"))
+        self.assertEqual(7, naive.prefilter.checked)
+        self.assertAlmostEqual(6 / 7, naive.prefilter.hit_rate())
+
+    def test_03_unused_rules(self):  # terminals of unproductive and unreachable rules are not in the alphabet
+        naive = NaiveGrammar({'S', 'A', 'B'}, {'a', 'b', 'c'}, 'S',
+                             {NaiveRule('S', 'aS'), NaiveRule('S', 'a'), NaiveRule('S', 'bA'),
+                              NaiveRule('A', 'bA'), NaiveRule('B', 'c')})
+        grammar, representor = naive_grammar_to_grammar(naive)
+        prefilter = Prefilter(grammar)
+        self.assertEqual(1, prefilter.min_length)
+        self.assertEqual(1, bin(prefilter.alphabet).count("1"))
+        self.assertFalse(prefilter.check([prefilter.alphabet.bit_length()]))  # the other terminal
+
+        empty = NaiveGrammar({'S'}, {'a'}, 'S', {NaiveRule('S', 'aS')})
+        prefilter = Prefilter(naive_grammar_to_grammar(empty)[0])
+        self.assertIsNone(prefilter.min_length)
+        self.assertFalse(prefilter.check([]))
+
+    def test_04_disabled(self):
+        naive = NaiveParser(EarleyParser(), filtering=False)
+        naive.fit(self.data["correct_bracket_sequence"][0])
+        self.assertIsNone(naive.prefilter)
+        for test in self.data["correct_bracket_sequence"][2]:
+            self.assertEqual(test['result'], naive.predict(test['word']))
+
+
+if __name__ == '__main__':
+    unittest.main()
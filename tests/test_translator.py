@@ -0,0 +1,44 @@
+import unittest
+from src.parsing.parser import NaiveParser
+from src.parsing.implementations.earley.parser import EarleyParser
+from src.parsing.implementations.lr.parser import LRParser
+from tests.utils.loader import test_data
+from typing import Dict, Any
+
+
+class TestTranslator(unittest.TestCase):
+    data: Dict[str, Any]  # Any = List[NaiveGrammar, GrammarClass, List[Dict[str, Union[str, bool]]]]
+
+    def setUp(self):
+        self.data = test_data()
+
+    def test_01_input_types(self):
+        for parser in [EarleyParser(), EarleyParser(compact=True), LRParser()]:
+            naive = NaiveParser(parser)
+            naive.fit(self.data["arithmetic_expression"][0])
+            for test in self.data["arithmetic_expression"][2]:
+                data = test['word'].encode("ascii")
+                for word in [test['word'], data, bytearray(data), memoryview(data)]:
+                    self.assertEqual(test['result'], naive.predict(word),
+                                     f"Prediction on {word!r} by {type(parser).__name__} is wrong.")
+
+    def test_02_unknown_symbols(self):
+        naive = NaiveParser(EarleyParser())
+        naive.fit(self.data["correct_bracket_sequence"][0])
+        symbols = naive.representor.symbols()
+        for word in ["(a)", "()x", "(é)", "\x00", "()" * 10 + "A"]:
+            self.assertFalse(naive.predict(word), f"Prediction on {word!r} is wrong.")
+        self.assertEqual([True, False, False], naive.predict_many(["()", "(x)", "(("]))
+        self.assertEqual(symbols, naive.representor.symbols(), "Representor is changed by unknown symbols.")
+
+    def test_03_ids(self):
+        naive = NaiveParser(LRParser())
+        naive.fit(self.data["correct_bracket_sequence"][0])
+        ids = naive.translator.ids("(())")
+        terminal_ids = naive.parser.terminal_ids()
+        self.assertEqual([terminal_ids[naive.representor.as_terminal(symbol)] for symbol in "(())"], list(ids))
+        self.assertIsNone(naive.translator.ids("(a)"))
+
+
+if __name__ == '__main__':
+    unittest.main()